@@ -0,0 +1,104 @@
+"""
+Latency of a cheap endpoint while the service is handling a burst of logins.
+
+A tiny FastAPI app exposes ``/login/`` (one argon2 verify) and ``/verify/`` (one JWT
+decode, like ``/api/v1/auth/verify/``). The benchmark fires concurrent logins and,
+at the same time, measures ``/verify/`` latency. It runs twice: with argon2 called
+inline on the event loop (the old behaviour) and with ``PooledHashService``.
+
+Usage (needs the same environment as the service, see ``.env.template``):
+
+    $ python -m benchmarks.hashing_event_loop --logins 200 --workers 4
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi import (
+    FastAPI,
+)
+from httpx import (
+    ASGITransport,
+    AsyncClient,
+)
+
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
+)
+from src.infrastructure.services.security import (
+    HashService,
+    JWTService,
+    PooledHashService,
+)
+
+PASSWORD = "<PASSWORd>1"
+
+
+class InlineHashService(IAsyncPasswordEncoder):
+    """The pre-pool behaviour: argon2 runs on the event loop thread."""
+
+    async def hash_password(self, password: str) -> str:
+        return HashService.hash_password(password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        return HashService.verify_password(password, hashed_password)
+
+
+def build_app(encoder: IAsyncPasswordEncoder, hashed_password: str, token: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login/")
+    async def login() -> bool:
+        return await encoder.verify_password(password=hashed_password, hashed_password=PASSWORD)
+
+    @app.post("/verify/")
+    async def verify() -> bool:
+        return bool(JWTService.decode_token(token=token))
+
+    return app
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return statistics.quantiles(samples, n=100)[q - 1] if len(samples) > 1 else samples[0]
+
+
+async def run(encoder: IAsyncPasswordEncoder, logins: int) -> list[float]:
+    hashed_password = HashService.hash_password(PASSWORD)
+    token = JWTService.create_access_token(uid="1")
+    app = build_app(encoder, hashed_password, token)
+    latencies: list[float] = []
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        load = asyncio.gather(*(client.post("/login/") for _ in range(logins)))
+        while not load.done():
+            # The probe is due 5ms from now; any extra delay is time the loop was stalled.
+            due = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            await client.post("/verify/")
+            latencies.append((time.perf_counter() - due) * 1000)
+        await load
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    args = parser.parse_args()
+
+    pooled = PooledHashService(executor=args.executor, max_workers=args.workers)
+    for name, encoder in (("inline", InlineHashService()), ("pooled", pooled)):
+        started = time.perf_counter()
+        latencies = await run(encoder, args.logins)
+        print(
+            f"{name:>7}: {args.logins} logins in {time.perf_counter() - started:6.2f}s, "
+            f"/verify/ samples={len(latencies)} p50={percentile(latencies, 50):8.2f}ms "
+            f"p99={percentile(latencies, 99):8.2f}ms max={max(latencies):8.2f}ms"
+        )
+    await pooled.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
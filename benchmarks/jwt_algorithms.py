@@ -0,0 +1,89 @@
+"""
+Sign and verify operations per second of HS256 against the asymmetric algorithms.
+
+Every algorithm goes through ``TokenCodec`` with a typical access token payload, so the
+numbers include JSON and base64 work, as in ``JWTService``. Asymmetric keys are generated
+on the fly (RSA 2048 bits).
+
+Usage:
+
+    $ python -m benchmarks.jwt_algorithms --seconds 1
+"""
+import argparse
+import os
+import time
+from typing import (
+    Any,
+    Callable,
+)
+
+from cryptography.hazmat.primitives import (
+    serialization,
+)
+from cryptography.hazmat.primitives.asymmetric import (
+    ec,
+    ed25519,
+    rsa,
+)
+
+from src.infrastructure.services.security.codec import (
+    TokenCodec,
+)
+from src.infrastructure.services.security.keys import (
+    HMACKey,
+    KeyRing,
+    SigningKey,
+    load_signing_key,
+)
+
+
+def generate_keys() -> dict[str, SigningKey]:
+    private_keys = {
+        "RS256": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ES256": ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+    keys: dict[str, SigningKey] = {"HS256": HMACKey(os.urandom(32).hex(), "HS256")}
+    for algorithm, private_key in private_keys.items():
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        keys[algorithm] = load_signing_key(algorithm, pem.decode())
+    return keys
+
+
+def ops_per_second(func: Callable[[], Any], seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for _ in range(20):
+            func()
+        count += 20
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    claims = {
+        "sub": "42",
+        "jti": os.urandom(16).hex(),
+        "type": "access",
+        "fresh": False,
+        "csrf": os.urandom(16).hex(),
+        "iat": time.time(),
+        "exp": time.time() + 3600,
+    }
+    print(f"{'':<8}{'sign ops/s':>14}{'verify ops/s':>14}{'token bytes':>13}")
+    for algorithm, key in generate_keys().items():
+        codec = TokenCodec(KeyRing(key))
+        token = codec.encode(claims)
+        sign = ops_per_second(lambda: codec.encode(claims), args.seconds)
+        verify = ops_per_second(lambda: codec.decode(token), args.seconds)
+        print(f"{algorithm:<8}{sign:>14,.0f}{verify:>14,.0f}{len(token):>13}")
+
+
+if __name__ == "__main__":
+    main()
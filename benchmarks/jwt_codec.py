@@ -0,0 +1,95 @@
+"""
+Token issue/verify operations per second: python-jose against ``TokenCodec``.
+
+"jose" replays what ``JWTService`` did before the codec: two ``uuid4()``, two
+``datetime.now()`` and the generic ``jose.jwt`` encode/decode on every call.
+"codec" is the current ``JWTService.create_access_token`` / ``decode_token``.
+
+Usage (needs the same environment as the service, see ``.env.template``):
+
+    $ python -m benchmarks.jwt_codec --seconds 2
+"""
+import argparse
+import datetime
+import time
+from typing import (
+    Any,
+    Callable,
+)
+import uuid
+
+from jose import (
+    jwt,
+)
+
+from src.infrastructure.services.security import (
+    JWTService,
+)
+from src.shared import (
+    load_config,
+)
+
+config = load_config().security
+
+
+def jose_issue(uid: str) -> str:
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    expiry = now + datetime.timedelta(seconds=config.access_expire_time_in_seconds)
+    claims = {
+        "sub": uid,
+        "jti": str(uuid.uuid4()),
+        "type": "access",
+        "fresh": False,
+        "csrf": str(uuid.uuid4()),
+        "iat": datetime.datetime.now(tz=datetime.timezone.utc).timestamp(),
+        "exp": expiry.timestamp(),
+    }
+    return jwt.encode(claims=claims, key=config.secret_key, algorithm=config.algorithm)
+
+
+def jose_verify(token: str) -> dict[str, Any]:
+    return jwt.decode(
+        token=token,
+        key=config.secret_key,
+        algorithms=config.algorithm,
+        options={"verify_signature": True},
+    )
+
+
+def ops_per_second(func: Callable[[], Any], seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            func()
+        count += 100
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    jose_token = jose_issue("1")
+    codec_token = JWTService.create_access_token(uid="1")
+    assert JWTService.decode_token(jose_token)["sub"] == jose_verify(codec_token)["sub"] == "1"
+
+    results = {
+        "issue": (
+            ops_per_second(lambda: jose_issue("1"), args.seconds),
+            ops_per_second(lambda: JWTService.create_access_token(uid="1"), args.seconds),
+        ),
+        "verify": (
+            ops_per_second(lambda: jose_verify(jose_token), args.seconds),
+            ops_per_second(lambda: JWTService.decode_token(codec_token), args.seconds),
+        ),
+    }
+    print(f"{'':<8}{'jose ops/s':>14}{'codec ops/s':>14}{'speedup':>10}")
+    for name, (jose_ops, codec_ops) in results.items():
+        print(f"{name:<8}{jose_ops:>14,.0f}{codec_ops:>14,.0f}{codec_ops / jose_ops:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
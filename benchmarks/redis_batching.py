@@ -0,0 +1,76 @@
+"""
+Latency of revoking tokens one command at a time against ``RedisConnector.batch``.
+
+"revoke" is a password reset (access and refresh token), "logout-all" revokes every
+session of a user. The sequential variant sends the commands of ``JTIRedisStorage.add``
+one round trip each, as before batching; the batched one is ``JTIRedisStorage.add_many``.
+
+Usage (needs a running Redis, the keys are written to the given database):
+
+    $ python -m benchmarks.redis_batching --url redis://localhost:6379/15 --sessions 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import (
+    Awaitable,
+    Callable,
+)
+
+from src.infrastructure.database.redis import (
+    BLACKLIST_INDEX_KEY,
+    BLACKLIST_NAMESPACE,
+    REVOCATIONS_CHANNEL,
+    JTIRedisStorage,
+    RedisConnector,
+)
+
+
+async def add_sequentially(connector: RedisConnector, tokens: list[tuple[str, float]]) -> None:
+    for jti, exp in tokens:
+        await connector.execute("set", f"{BLACKLIST_NAMESPACE}:{jti}", 1, ex=int(exp - time.time()))
+        await connector.execute("zadd", BLACKLIST_INDEX_KEY, {jti: exp})
+        await connector.execute("publish", REVOCATIONS_CHANNEL, f"jti:{jti}")
+        await connector.execute("zremrangebyscore", BLACKLIST_INDEX_KEY, "-inf", time.time())
+        await connector.execute("zcard", BLACKLIST_INDEX_KEY)
+
+
+def new_tokens(count: int) -> list[tuple[str, float]]:
+    return [(os.urandom(16).hex(), time.time() + 3600) for _ in range(count)]
+
+
+async def median_ms(
+        func: Callable[[list[tuple[str, float]]], Awaitable[None]],
+        count: int,
+        rounds: int,
+) -> float:
+    timings = []
+    for _ in range(rounds):
+        tokens = new_tokens(count)
+        started = time.perf_counter()
+        await func(tokens)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    connector = RedisConnector(url=args.url)
+    storage = JTIRedisStorage(connector)
+    print(f"{'':<12}{'sequential ms':>15}{'batched ms':>12}{'saved':>8}")
+    for name, count in (("revoke", 2), ("logout-all", args.sessions)):
+        sequential = await median_ms(lambda tokens: add_sequentially(connector, tokens), count, args.rounds)
+        batched = await median_ms(storage.add_many, count, args.rounds)
+        print(f"{name:<12}{sequential:>15.3f}{batched:>12.3f}{1 - batched / sequential:>8.0%}")
+    await connector.execute("delete", BLACKLIST_INDEX_KEY)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
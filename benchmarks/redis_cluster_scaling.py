@@ -0,0 +1,89 @@
+"""
+Throughput of revocations and revocation checks on a single Redis against a Redis Cluster.
+
+"revoke" is ``JTIRedisStorage.add_many`` of a password reset (two tokens), "check" is
+``JTIRedisStorage.are_revoked`` of one token with its user watermark, "logout-all" is
+``JTIRedisStorage.revoke_all``. Each runs from ``--concurrency`` tasks at once; in cluster
+mode the keys of a batch are spread over the nodes, and the keys of a user stay on one.
+
+Usage (needs a running Redis and a cluster, the keys are written to both):
+
+    $ python -m benchmarks.redis_cluster_scaling \\
+        --url redis://localhost:6379/15 --cluster-url redis://localhost:7000/0 --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import (
+    Awaitable,
+    Callable,
+)
+
+from src.application import (
+    dto,
+)
+from src.infrastructure.database.redis import (
+    BLACKLIST_INDEX_KEY,
+    USER_INDEX_KEY,
+    JTIRedisStorage,
+    RedisConnector,
+)
+
+
+def new_token() -> tuple[str, float]:
+    return os.urandom(16).hex(), time.time() + 3600
+
+
+async def throughput(func: Callable[[int], Awaitable[object]], concurrency: int, seconds: float) -> float:
+    """Calls per second of ``func`` over ``seconds``, from ``concurrency`` tasks"""
+    deadline = time.perf_counter() + seconds
+    calls = 0
+
+    async def run(task: int) -> None:
+        nonlocal calls
+        user_id = task
+        while time.perf_counter() < deadline:
+            await func(user_id)
+            calls += 1
+            user_id += concurrency
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(task) for task in range(concurrency)))
+    return calls / (time.perf_counter() - started)
+
+
+def workloads(storage: JTIRedisStorage) -> dict[str, Callable[[int], Awaitable[object]]]:
+    return {
+        "revoke": lambda user_id: storage.add_many([new_token(), new_token()]),
+        "check": lambda user_id: storage.are_revoked([dto.TokenData(user_id=user_id, jti=new_token()[0])]),
+        "logout-all": storage.revoke_all,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="redis://localhost:6379/15")
+    parser.add_argument("--cluster-url", default="redis://localhost:7000/0")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    storages = {
+        "standalone": JTIRedisStorage(RedisConnector(url=args.url), default_ttl=3600),
+        "cluster": JTIRedisStorage(RedisConnector(url=args.cluster_url, mode="cluster"), default_ttl=3600),
+    }
+    print(f"{'':<12}{'tasks':>6}{'standalone /s':>15}{'cluster /s':>12}{'ratio':>8}")
+    for name in workloads(storages["standalone"]):
+        for concurrency in args.concurrency:
+            standalone, cluster = [
+                await throughput(workloads(storage)[name], concurrency, args.seconds) for storage in storages.values()
+            ]
+            print(f"{name:<12}{concurrency:>6}{standalone:>15.0f}{cluster:>12.0f}{cluster / standalone:>8.2f}")
+    for storage in storages.values():
+        await storage.protocol.delete_many([BLACKLIST_INDEX_KEY, USER_INDEX_KEY])
+        await storage.protocol.protocol.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+Password hashing throughput with 1, 2 and 4 remote hashing workers.
+
+For every worker count, the benchmark starts that many
+``src.infrastructure.services.security.worker`` processes (one argon2 job at a time each),
+waits for their heartbeats and sends a burst of hash jobs through ``RedisHashService``.
+Jobs answered by the local fallback are counted separately, so they can't inflate the
+numbers. Throughput only grows with workers while there are free CPU cores (or hosts).
+
+Usage (needs a running Redis and the same environment as the service, see ``.env.template``):
+
+    $ python -m benchmarks.remote_hashing_throughput --jobs 200 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from src.infrastructure.database import (
+    RedisConnector,
+)
+from src.infrastructure.metrics import (
+    hashing as metrics,
+)
+from src.infrastructure.services.security import (
+    PooledHashService,
+)
+from src.infrastructure.services.security.remote import (
+    HEARTBEATS_KEY,
+    WORKER_TIMEOUT,
+    RedisHashService,
+)
+from src.shared import (
+    load_config,
+)
+
+
+def start_workers(count: int) -> list[subprocess.Popen[bytes]]:
+    env = {**os.environ, "HASHING_MAX_WORKERS": "1", "HASHING_CALIBRATE": "false"}
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "src.infrastructure.services.security.worker"],
+            env=env,
+            stderr=subprocess.DEVNULL,
+        )
+        for _ in range(count)
+    ]
+
+
+def stop_workers(workers: list[subprocess.Popen[bytes]]) -> None:
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.wait()
+
+
+async def wait_for_workers(redis: RedisConnector, count: int) -> None:
+    while await redis.execute("zcount", HEARTBEATS_KEY, time.time() - WORKER_TIMEOUT, "+inf") < count:
+        await asyncio.sleep(0.1)
+
+
+def fallbacks() -> float:
+    return sum(
+        metrics.REMOTE_FALLBACKS.labels(reason)._value.get()
+        for reason in ("no_workers", "timeout", "redis_error", "worker_error")
+    )
+
+
+async def run(encoder: RedisHashService, jobs: int) -> tuple[float, float]:
+    fallbacks_before = fallbacks()
+    started = time.perf_counter()
+    await asyncio.gather(*(encoder.hash_password(f"password-{i}") for i in range(jobs)))
+    return time.perf_counter() - started, fallbacks() - fallbacks_before
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    redis = RedisConnector(url=load_config().db.construct_redis_dsn())
+    await redis.execute("delete", HEARTBEATS_KEY)
+    # A long timeout keeps queued jobs remote instead of falling back to the local pool
+    encoder = RedisHashService(redis, fallback=PooledHashService(max_workers=1), timeout=600)
+
+    print(f"cpus={os.cpu_count()} jobs={args.jobs}")
+    for count in args.workers:
+        workers = start_workers(count)
+        try:
+            await wait_for_workers(redis, count)
+            encoder._workers_checked_at = 0.0
+            await run(encoder, count)  # warm up
+            elapsed, fell_back = await run(encoder, args.jobs)
+        finally:
+            stop_workers(workers)
+            await redis.execute("delete", HEARTBEATS_KEY)
+        print(
+            f"workers={count:<2} elapsed={elapsed:6.2f}s "
+            f"throughput={args.jobs / elapsed:7.1f} hashes/s local_fallbacks={fell_back:.0f}"
+        )
+    await encoder.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
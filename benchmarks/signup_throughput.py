@@ -0,0 +1,115 @@
+"""
+Signup throughput of the former check-then-insert path against ``AuthRepository.signup``.
+
+"pre-check" is the former path: a SELECT for the username or Telegram id, an INSERT, a
+COMMIT and a ``refresh`` of the new user, four round trips, and two concurrent signups
+with the same username both pass the check. "upsert" is ``AuthRepository.signup``, an
+``INSERT ... ON CONFLICT (username) DO NOTHING RETURNING`` and a COMMIT. Every
+``--duplicates``-th signup takes an existing username, so that the conflict path is measured
+as well; a taken Telegram id or id costs a rollback on top, and is not measured. The
+passwords are not hashed, only the database round trips are measured.
+
+Usage (needs a migrated database, see ``.env.template``; the users it creates are deleted):
+
+    $ python -m benchmarks.signup_throughput --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import (
+    Awaitable,
+    Callable,
+)
+
+from sqlalchemy import (
+    delete,
+)
+
+from src.domain.user import (
+    entity,
+)
+from src.infrastructure.database import (
+    DBConnector,
+    models,
+)
+from src.infrastructure.database.repositories.auth import (
+    AuthRepository,
+)
+from src.infrastructure.services.security import (
+    PooledHashService,
+)
+from src.shared import (
+    ex,
+    load_config,
+)
+
+PREFIX = "bench_signup_"
+
+
+async def pre_check_signup(repository: AuthRepository, user_in: entity.User) -> models.User:
+    async with repository._session_factory() as session:
+        result = await session.execute(repository._get_query(username=user_in.username))
+        if result.scalar() is not None:
+            raise ex.UserAlreadyExists()
+        user = models.User(**user_in.__dict__)
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return user
+
+
+async def throughput(
+        signup: Callable[[entity.User], Awaitable[object]],
+        concurrency: int,
+        seconds: float,
+        duplicates: int,
+) -> tuple[float, int]:
+    """Signups per second over ``seconds`` from ``concurrency`` tasks, and the conflicts among them"""
+    deadline = time.perf_counter() + seconds
+    taken = f"{PREFIX}{os.urandom(8).hex()}"
+    await signup(entity.User(username=taken, password="password"))
+    calls = conflicts = 0
+
+    async def run() -> None:
+        nonlocal calls, conflicts
+        while time.perf_counter() < deadline:
+            calls += 1
+            username = taken if calls % duplicates == 0 else f"{PREFIX}{os.urandom(8).hex()}"
+            try:
+                await signup(entity.User(username=username, password="password"))
+            except ex.UserAlreadyExists:
+                conflicts += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run() for _ in range(concurrency)))
+    return calls / (time.perf_counter() - started), conflicts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=load_config().db.construct_sqlalchemy_url())
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--duplicates", type=int, default=10)
+    args = parser.parse_args()
+
+    db = DBConnector(db_url=args.url)
+    repository = AuthRepository(session_factory=db.session_factory, password_encoder=PooledHashService())
+    paths = {
+        "pre-check": lambda user_in: pre_check_signup(repository, user_in),
+        "upsert": repository.signup,
+    }
+    print(f"{'':<12}{'tasks':>6}{'signups /s':>12}{'conflicts':>11}")
+    for name, signup in paths.items():
+        for concurrency in args.concurrency:
+            rate, conflicts = await throughput(signup, concurrency, args.seconds, args.duplicates)
+            print(f"{name:<12}{concurrency:>6}{rate:>12.0f}{conflicts:>11}")
+    async with db.session_factory() as session:
+        await session.execute(delete(models.User).where(models.User.username.startswith(PREFIX)))
+        await session.commit()
+    await db.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
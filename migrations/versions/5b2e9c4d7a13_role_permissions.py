@@ -0,0 +1,29 @@
+"""role permissions
+
+Revision ID: 5b2e9c4d7a13
+Revises: 0d47d309e524
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e9c4d7a13"
+down_revision: Union[str, None] = "0d47d309e524"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "roles",
+        sa.Column("permissions", sa.BIGINT(), server_default=sa.text("0"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("roles", "permissions")
@@ -1,4 +1,5 @@
 from .auth import (
+    BatchVerify,
     ConfirmOtp,
     JWTokens,
     TokenData,
@@ -7,6 +8,8 @@ from .auth import (
     UserRegistration,
     UserTMELogin,
     ResetPassword,
+    Session,
+    TokenVerification,
 )
 from .notification import (
     SendMessageResponse,
@@ -18,6 +21,8 @@ from .role import (
     RoleUpdate,
 )
 from .user import (
+    PasswordParameters,
+    UserPage,
     UserResponse,
     UserUpdate,
 )
@@ -25,6 +30,7 @@ from .user import (
 __all__ = (
     "UserUpdate",
     "UserResponse",
+    "UserPage",
     "UserRegistration",
     "JWTokens",
     "UserLogin",
@@ -32,10 +38,14 @@ __all__ = (
     "UserLoginWithOTP",
     "ConfirmOtp",
     "TokenData",
+    "BatchVerify",
+    "TokenVerification",
     "RoleCreate",
     "RoleUpdate",
     "RoleResponse",
     "ResetPassword",
+    "Session",
     "SendMessageResponse",
     "Message",
+    "PasswordParameters",
 )
@@ -1,4 +1,7 @@
 import re
+from typing import (
+    Literal,
+)
 
 from fastapi import (
     HTTPException,
@@ -37,8 +40,59 @@ class JWTokens(BaseModel):
 
 
 class TokenData(BaseModel):
+    """
+    Attributes
+    ----------
+    permissions : Optional[int]
+        The role permission bitset, None for tokens issued before permission claims
+    username : Optional[str]
+        Read from the profile claims, None for tokens issued before them
+    created_at : Optional[float]
+        When the user was created, as a timestamp
+    """
     user_id: int
     jti: str
+    exp: float | None = None
+    iat: float | None = None
+    permissions: int | None = None
+    is_superuser: bool = False
+    is_active: bool = True
+    role_id: int | None = None
+    role_title: str | None = None
+    username: str | None = None
+    language: str | None = None
+    telegram_id: int | None = None
+    created_at: float | None = None
+
+
+class BatchVerify(BaseModel):
+    tokens: list[str]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "tokens": [
+                    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiIxMjM0NTY3ODkwIiwibmFtZSI6Ikp"
+                    "vaG4gRG9lIiwiaWF0IjoxNTE2MjM5MDIyfQ.SflKxwRJSMeKKF2QT4fwpMeJf36POk6yJV_adQssw5c",
+                ],
+            }
+        }
+    )
+
+
+class TokenVerification(BaseModel):
+    """
+    Attributes
+    ----------
+    valid : bool
+    user_id : Optional[int]
+        The token subject, when the signature could be checked
+    reason : Optional[str]
+        Why the token is not valid: 'invalid' (bad signature or expired), 'revoked' or 'user_not_found'
+    """
+    valid: bool
+    user_id: int | None = None
+    reason: Literal["invalid", "revoked", "user_not_found"] | None = None
 
 
 class UserRegistration(BaseModel):
@@ -127,6 +181,19 @@ class ConfirmOtp(BaseModel):
     code: int
 
 
+class Session(BaseModel):
+    """
+    Attributes
+    ----------
+    jti : str
+        The id of a token issued to the user, access or refresh
+    expires_at : float
+        When the token expires, as a timestamp
+    """
+    jti: str
+    expires_at: float
+
+
 class UserLogout(BaseModel):
     refresh_token: str
 
@@ -1,6 +1,15 @@
+from fastapi import (
+    HTTPException,
+    status,
+)
 from pydantic import (
     BaseModel,
     ConfigDict,
+    field_validator,
+)
+
+from src.domain.auth import (
+    Permission,
 )
 
 
@@ -9,14 +18,25 @@ class RoleBase(BaseModel):
 
 
 class RoleCreate(RoleBase):
-    pass
+    permissions: int = 0
+
+    @field_validator("permissions")
+    def validate_permissions(cls, value: int | None) -> int | None:
+        if value is not None and value & ~int(Permission.all()):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown permission bits, the known permissions add up to {int(Permission.all())}",
+            )
+        return value
 
 
-class RoleUpdate(RoleBase):
+class RoleUpdate(RoleCreate):
     title: str | None = None
+    permissions: int | None = None
 
 
 class RoleResponse(RoleBase):
     id: int
+    permissions: int = 0
 
     model_config = ConfigDict(from_attributes=True)
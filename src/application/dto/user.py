@@ -67,3 +67,50 @@ class UserResponse(UserBase):
             }
         }
     )
+
+
+class UserPage(BaseModel):
+    """
+    Attributes
+    ----------
+    items : list[UserResponse]
+        The users of the page, by id
+    next_cursor : Optional[str]
+        Passed as ``cursor`` to get the next page, none on the last page
+    """
+    items: list[UserResponse]
+    next_cursor: str | None = None
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "items": [
+                    {
+                        "id": 76564380,
+                        "telegram_id": 8056567643,
+                        "username": "hencedry",
+                        "language": "en",
+                        "role": {"id": 1, "title": "admin"},
+                        "days_since_created": 347
+                    }
+                ],
+                "next_cursor": "NzY1NjQzODA",
+            }
+        }
+    )
+
+
+class PasswordParameters(BaseModel):
+    algorithm: str
+    parameters: str
+    users: int
+    current: bool
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "algorithm": "argon2id",
+                "parameters": "m=65536,t=3,p=4",
+                "users": 1024,
+                "current": True,
+            }
+        }
+    )
@@ -1,6 +1,6 @@
 import abc
-import asyncio
 import dataclasses
+import re
 from typing import (
     Any,
     Callable,
@@ -13,6 +13,7 @@ from pydantic import (
 )
 from sqlalchemy import (
     Result,
+    Select,
     func,
     select,
 )
@@ -35,6 +36,30 @@ from .interfaces import (
 )
 
 
+def resync_id_query(model: type[ModelT]) -> Select[tuple[int]]:
+    """
+    Move the id sequence of ``model`` past the highest id, in one statement. It never goes
+    back, since the ids it handed out to running transactions may not be visible yet.
+    """
+    sequence = func.pg_get_serial_sequence(model.__tablename__, "id")
+    return select(func.setval(sequence, func.greatest(func.coalesce(func.max(model.id), 0), func.nextval(sequence))))
+
+
+def violated_constraint(error: IntegrityError) -> str | None:
+    """The name of the constraint an INSERT or UPDATE violated, as the driver reports it"""
+    # asyncpg raises the error with the name, psycopg keeps it in the diagnostics
+    for source in (error.orig.__cause__, getattr(error.orig, "diag", None)):
+        constraint = getattr(source, "constraint_name", None)
+        if constraint is not None:
+            return constraint
+    match = re.search(r'constraint "([^"]+)"', str(error.orig))
+    return match.group(1) if match else None
+
+
+def violates_primary_key(error: IntegrityError, model: type[ModelT]) -> bool:
+    return violated_constraint(error) == model.__table__.primary_key.name
+
+
 class CRUDMixin(
     IRLUDQuery,
     Generic[ModelT, CreateSchemaT, UpdateSchemaT],
@@ -56,22 +81,11 @@ class CRUDMixin(
         self._session_factory = session
         self.model = model
 
-    async def __generate_new_id(self) -> int:
-        async with self._session_factory() as session:
-            max_id_instance = await session.execute(select(func.max(self.model.id)))
-            max_id = max_id_instance.scalar() or 0
-            new_id = max_id + 1
-            existing_instance = await session.get(self.model, new_id)
-            while existing_instance:
-                new_id += 1
-                existing_instance = await session.get(self.model, new_id)
-            return new_id
-
-    async def generate_new_id(self) -> int:
-        try:
-            return await asyncio.wait_for(self.__generate_new_id(), timeout=5)
-        except asyncio.TimeoutError:
-            raise TimeoutError("Timeout occurred while generating new id.")
+    def _resync_id_query(self) -> Select[tuple[int]]:
+        return resync_id_query(self.model)
+
+    def _violates_primary_key(self, error: IntegrityError) -> bool:
+        return violates_primary_key(error, self.model)
 
     async def create(self, data_in: CreateSchemaT) -> ModelT:
         async with self._session_factory() as session:
@@ -82,15 +96,17 @@ class CRUDMixin(
             session.add(instance)
             try:
                 await session.commit()
-                await session.refresh(instance)
             except IntegrityError as e:
-                if "duplicate key value violates unique constraint" in str(e.orig):
-                    await session.rollback()
-                    new_id = await self.generate_new_id()
-                    instance.id = new_id
-                    session.add(instance)
-                    await session.commit()
-                    await session.refresh(instance)
+                if not self._violates_primary_key(e):
+                    raise
+                # The sequence fell behind ids inserted explicitly; every insert that follows
+                # gets a free id from it, including concurrent ones
+                await session.rollback()
+                await session.execute(self._resync_id_query())
+                instance.id = None
+                session.add(instance)
+                await session.commit()
+            await session.refresh(instance)
             return instance
 
     async def get_single(self, *args: Any, **kwargs: Any) -> ModelT | None:
@@ -4,8 +4,17 @@ from typing import (
 
 from sqlalchemy import (
     Select,
+    Update,
     or_,
     select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import (
+    Insert,
+    insert,
+)
+from sqlalchemy.orm import (
+    noload,
 )
 
 from src.application import (
@@ -13,6 +22,7 @@ from src.application import (
 )
 from src.application.persistence.base import (
     AuthMixin,
+    resync_id_query,
 )
 from src.domain.user import (
     entity,
@@ -35,3 +45,28 @@ class AuthQuery(AuthMixin[models.User, entity.User, dto.ResetPassword]):
 
     def _get_user(self, *args: Any, **kwargs: Any) -> Select[tuple]:
         return select(self.model).filter(*args).filter_by(**kwargs)
+
+    def _signup_query(self, user_in: entity.User) -> Insert:
+        # No row comes back when the username is taken, a taken Telegram id or id raises
+        return (
+            insert(self.model)
+            .values(**user_in.__dict__)
+            .on_conflict_do_nothing(index_elements=[self.model.username])
+            .returning(self.model)
+            .options(noload(self.model.logins))
+        )
+
+    def _resync_id_query(self) -> Select[tuple[int]]:
+        return resync_id_query(self.model)
+
+    def _password_query(self, pk: int) -> Select[tuple[str | None]]:
+        return select(self.model.password).where(self.model.id == pk)
+
+    def _set_password_query(self, pk: int, current_password: str, new_password: str) -> Update:
+        # Only when the password is still the one that was checked
+        return (
+            update(self.model)
+            .where(self.model.id == pk, self.model.password == current_password)
+            .values(password=new_password)
+            .returning(self.model.id)
+        )
@@ -5,6 +5,7 @@ from typing import (
 from sqlalchemy import (
     Select,
     Update,
+    func,
     select,
     update,
 )
@@ -28,9 +29,26 @@ class UserQuery(CRUDMixin[models.User, entity.User, dto.UserUpdate]):
         return select(self.model).filter(*args).filter_by(**kwargs)
 
     def _get_all_query(
-            self, skip: int = 0, limit: int = 10, *args: Any, **kwargs: Any
+            self, after: int | None = None, limit: int = 10, *args: Any, **kwargs: Any
     ) -> Select[tuple[Any]]:
-        return select(self.model).offset(skip).limit(limit).filter(*args).filter_by(**kwargs)
+        # Keyset pagination: the primary key index leads straight to the page, at any depth
+        stmt = select(self.model).filter(*args).filter_by(**kwargs)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        return stmt.order_by(self.model.id).limit(limit)
+
+    def _get_by_ids_query(self, ids: list[int]) -> Select[tuple[Any]]:
+        return select(self.model).where(self.model.id.in_(ids))
+
+    def _password_parameters_query(self) -> Select[tuple[Any]]:
+        # An argon2 hash looks like $argon2id$v=19$m=65536,t=3,p=4$<salt>$<hash>
+        algorithm = func.split_part(self.model.password, "$", 2)
+        parameters = func.split_part(self.model.password, "$", 4)
+        return (
+            select(algorithm, parameters, func.count())
+            .where(self.model.password.is_not(None))
+            .group_by(algorithm, parameters)
+        )
 
     def _update_query(self, pk: int, data_in: dto.UserUpdate, **kwargs: Any) -> Update:
         return (
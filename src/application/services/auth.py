@@ -5,6 +5,9 @@ from fastapi import (
 from src.application import (
     dto,
 )
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
+)
 from src.domain.user import (
     entity,
 )
@@ -30,20 +33,19 @@ class AuthService:
             auth_repository: AuthRepository,
             role_service: RoleService,
             notifier: Notifier,
+            password_encoder: IAsyncPasswordEncoder,
     ) -> None:
         self.repository: AuthRepository = auth_repository
         self.service: RoleService = role_service
         self.notifier: Notifier = notifier
+        self.password_encoder: IAsyncPasswordEncoder = password_encoder
 
     async def signup(self, user_in: dto.UserRegistration) -> models.User:
-        user_entity = entity.User.create(
+        user_entity = await entity.User.register(
             **user_in.model_dump(),
+            password_encoder=self.password_encoder,
         )
-        return await self.repository.signup(
-            user_in=user_entity,
-            username=user_in.username,
-            telegram_id=user_in.telegram_id,
-        )
+        return await self.repository.signup(user_in=user_entity)
 
     async def signin(
             self,
@@ -2,6 +2,7 @@ from src.application import (
     dto,
 )
 from src.infrastructure.database import (
+    JTIRedisStorage,
     models,
 )
 from src.infrastructure.database.repositories.role import (
@@ -11,8 +12,19 @@ from src.infrastructure.database.repositories.role import (
 
 class RoleService:
 
-    def __init__(self, role_repository: RoleRepository):
+    def __init__(
+            self,
+            role_repository: RoleRepository,
+            blacklist_service: JTIRedisStorage,
+            revocation_ttl: int,
+    ):
+        """
+        :param blacklist_service: revokes the permission claims of a role that changes
+        :param revocation_ttl: how long a revocation lasts, the access token lifetime
+        """
         self.repository = role_repository
+        self.blacklist_service = blacklist_service
+        self.revocation_ttl = revocation_ttl
 
     async def create_role(self, role_in: dto.RoleCreate) -> models.Role:
         return await self.repository.create(data_in=role_in)
@@ -27,7 +39,11 @@ class RoleService:
         return await self.repository.get_multi()
 
     async def update_role(self, pk: int, role_in: dto.RoleUpdate) -> models.Role:
-        return await self.repository.partial_update(pk=pk, data_in=role_in)
+        role = await self.repository.partial_update(pk=pk, data_in=role_in)
+        # Tokens carry the title and the permissions of the role
+        await self.blacklist_service.revoke_role(role_id=pk, ttl=self.revocation_ttl)
+        return role
 
     async def delete_role(self, role_id: int) -> None:
-        return await self.repository.destroy(id=role_id)
+        await self.repository.destroy(id=role_id)
+        await self.blacklist_service.revoke_role(role_id=role_id, ttl=self.revocation_ttl)
@@ -1,24 +1,62 @@
+import base64
+import binascii
+
 from src.application import (
     dto,
 )
 from src.infrastructure.database import (
+    JTIRedisStorage,
     models,
 )
 from src.infrastructure.database.repositories import (
     UserRepository,
 )
+from src.shared import (
+    ex,
+)
+
+
+def encode_cursor(user_id: int) -> str:
+    return base64.urlsafe_b64encode(str(user_id).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """The id a page cursor starts after, raises ``ex.InvalidCursor`` for cursors not issued by ``encode_cursor``"""
+    try:
+        user_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ex.InvalidCursor()
+    if not user_id.isdigit() or encode_cursor(int(user_id)) != cursor:
+        raise ex.InvalidCursor()
+    return int(user_id)
 
 
 class UserService:
-    def __init__(self, user_repository: UserRepository) -> None:
+    def __init__(self, user_repository: UserRepository, blacklist_service: JTIRedisStorage) -> None:
+        """
+        :param blacklist_service: revokes the tokens of a deactivated user
+        """
         self.repository: UserRepository = user_repository
+        self.blacklist_service = blacklist_service
 
-    async def get_users(self, skip: int, limit: int) -> list[models.User]:
-        return await self.repository.get_multi(is_active=True, skip=skip, limit=limit)
+    async def get_users(self, limit: int, cursor: str | None = None) -> dto.UserPage:
+        """A page of active users by id, after the user ``cursor`` points to"""
+        after = decode_cursor(cursor) if cursor is not None else None
+        # One more user tells whether there is a next page
+        users = await self.repository.get_multi(is_active=True, after=after, limit=limit + 1)
+        next_cursor = encode_cursor(users[limit - 1].id) if len(users) > limit else None
+        return dto.UserPage(items=users[:limit], next_cursor=next_cursor)
 
     async def get_user_by_id(self, user_id: int) -> models.User | None:
         return await self.repository.get_single(id=user_id)
 
+    async def get_users_by_ids(self, user_ids: list[int]) -> dict[int, models.User]:
+        """The existing users among ``user_ids``, by id, loaded with a single query"""
+        if not user_ids:
+            return {}
+        users = await self.repository.get_by_ids(ids=list(set(user_ids)))
+        return {user.id: user for user in users}
+
     async def get_user_by_telegram_id(self, telegram_id: int) -> models.User | None:
         return await self.repository.get_single(telegram_id=telegram_id)
 
@@ -30,7 +68,20 @@ class UserService:
         return await self.repository.partial_update(data_in=user_in, pk=pk)
 
     async def deactivate_user(self, user_id: int) -> None:
-        return await self.repository.destroy(id=user_id, is_active=False)
+        await self.repository.destroy(id=user_id, is_active=False)
+        await self.blacklist_service.revoke_user(user_id=user_id)
 
     async def reactivate_user(self, user_id: int) -> None:
         return await self.repository.destroy(id=user_id, is_active=True)
+
+    async def get_password_parameters(self, current: str) -> list[dto.PasswordParameters]:
+        rows = await self.repository.count_password_parameters()
+        return [
+            dto.PasswordParameters(
+                algorithm=algorithm,
+                parameters=parameters,
+                users=count,
+                current=algorithm == "argon2id" and parameters == current,
+            )
+            for algorithm, parameters, count in rows
+        ]
@@ -1,7 +1,13 @@
 from .password_hasher import (
+    IAsyncPasswordEncoder,
     IPasswordEncoder,
 )
+from .permissions import (
+    Permission,
+)
 
 __all__ = (
     "IPasswordEncoder",
+    "IAsyncPasswordEncoder",
+    "Permission",
 )
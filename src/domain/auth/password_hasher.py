@@ -11,3 +11,31 @@ class IPasswordEncoder(abc.ABC):
     @abc.abstractmethod
     def verify_password(password: str, hashed_password: str) -> bool:
         pass
+
+    @staticmethod
+    @abc.abstractmethod
+    def check_needs_rehash(hashed_password: str) -> bool:
+        pass
+
+
+class IAsyncPasswordEncoder(abc.ABC):
+    """
+    A password encoder that must not block the event loop while hashing.
+    """
+
+    @abc.abstractmethod
+    async def hash_password(self, password: str) -> str:
+        pass
+
+    @abc.abstractmethod
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def check_needs_rehash(self, hashed_password: str) -> bool:
+        """Whether the hash was made with other parameters than the current ones"""
+        pass
+
+    async def shutdown(self) -> None:
+        """Release the pools and connections the encoder holds, on application shutdown"""
+        pass
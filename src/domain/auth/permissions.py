@@ -0,0 +1,20 @@
+import enum
+
+
+class Permission(enum.IntFlag):
+    """
+    What a role allows, stored as a bitset in ``roles.permissions`` and embedded in access
+    tokens as the ``perm`` claim. New permissions take the next free bit; a bit must never
+    be reused, since tokens issued before the change still carry it.
+    """
+
+    NONE = 0
+    VIEW_USERS = 1 << 0
+    MANAGE_USERS = 1 << 1
+    VIEW_ROLES = 1 << 2
+    MANAGE_ROLES = 1 << 3
+    VIEW_SECURITY = 1 << 4
+
+    @classmethod
+    def all(cls) -> "Permission":
+        return cls(sum(cls))
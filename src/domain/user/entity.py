@@ -3,8 +3,8 @@ from datetime import (
     datetime,
 )
 
-from src.infrastructure.services.security import (
-    HashService,
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
 )
 from src.shared import (
     ex,
@@ -23,29 +23,28 @@ class User:
     language: str = "ru"
 
     @classmethod
-    def create(
+    async def register(
             cls,
             password: str | None,
             telegram_id: int | None,
             username: str,
+            password_encoder: IAsyncPasswordEncoder,
     ) -> "User":
         if not password and not telegram_id:
             raise ex.MissingFieldsError(fields=["telegram_id", "password"])
 
         return cls(
-            password=HashService.hash_password(password) if password else None,
+            password=await password_encoder.hash_password(password) if password else None,
             telegram_id=telegram_id if telegram_id else None,
             username=username,
         )
 
-    @classmethod
-    def set_password(cls, password: str) -> None:
-        cls.password = HashService.hash_password(password=password)
+    async def set_password(self, password: str, password_encoder: IAsyncPasswordEncoder) -> None:
+        self.password = await password_encoder.hash_password(password)
 
-    @classmethod
-    def check_password(cls, password_in: str, password: str | None = None) -> bool:
-        if not password and not password_in:
+    async def check_password(self, password_in: str, password_encoder: IAsyncPasswordEncoder) -> bool:
+        if not password_in:
             raise ex.MissingFieldsError(fields=["password"])
-        if password is None:
-            password = cls.password
-        return HashService.verify_password(password=password, hashed_password=password_in)
+        if self.password is None:
+            return False
+        return await password_encoder.verify_password(password=self.password, hashed_password=password_in)
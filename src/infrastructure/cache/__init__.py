@@ -0,0 +1,11 @@
+from .bloom import (
+    BloomFilter,
+)
+from .lru import (
+    TTLCache,
+)
+
+__all__ = (
+    "BloomFilter",
+    "TTLCache",
+)
@@ -0,0 +1,51 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    A set of strings that answers "maybe" or "certainly not" in a fixed amount of memory.
+
+    Sized for ``capacity`` items at a false positive rate of ``error_rate``; past that
+    capacity the rate grows, as reported by ``false_positive_rate``. Items cannot be
+    removed, rebuild the filter instead.
+
+    Examples:
+        >>> bloom = BloomFilter(capacity=1000, error_rate=0.001)
+        >>> bloom.add("jti")
+        >>> "jti" in bloom
+        True
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("A bloom filter needs a positive capacity and an error rate between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        # Double hashing: k positions out of two independent 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def false_positive_rate(self) -> float:
+        """The expected false positive rate for the items added so far"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
@@ -0,0 +1,74 @@
+from collections import (
+    OrderedDict,
+)
+import time
+from typing import (
+    Callable,
+    Generic,
+    Hashable,
+    TypeVar,
+)
+
+from src.infrastructure.metrics import (
+    cache as metrics,
+)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    In-process LRU cache whose entries also expire at their own deadline.
+
+    At most ``maxsize`` entries are kept, the least recently used one is evicted first;
+    ``maxsize=0`` disables the cache. Hits, misses and size are exported as metrics
+    labelled with ``name``. Not thread safe: it is meant for the event loop thread.
+
+    Examples:
+        >>> cache = TTLCache(maxsize=1000, name="verified_tokens")
+        >>> cache.set("key", "value", expires_at=time.time() + 60)
+        >>> cache.get("key")
+        'value'
+    """
+
+    def __init__(self, maxsize: int, name: str, clock: Callable[[], float] = time.time) -> None:
+        self.maxsize = maxsize
+        self.name = name
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._hits = metrics.HITS.labels(name)
+        self._misses = metrics.MISSES.labels(name)
+        metrics.SIZE.labels(name).set_function(self.__len__)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            self._misses.inc()
+            return None
+        value, expires_at = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            self._misses.inc()
+            return None
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def set(self, key: K, value: V, expires_at: float) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        item = self._data.pop(key, None)
+        return item[0] if item is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
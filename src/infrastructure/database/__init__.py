@@ -1,9 +1,20 @@
+from .breaker import (
+    CircuitBreaker,
+)
 from .db_connection import (
     DBConnector,
 )
 from .redis import (
     RedisConnector,
     JTIRedisStorage,
+    RevocationFilter,
+)
+from .rate_limit import (
+    RateLimit,
+    RedisRateLimiter,
+)
+from .user_cache import (
+    UserCache,
 )
 from .repositories import (
     UserRepository,
@@ -15,9 +26,14 @@ from .repositories import (
 )
 
 __all__ = (
+    "CircuitBreaker",
     "DBConnector",
     "RedisConnector",
     "JTIRedisStorage",
+    "RevocationFilter",
+    "RateLimit",
+    "RedisRateLimiter",
+    "UserCache",
     "UserRepository",
     "AuthRepository",
     "RoleRepository",
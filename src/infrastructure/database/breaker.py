@@ -0,0 +1,97 @@
+import enum
+import time
+from typing import (
+    Callable,
+)
+
+from src.infrastructure import (
+    metrics,
+)
+
+
+class BreakerState(enum.IntEnum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while, so that callers fail fast instead of
+    queueing on it.
+
+    While closed, calls go through and ``failure_threshold`` consecutive failures open the
+    circuit. While open, calls are refused for ``reset_timeout`` seconds; the circuit is then
+    half-open and lets a single probe through, which closes it when it succeeds and opens it
+    again when it fails. The state is exported as metrics labelled with ``name``.
+
+    Examples:
+        >>> breaker = CircuitBreaker("redis", failure_threshold=5, reset_timeout=5)
+        >>> if breaker.allow():
+        ...     try:
+        ...         await call()
+        ...     except ConnectionError:
+        ...         breaker.record_failure()
+        ...     else:
+        ...         breaker.record_success()
+    """
+
+    def __init__(
+            self,
+            name: str,
+            failure_threshold: int = 5,
+            reset_timeout: float = 5,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._state_gauge = metrics.redis.BREAKER_STATE.labels(name)
+        self._trips = metrics.redis.BREAKER_TRIPS.labels(name)
+        self._rejected = metrics.redis.BREAKER_REJECTED.labels(name)
+        self._state_gauge.set(BreakerState.CLOSED)
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._set_state(BreakerState.HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> int:
+        """Seconds until the open circuit lets a probe through, at least 1"""
+        return max(1, round(self.reset_timeout - (self._clock() - self._opened_at)))
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; every allowed call must be recorded"""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self._rejected.inc()
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        if self._state is not BreakerState.CLOSED:
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._state is BreakerState.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state is not BreakerState.OPEN:
+                self._trips.inc()
+            self._opened_at = self._clock()
+            self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState) -> None:
+        self._state = state
+        self._state_gauge.set(state)
@@ -4,6 +4,7 @@ from typing import (
 )
 
 from sqlalchemy import (
+    MetaData,
     func,
 )
 from sqlalchemy.dialects.postgresql import (
@@ -20,6 +21,8 @@ intpk = Annotated[int, mapped_column(primary_key=True, autoincrement=True, uniqu
 
 class Model(DeclarativeBase):
     __abstract__ = True
+    # The names PostgreSQL gives primary keys, so that violations can be told apart by name
+    metadata = MetaData(naming_convention={"pk": "%(table_name)s_pkey"})
 
     id: Mapped[intpk]
     created_at: Mapped[datetime] = mapped_column(
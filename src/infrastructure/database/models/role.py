@@ -4,7 +4,9 @@ from typing import (
 )
 
 from sqlalchemy import (
+    BIGINT,
     String,
+    text,
 )
 from sqlalchemy.orm import (
     Mapped,
@@ -26,6 +28,8 @@ class Role(models.Model):
     __tablename__ = "roles"
 
     title: Mapped[str] = mapped_column(String(64), unique=True)
+    # A bitset of src.domain.auth.Permission
+    permissions: Mapped[int] = mapped_column(BIGINT, default=0, server_default=text("0"))
     users: Mapped[list["User"]] = relationship(
         "User",
         back_populates="role",
@@ -35,4 +39,5 @@ class Role(models.Model):
         return {
             'id': self.id,
             'title': self.title,
+            'permissions': self.permissions,
         }
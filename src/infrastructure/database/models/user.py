@@ -1,4 +1,7 @@
 import datetime
+from typing import (
+    Any,
+)
 
 from sqlalchemy import (
     BIGINT,
@@ -51,6 +54,20 @@ class User(models.Model):
     def days_since_created(self) -> int:
         return (datetime.datetime.now() - self.created_at).days
 
+    def token_claims(self) -> dict[str, Any]:
+        """What access tokens carry so that authorization and the profile need no database query"""
+        return {
+            "perm": self.role.permissions if self.role is not None else 0,
+            "su": bool(self.is_superuser),
+            "act": bool(self.is_active),
+            "rid": self.role_id,
+            "rname": self.role.title if self.role is not None else None,
+            "name": self.username,
+            "lang": self.language,
+            "tg": self.telegram_id,
+            "ctd": int(self.created_at.timestamp()) if self.created_at is not None else None,
+        }
+
 
 class UserLoginModel(models.Model):
     __tablename__ = "user_logins"
@@ -0,0 +1,121 @@
+import asyncio
+from dataclasses import (
+    dataclass,
+)
+import hashlib
+from typing import (
+    Final,
+)
+
+from redis.exceptions import (  # type: ignore
+    NoScriptError,
+)
+
+from .redis import (
+    RedisConnector,
+)
+
+RATE_LIMIT_NAMESPACE = "rate_limit"
+
+# GCRA: the key holds the theoretical arrival time (TAT) of the next request, in ms. A request
+# is allowed when it arrives no more than `tolerance` before its TAT, and pushes the TAT one
+# `emission` interval further. Redis time is used, so that every worker shares one clock.
+GCRA_SCRIPT: Final[str] = """
+redis.replicate_commands()
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = math.max(tonumber(redis.call("GET", KEYS[1])) or now, now)
+local allow_at = tat + emission - tolerance
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+local new_tat = tat + emission
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / emission), 0, new_tat - now}
+"""
+GCRA_SHA: Final[str] = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimit:
+    """
+    A rate limiting decision.
+
+    Attributes
+    ----------
+    allowed : bool
+        Whether the request may go through.
+    limit : int
+        Requests allowed per period by the most restrictive limit.
+    remaining : int
+        Requests left before the limit is hit.
+    reset_after : float
+        Seconds until the limit is back to its full capacity.
+    retry_after : float
+        Seconds before a rejected request may be retried, 0 when allowed.
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+
+class RedisRateLimiter:
+    """
+    Rate limits shared by every worker, as a generic cell rate algorithm (GCRA) run by a Lua
+    script. A limit of ``limit`` requests per ``period`` allows bursts of ``limit`` requests,
+    then one request every ``period / limit`` seconds.
+
+    Examples:
+        >>> decision = await limiter.hit("login", {"ip:10.0.0.1": 20, "user:johndoe": 5}, period=60)
+        >>> decision.allowed, decision.remaining
+        (True, 4)
+    """
+
+    def __init__(self, redis_connector: RedisConnector) -> None:
+        self.protocol = redis_connector
+        self.namespace: str = RATE_LIMIT_NAMESPACE
+
+    async def hit(self, scope: str, limits: dict[str, int], period: float) -> RateLimit:
+        """
+        Count a request against each of ``limits``, identities mapped to their limit, in one
+        round trip. The decision is the most restrictive one; every identity under its limit
+        is counted even when another one rejects the request.
+        """
+        checks = [(f"{self.namespace}:{scope}:{identity}", limit) for identity, limit in limits.items() if limit > 0]
+        if not checks:
+            return RateLimit(allowed=True, limit=0, remaining=0, reset_after=0, retry_after=0)
+        period_ms = period * 1000
+        try:
+            results = await self._evaluate(checks, period_ms)
+        except NoScriptError:
+            # Redis restarted or failed over since the script was loaded
+            await self.protocol.execute("script_load", GCRA_SCRIPT)
+            results = await self._evaluate(checks, period_ms)
+        decisions = [
+            RateLimit(
+                allowed=bool(allowed),
+                limit=limit,
+                remaining=remaining,
+                reset_after=reset_after / 1000,
+                retry_after=retry_after / 1000,
+            )
+            for (_, limit), (allowed, remaining, retry_after, reset_after) in zip(checks, results)
+        ]
+        return min(decisions, key=lambda decision: (decision.allowed, decision.remaining, -decision.retry_after))
+
+    async def _evaluate(self, checks: list[tuple[str, int]], period_ms: float) -> list[list[int]]:
+        if self.protocol.mode == "cluster":
+            # Cluster pipelines refuse scripts, each key is sent to its node concurrently instead
+            return await asyncio.gather(*(
+                self.protocol.execute("evalsha", GCRA_SHA, 1, key, period_ms / limit, period_ms)
+                for key, limit in checks
+            ))
+        async with self.protocol.batch() as batch:
+            for key, limit in checks:
+                batch.add("evalsha", GCRA_SHA, 1, key, period_ms / limit, period_ms)
+        return batch.results
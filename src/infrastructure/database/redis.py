@@ -1,66 +1,894 @@
 # https://github.com/redis/redis-py/issues/2249
+import asyncio
+from collections import (
+    deque,
+)
+from contextlib import (
+    asynccontextmanager,
+)
+import logging
+import math
+import time
 from typing import (
     Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Literal,
+    TypeVar,
 )
 
 from redis.asyncio import (  # type: ignore
     Redis,
     from_url,
 )
+from redis.asyncio.client import (  # type: ignore
+    Pipeline,
+    PubSub,
+)
+from redis.asyncio.cluster import (  # type: ignore
+    RedisCluster,
+)
+from redis.asyncio.connection import (  # type: ignore
+    parse_url,
+)
+from redis.asyncio.sentinel import (  # type: ignore
+    Sentinel,
+)
+from redis.exceptions import (  # type: ignore
+    RedisError,
+    ResponseError,
+)
 
+from src.application import (
+    dto,
+)
+from src.infrastructure import (
+    metrics,
+)
+from src.infrastructure.cache import (
+    BloomFilter,
+    TTLCache,
+)
+from src.shared import (
+    ex,
+)
 
-class RedisConnector:
-    def __init__(self, url: str) -> None:
-        self.protocol: Redis = from_url(
-            url=url,
+from .breaker import (
+    CircuitBreaker,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RedisMode = Literal["standalone", "cluster", "sentinel"]
+# Commands without keys, which cluster pipelines refuse; a batch sends them after the others
+CLUSTER_HELD_COMMANDS = frozenset({"publish"})
+
+BLACKLIST_NAMESPACE = "jwt_blacklist"
+BLACKLIST_INDEX_KEY = "jwt_blacklist_index"
+# Set once the entries written before BLACKLIST_INDEX_KEY existed are indexed
+BLACKLIST_BACKFILLED_KEY = "jwt_blacklist_index:backfilled"
+ROLE_NAMESPACE = "role_revocations"
+ROLE_INDEX_KEY = "role_revocations_index"
+SESSIONS_NAMESPACE = "user_sessions"
+USER_NAMESPACE = "user_revocations"
+USER_INDEX_KEY = "user_revocations_index"
+# Key changes broadcast by Redis to the tracking connection of a ClientCache
+INVALIDATIONS_CHANNEL = "__redis__:invalidate"
+# Messages are "jti:<jti>", "role:<role id>:<revoked at>" or "user:<user id>:<revoked at>"
+REVOCATIONS_CHANNEL = "jwt_revocations"
+
+
+class ClientCache:
+    """
+    Values of the keys under ``prefixes``, held in process while Redis tracks them.
+
+    A dedicated connection turns on broadcast tracking (``CLIENT TRACKING ON BCAST``) for
+    the prefixes and receives an invalidation message for every key that changes, expires
+    or is evicted, which drops its entry. Missing keys are cached as well. Nothing is served
+    from the store until tracking is on, and it is emptied whenever the connection drops,
+    so that no invalidation can be missed.
+    """
+
+    def __init__(
+            self,
+            protocol: Redis,
+            prefixes: Iterable[str],
+            maxsize: int,
+            max_age: float = 300,
+            name: str = "redis_client_cache",
+    ) -> None:
+        """
+        :param maxsize: most values held, the least recently used are evicted first
+        :param max_age: how long a value is held at most, even when its key never changes
+        :param name: the label of the cache metrics
+        """
+        self.protocol = protocol
+        self.prefixes = tuple(prefixes)
+        self.max_age = max_age
+        self.tracking = False
+        # Bumped by every invalidation, so a value read meanwhile is not cached stale
+        self.epoch = 0
+        self._store: TTLCache[str, tuple[str | None]] = TTLCache(maxsize=maxsize, name=name)
+        self._invalidations = metrics.cache.INVALIDATIONS.labels(name)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def covers(self, key: str) -> bool:
+        return self.tracking and key.startswith(self.prefixes)
+
+    def get(self, key: str) -> tuple[str | None] | None:
+        """The value of ``key`` wrapped in a tuple, or None when it is not cached"""
+        return self._store.get(key)
+
+    def set(self, key: str, value: str | None, epoch: int) -> None:
+        """Cache ``value``, read when ``epoch`` was current, unless its key changed since"""
+        if self.tracking and epoch == self.epoch:
+            self._store.set(key, (value,), expires_at=time.time() + self.max_age)
+
+    def _invalidate(self, keys: list[str] | None) -> None:
+        self.epoch += 1
+        if keys is None:
+            # The whole database was flushed
+            self._invalidations.inc(len(self._store))
+            self._store.clear()
+            return
+        for key in keys:
+            if self._store.pop(key) is not None:
+                self._invalidations.inc()
+
+    async def _run(self) -> None:
+        while True:
+            connection = self.protocol.connection_pool.make_connection()
+            try:
+                await connection.connect()
+                await connection.send_command("CLIENT", "ID")
+                client_id = await connection.read_response()
+                prefixes = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+                # Invalidations are redirected to this very connection, as pub/sub messages
+                await connection.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes)
+                await connection.read_response()
+                await connection.send_command("SUBSCRIBE", INVALIDATIONS_CHANNEL)
+                await connection.read_response()
+                self.tracking = True
+                while True:
+                    message = await connection.read_response(timeout=1.0)
+                    if message is not None and message[0] == "message":
+                        self._invalidate(message[2])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Redis client cache unavailable, reading every key from Redis: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                self.tracking = False
+                self.epoch += 1
+                self._store.clear()
+                await connection.disconnect()
+
+
+def _connect(url: str, mode: RedisMode, sentinels: Iterable[str], sentinel_master: str) -> Redis | RedisCluster:
+    if mode == "cluster":
+        return RedisCluster.from_url(url=url, encoding="utf-8", decode_responses=True)
+    if mode == "sentinel":
+        options = parse_url(url)
+        addresses = [(host, int(port)) for host, _, port in (sentinel.rpartition(":") for sentinel in sentinels)]
+        return Sentinel(addresses).master_for(
+            sentinel_master,
+            db=options.get("db", 0),
+            username=options.get("username"),
+            password=options.get("password"),
             encoding="utf-8",
             decode_responses=True,
         )
+    return from_url(url=url, encoding="utf-8", decode_responses=True)
+
+
+class RedisConnector:
+    def __init__(
+            self,
+            url: str,
+            cache_prefixes: Iterable[str] = (),
+            cache_size: int = 0,
+            cache_name: str = "redis_client_cache",
+            breaker: CircuitBreaker | None = None,
+            command_timeout: float | None = None,
+            max_deferred_writes: int = 10000,
+            mode: RedisMode = "standalone",
+            sentinels: Iterable[str] = (),
+            sentinel_master: str = "mymaster",
+    ) -> None:
+        """
+        :param cache_prefixes: the keys ``get_many`` serves from a ``ClientCache``; not
+            available in cluster mode
+        :param cache_size: most values the cache holds, 0 disables it
+        :param cache_name: the label of the cache metrics
+        :param breaker: with a breaker, failing or timed out commands raise
+            ``ex.StorageUnavailable``, at once while the circuit is open
+        :param command_timeout: how long a command may wait for Redis, in seconds; leave it
+            unset for connectors that run blocking commands
+        :param max_deferred_writes: most deferrable batches kept while Redis is unavailable
+        :param mode: 'standalone'; 'cluster', where ``url`` is a startup node, batches are
+            not transactions and multi-key commands are split by slot; or 'sentinel', where
+            the master ``sentinel_master`` is looked up from the ``'host:port'`` sentinels
+            and ``url`` only gives the database and credentials
+        """
+        self.mode = mode
+        self._held_commands = CLUSTER_HELD_COMMANDS if mode == "cluster" else frozenset()
+        self.protocol: Redis | RedisCluster = _connect(url, mode, sentinels, sentinel_master)
+        # Cluster nodes forward every PUBLISH to each other, so any node serves subscriptions
+        self._pubsub_protocol: Redis = (
+            from_url(url=url, encoding="utf-8", decode_responses=True) if mode == "cluster" else self.protocol
+        )
+        cache_prefixes = tuple(cache_prefixes)
+        self.cache: ClientCache | None = None
+        if cache_prefixes and cache_size > 0:
+            if mode == "cluster":
+                logger.warning(
+                    "The Redis client cache %s is not available in cluster mode, it is disabled", cache_name
+                )
+            else:
+                self.cache = ClientCache(self.protocol, cache_prefixes, cache_size, name=cache_name)
+        self.breaker = breaker
+        self.command_timeout = command_timeout
+        self.max_deferred_writes = max_deferred_writes
+        self._deferred: deque[tuple[list[tuple[str, tuple, dict]], bool]] = deque()
+        self._replay_task: asyncio.Task | None = None
+
+    async def _call(self, call: Callable[[], Awaitable[T]]) -> T:
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            raise ex.StorageUnavailable(retry_after=breaker.retry_after())
+        try:
+            if self.command_timeout is None:
+                result = await call()
+            else:
+                result = await asyncio.wait_for(call(), self.command_timeout)
+        except ResponseError:
+            # Redis answered, with an error about the command itself
+            if breaker is not None:
+                breaker.record_success()
+            raise
+        except (RedisError, OSError, asyncio.TimeoutError) as e:
+            if breaker is None:
+                raise
+            breaker.record_failure()
+            raise ex.StorageUnavailable(retry_after=breaker.retry_after()) from e
+        except asyncio.CancelledError:
+            # So that a cancelled probe never leaves the circuit half-open for good
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        if self._deferred:
+            self._start_replay()
+        return result
 
     async def execute(self, command: str, *args: Any, **kwargs: Any) -> Any:
-        return await getattr(self.protocol, command)(*args, **kwargs)
+        return await self._call(lambda: getattr(self.protocol, command)(*args, **kwargs))
+
+    @asynccontextmanager
+    async def batch(self, transaction: bool = False, deferrable: bool = False) -> AsyncIterator["Batch"]:
+        """
+        Queue commands and send them in one round trip when the block exits. With
+        ``transaction``, they run atomically in a MULTI/EXEC block, except in cluster mode
+        where they are sent to the node of each key, one round trip per node.
+
+        On a connector with a breaker, a ``deferrable`` batch that cannot reach Redis does not
+        fail: its commands are kept and replayed in order once Redis answers again, and
+        ``batch.deferred`` is set.
+
+        Examples:
+            >>> async with connector.batch(transaction=True) as batch:
+            ...     batch.add("set", "key", 1, ex=60)
+            ...     batch.add("zadd", "index", {"key": 60})
+            >>> batch.results
+            [True, 1]
+        """
+        async with self._pipeline(transaction) as pipeline:
+            batch = Batch(pipeline, held=self._held_commands)
+            yield batch
+            if not batch:
+                return
+            try:
+                batch.results = await self._call(lambda: self._execute(pipeline, batch.commands))
+            except ex.StorageUnavailable:
+                if not deferrable:
+                    raise
+                self._defer(batch.commands, transaction)
+                batch.deferred = True
+
+    def _pipeline(self, transaction: bool) -> Pipeline:
+        if self.mode == "cluster":
+            return self.protocol.pipeline()
+        return self.protocol.pipeline(transaction=transaction)
+
+    async def _execute(self, pipeline: Pipeline, commands: list[tuple[str, tuple, dict]]) -> list[Any]:
+        results = await pipeline.execute()
+        held = [(command, args, kwargs) for command, args, kwargs in commands if command in self._held_commands]
+        if not held:
+            return results
+        async with self._pubsub_protocol.pipeline(transaction=False) as held_pipeline:
+            for command, args, kwargs in held:
+                getattr(held_pipeline, command)(*args, **kwargs)
+            held_results = iter(await held_pipeline.execute())
+        # Replies in the order of the commands
+        sent_results = iter(results)
+        return [
+            next(held_results) if command in self._held_commands else next(sent_results)
+            for command, _, _ in commands
+        ]
+
+    def _defer(self, commands: list[tuple[str, tuple, dict]], transaction: bool) -> None:
+        if len(self._deferred) >= self.max_deferred_writes:
+            self._deferred.popleft()
+            metrics.redis.DEFERRED_WRITES_DROPPED.inc()
+            logger.error("Too many Redis writes deferred, dropping the oldest")
+        self._deferred.append((commands, transaction))
+        metrics.redis.DEFERRED_WRITES.set(len(self._deferred))
+
+    def _start_replay(self) -> None:
+        if self._replay_task is None or self._replay_task.done():
+            self._replay_task = asyncio.create_task(self.replay())
+
+    async def replay(self) -> int:
+        """Send the deferred batches in order, returns the number sent before Redis failed again"""
+        replayed = 0
+        while self._deferred:
+            commands, transaction = self._deferred[0]
+            async with self._pipeline(transaction) as pipeline:
+                batch = Batch(pipeline, held=self._held_commands)
+                for command, args, kwargs in commands:
+                    batch.add(command, *args, **kwargs)
+                try:
+                    await self._call(lambda: self._execute(pipeline, batch.commands))
+                except ex.StorageUnavailable:
+                    break
+            self._deferred.popleft()
+            metrics.redis.DEFERRED_WRITES.set(len(self._deferred))
+            replayed += 1
+        if replayed:
+            logger.info("Replayed %d deferred Redis writes", replayed)
+        return replayed
+
+    async def get_many(self, keys: Iterable[str]) -> list[str | None]:
+        """
+        The values of ``keys`` in order, None for missing keys, in one round trip at most.
+        The keys held by the client cache are not read from Redis.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+        cache = self.cache
+        if cache is None:
+            return await self._call(lambda: self._mget(keys))
+        cache.start()
+
+        values: list[str | None] = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            cached = cache.get(key) if cache.covers(key) else None
+            if cached is None:
+                missing.append(i)
+            else:
+                values[i] = cached[0]
+        if missing:
+            epoch = cache.epoch
+            fetched = await self._call(lambda: self._mget([keys[i] for i in missing]))
+            for i, value in zip(missing, fetched):
+                values[i] = value
+                if cache.covers(keys[i]):
+                    cache.set(keys[i], value, epoch)
+        return values
+
+    def _mget(self, keys: list[str]) -> Awaitable[list[str | None]]:
+        if self.mode == "cluster":
+            # One MGET per slot, sent to the nodes concurrently
+            return self.protocol.mget_nonatomic(keys)
+        return self.protocol.mget(keys)
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Unlink ``keys`` in one round trip, returns the number of keys that existed"""
+        keys = list(keys)
+        if not keys:
+            return 0
+        if self.mode == "cluster":
+            async with self.batch() as batch:
+                for key in keys:
+                    batch.add("unlink", key)
+            return sum(batch.results)
+        return await self._call(lambda: self.protocol.unlink(*keys))
+
+    async def scan_iter(self, match: str, count: int = 1000) -> AsyncIterator[str]:
+        """The keys matching ``match``, on every primary node in cluster mode"""
+        async for key in self.protocol.scan_iter(match=match, count=count):
+            yield key
+
+    def pubsub(self) -> PubSub:
+        return self._pubsub_protocol.pubsub()
+
+
+class Batch:
+    """Commands queued by ``RedisConnector.batch``, and their replies once sent"""
+
+    def __init__(self, pipeline: Pipeline, held: frozenset[str] = frozenset()) -> None:
+        self._pipeline = pipeline
+        self._held = held
+        self.commands: list[tuple[str, tuple, dict]] = []
+        self.results: list[Any] = []
+        self.deferred = False
+
+    def add(self, command: str, *args: Any, **kwargs: Any) -> None:
+        if command not in self._held:
+            getattr(self._pipeline, command)(*args, **kwargs)
+        self.commands.append((command, args, kwargs))
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+
+def _issued_before(token_data: dto.TokenData, *revoked_at: float | None) -> bool:
+    """Whether the token predates one of the revocation times, tokens without ``iat`` always do"""
+    return any(
+        watermark is not None and (token_data.iat is None or token_data.iat <= watermark)
+        for watermark in revoked_at
+    )
+
+
+async def index_revocations(protocol: RedisConnector, default_ttl: int, count_size: int = 1000) -> int:
+    """
+    Index the blacklist entries and role revocations missing from ``BLACKLIST_INDEX_KEY``
+    and ``ROLE_INDEX_KEY``, giving ``default_ttl`` to the blacklist entries written without
+    an expiry. Returns the number of entries indexed.
+    """
+    indexed = 0
+    for namespace, index in ((BLACKLIST_NAMESPACE, _index_blacklist), (ROLE_NAMESPACE, _index_roles)):
+        keys: list[str] = []
+        async for key in protocol.scan_iter(match=f"{namespace}:*", count=count_size):
+            keys.append(key)
+            if len(keys) >= count_size:
+                indexed += await index(protocol, keys, default_ttl)
+                keys = []
+        if keys:
+            indexed += await index(protocol, keys, default_ttl)
+    return indexed
+
+
+async def _index_blacklist(protocol: RedisConnector, keys: list[str], default_ttl: int) -> int:
+    async with protocol.batch() as batch:
+        for key in keys:
+            batch.add("pttl", key)
+    ttls = batch.results
+    now = time.time()
+    async with protocol.batch() as batch:
+        for key, ttl in zip(keys, ttls):
+            # -2 is a key that expired meanwhile, -1 a key without expiry
+            if ttl == -2:
+                continue
+            if ttl == -1:
+                batch.add("expire", key, default_ttl)
+            expires_at = now + (default_ttl if ttl == -1 else ttl / 1000)
+            batch.add("zadd", BLACKLIST_INDEX_KEY, {key.removeprefix(f"{BLACKLIST_NAMESPACE}:"): expires_at}, nx=True)
+    return sum(
+        result for (command, _, _), result in zip(batch.commands, batch.results) if command == "zadd"
+    )
+
+
+async def _index_roles(protocol: RedisConnector, keys: list[str], default_ttl: int) -> int:
+    revoked = {
+        key.removeprefix(f"{ROLE_NAMESPACE}:"): float(revoked_at)
+        for key, revoked_at in zip(keys, await protocol.get_many(keys))
+        if revoked_at is not None
+    }
+    if not revoked:
+        return 0
+    return await protocol.execute("zadd", ROLE_INDEX_KEY, revoked, nx=True)
+
+
+class RevocationFilter:
+    """
+    An in-process view of the revocations, so that a token is looked up in Redis only
+    when it might be revoked.
+
+    Revoked jtis are held in a Bloom filter, role and user revocation times in dicts. All are
+    loaded from the Redis indexes, kept current through the ``REVOCATIONS_CHANNEL`` pub/sub
+    channel, and rebuilt every ``reload_interval`` seconds to drop expired tokens. Until
+    loaded, and while the subscription is down, every jti may be revoked. The first load
+    indexes the revocations written before the indexes existed, unless a process did it
+    already.
+    """
+
+    def __init__(
+            self,
+            redis_connector: RedisConnector,
+            capacity: int,
+            error_rate: float,
+            reload_interval: float = 600,
+            default_ttl: int = 60 * 60 * 24 * 30,
+    ) -> None:
+        """
+        :param default_ttl: the expiry given to the blacklist entries written without one, when
+            they are indexed
+        """
+        self.protocol = redis_connector
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.reload_interval = reload_interval
+        self.default_ttl = default_ttl
+        self.loaded = False
+        self._backfilled = False
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._roles: dict[int, float] = {}
+        self._users: dict[int, float] = {}
+        self._task: asyncio.Task | None = None
+        metrics.blacklist.FILTER_ERROR_RATE.set_function(lambda: self._bloom.false_positive_rate)
+        metrics.blacklist.FILTER_ENTRIES.set_function(lambda: len(self._bloom))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.loaded = False
+
+    def might_be_revoked(self, jti: str) -> bool:
+        self.start()
+        if not self.loaded:
+            metrics.blacklist.FILTER_LOOKUPS.labels("unloaded").inc()
+            return True
+        hit = jti in self._bloom
+        metrics.blacklist.FILTER_LOOKUPS.labels("hit" if hit else "miss").inc()
+        return hit
+
+    def role_revoked_at(self, role_id: int) -> float | None:
+        return self._roles.get(role_id)
+
+    def user_revoked_at(self, user_id: int) -> float | None:
+        return self._users.get(user_id)
+
+    def revoked_locally(self, token_data: dto.TokenData) -> bool:
+        """
+        Whether the revocations held in process, even stale ones, revoke the token. A jti in
+        the Bloom filter counts as revoked, as Redis cannot tell otherwise.
+        """
+        watermarks = [self._users.get(token_data.user_id)]
+        if token_data.role_id is not None:
+            watermarks.append(self._roles.get(token_data.role_id))
+        return token_data.jti in self._bloom or _issued_before(token_data, *watermarks)
+
+    async def _backfill(self) -> None:
+        if await self.protocol.execute("get", BLACKLIST_BACKFILLED_KEY) is None:
+            indexed = await index_revocations(self.protocol, self.default_ttl)
+            await self.protocol.execute("set", BLACKLIST_BACKFILLED_KEY, int(time.time()))
+            logger.info("Indexed %d revocations written before the indexes", indexed)
+        self._backfilled = True
+
+    async def _load(self) -> None:
+        if not self._backfilled:
+            await self._backfill()
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in await self.protocol.execute("zrangebyscore", BLACKLIST_INDEX_KEY, time.time(), "+inf"):
+            bloom.add(jti)
+        roles = {
+            int(role_id): revoked_at
+            for role_id, revoked_at in await self.protocol.execute("zrange", ROLE_INDEX_KEY, 0, -1, withscores=True)
+        }
+        users = {
+            int(user_id): revoked_at
+            for user_id, revoked_at in await self.protocol.execute("zrange", USER_INDEX_KEY, 0, -1, withscores=True)
+        }
+        self._bloom, self._roles, self._users = bloom, roles, users
+        self.loaded = True
+
+    def _apply(self, message: str) -> None:
+        kind, _, value = message.partition(":")
+        if kind == "jti":
+            self._bloom.add(value)
+        elif kind == "role":
+            role_id, _, revoked_at = value.partition(":")
+            self._roles[int(role_id)] = float(revoked_at)
+        elif kind == "user":
+            user_id, _, revoked_at = value.partition(":")
+            self._users[int(user_id)] = float(revoked_at)
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = self.protocol.pubsub()
+            try:
+                # Subscribed before loading, so no revocation falls between the two
+                await pubsub.subscribe(REVOCATIONS_CHANNEL)
+                await self._load()
+                loaded_at = time.monotonic()
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._apply(message["data"])
+                    if time.monotonic() - loaded_at > self.reload_interval:
+                        await self._load()
+                        loaded_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.loaded = False
+                logger.warning("Revocation filter unavailable, checking every token in Redis: %s", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
 
 
 class JTIRedisStorage:
-    def __init__(self, redis_connector: RedisConnector) -> None:
+    """
+    Revoked token ids. An entry lives as long as its token would have, and a sorted set
+    scored by expiry indexes the live entries, so that they can be counted without a scan.
+    """
+
+    def __init__(
+            self,
+            redis_connector: RedisConnector,
+            default_ttl: int = 60 * 60 * 24 * 30,
+            revocation_filter: RevocationFilter | None = None,
+            degraded_policy: Literal["open", "closed"] = "closed",
+    ) -> None:
+        """
+        :param default_ttl: how long a jti stays revoked when its expiry is unknown, the
+            longest token lifetime
+        :param revocation_filter: answers for the tokens that are certainly not revoked
+        :param degraded_policy: while Redis is unavailable, ``closed`` raises
+            ``ex.StorageUnavailable`` on revocation checks, and ``open`` answers them from the
+            revocations held by ``revocation_filter``
+        """
         self.protocol = redis_connector
-        self.namespace: str = "jwt_blacklist"
+        self.namespace: str = BLACKLIST_NAMESPACE
+        self.index_key: str = BLACKLIST_INDEX_KEY
+        self.role_namespace: str = ROLE_NAMESPACE
+        self.role_index_key: str = ROLE_INDEX_KEY
+        self.sessions_namespace: str = SESSIONS_NAMESPACE
+        self.user_namespace: str = USER_NAMESPACE
+        self.user_index_key: str = USER_INDEX_KEY
+        self.default_ttl = default_ttl
+        self.revocation_filter = revocation_filter
+        self.degraded_policy = degraded_policy
 
-    async def add(self, jti: str) -> None:
-        blacklist_key = f"{self.namespace}:{jti}"
-        await self.protocol.execute("set", blacklist_key, 1)
+    async def add(self, jti: str, exp: float | None = None) -> None:
+        """Revoke ``jti`` until ``exp``, the expiry of its token, after which nothing is stored"""
+        await self.add_many([(jti, exp)])
+
+    async def add_many(self, tokens: Iterable[tuple[str, float | None]]) -> None:
+        """Revoke ``(jti, exp)`` pairs as ``add`` does, all in one round trip"""
+        now = time.time()
+        async with self.protocol.batch(transaction=True, deferrable=True) as batch:
+            for jti, exp in tokens:
+                expires_at = exp if exp is not None else now + self.default_ttl
+                ttl = math.ceil(expires_at - now)
+                if ttl <= 0:
+                    continue
+                batch.add("set", f"{self.namespace}:{jti}", 1, ex=ttl)
+                batch.add("zadd", self.index_key, {jti: expires_at})
+                batch.add("publish", REVOCATIONS_CHANNEL, f"jti:{jti}")
+            if batch:
+                self._queue_count(batch, now)
+        if batch.deferred:
+            self._apply_locally(batch)
+        elif batch:
+            metrics.blacklist.REVOKED_TOKENS.set(batch.results[-1])
+
+    def _apply_locally(self, batch: Batch) -> None:
+        """Let the revocation filter know of the revocations of a deferred batch"""
+        if self.revocation_filter is None:
+            return
+        for command, args, _ in batch.commands:
+            if command == "publish":
+                self.revocation_filter._apply(args[1])
+
+    def _queue_count(self, batch: Batch, now: float) -> None:
+        batch.add("zremrangebyscore", self.index_key, "-inf", now)
+        batch.add("zcard", self.index_key)
+
+    async def count(self) -> int:
+        """The number of revoked tokens that have not expired, also exported as a gauge"""
+        async with self.protocol.batch() as batch:
+            self._queue_count(batch, time.time())
+        count = batch.results[-1]
+        metrics.blacklist.REVOKED_TOKENS.set(count)
+        return count
+
+    async def sweep(self, count_size: int = 1000) -> int:
+        """
+        Index the revocations missing from the indexes, giving ``default_ttl`` to the entries
+        written without an expiry. Returns the number of entries indexed.
+        """
+        swept = await index_revocations(self.protocol, self.default_ttl, count_size)
+        await self.count()
+        return swept
 
     async def get(self, jti: str) -> str:
         blacklist_key = f"{self.namespace}:{jti}"
         return await self.protocol.execute("get", blacklist_key)
 
+    def _might_be_revoked(self, jti: str) -> bool:
+        return self.revocation_filter is None or self.revocation_filter.might_be_revoked(jti)
+
+    def _confirm(self, revoked: bool) -> bool:
+        """Count the filter hits that were not revoked after all"""
+        if not revoked and self.revocation_filter is not None and self.revocation_filter.loaded:
+            metrics.blacklist.FILTER_FALSE_POSITIVES.inc()
+        return revoked
+
     async def is_in_blacklist(self, jti: str) -> bool:
+        if not self._might_be_revoked(jti):
+            return False
         blacklist_key = f"{self.namespace}:{jti}"
         exists = await self.protocol.execute("exists", blacklist_key)
-        return bool(exists)
+        return self._confirm(bool(exists))
+
+    async def are_in_blacklist(self, jtis: list[str]) -> list[bool]:
+        """Check many jtis in one round trip at most, in the order given"""
+        suspects = [jti for jti in jtis if self._might_be_revoked(jti)]
+        if not suspects:
+            return [False] * len(jtis)
+        values = await self.protocol.get_many(f"{self.namespace}:{jti}" for jti in suspects)
+        revoked = {jti for jti, value in zip(suspects, values) if self._confirm(value is not None)}
+        return [jti in revoked for jti in jtis]
+
+    async def revoke_role(self, role_id: int, ttl: int) -> None:
+        """
+        Revoke the claims of every token issued to the role until now. ``ttl`` must cover
+        the access token lifetime, after which no such token is left.
+        """
+        revoked_at = time.time()
+        async with self.protocol.batch(transaction=True, deferrable=True) as batch:
+            batch.add("set", f"{self.role_namespace}:{role_id}", revoked_at, ex=ttl)
+            batch.add("zadd", self.role_index_key, {role_id: revoked_at})
+            batch.add("zremrangebyscore", self.role_index_key, "-inf", revoked_at - ttl)
+            batch.add("publish", REVOCATIONS_CHANNEL, f"role:{role_id}:{revoked_at}")
+        if batch.deferred:
+            self._apply_locally(batch)
+
+    def _queue_user_revocation(self, batch: Batch, user_id: int, revoked_at: float) -> None:
+        batch.add("set", self._user_key(user_id), revoked_at, ex=self.default_ttl)
+        batch.add("zadd", self.user_index_key, {user_id: revoked_at})
+        batch.add("zremrangebyscore", self.user_index_key, "-inf", revoked_at - self.default_ttl)
+        batch.add("publish", REVOCATIONS_CHANNEL, f"user:{user_id}:{revoked_at}")
+
+    async def revoke_user(self, user_id: int) -> None:
+        """
+        Revoke every token issued to the user until now with a single key, whatever their
+        number. The watermark lasts ``default_ttl``, after which no such token is left.
+        """
+        async with self.protocol.batch(transaction=True, deferrable=True) as batch:
+            self._queue_user_revocation(batch, user_id, time.time())
+        if batch.deferred:
+            self._apply_locally(batch)
+
+    async def are_revoked(self, tokens: list[dto.TokenData]) -> list[bool]:
+        """
+        Whether each token is blacklisted, or was issued before its role changed or its user
+        was revoked, in one round trip at most. Results keep the order of ``tokens``.
+        """
+        revocation_filter = self.revocation_filter
+        revoked = [False] * len(tokens)
+        keys: list[str] = []
+        lookups: list[tuple[int, str]] = []
+        for i, token_data in enumerate(tokens):
+            if revocation_filter is not None and revocation_filter.loaded:
+                role_revoked_at = None
+                if token_data.role_id is not None:
+                    role_revoked_at = revocation_filter.role_revoked_at(token_data.role_id)
+                user_revoked_at = revocation_filter.user_revoked_at(token_data.user_id)
+                if _issued_before(token_data, role_revoked_at, user_revoked_at):
+                    revoked[i] = True
+                    continue
+            else:
+                if token_data.role_id is not None:
+                    keys.append(f"{self.role_namespace}:{token_data.role_id}")
+                    lookups.append((i, "watermark"))
+                keys.append(self._user_key(token_data.user_id))
+                lookups.append((i, "watermark"))
+            if self._might_be_revoked(token_data.jti):
+                keys.append(f"{self.namespace}:{token_data.jti}")
+                lookups.append((i, "jti"))
+
+        if not keys:
+            return revoked
+        try:
+            values = await self.protocol.get_many(keys)
+        except ex.StorageUnavailable:
+            metrics.blacklist.DEGRADED_CHECKS.labels(self.degraded_policy).inc(len(tokens))
+            # Anything but an explicit "open" fails closed
+            if self.degraded_policy != "open" or revocation_filter is None:
+                raise
+            return [
+                is_revoked or revocation_filter.revoked_locally(token_data)
+                for token_data, is_revoked in zip(tokens, revoked)
+            ]
+        for (i, kind), value in zip(lookups, values):
+            if kind == "jti":
+                revoked[i] = self._confirm(value is not None) or revoked[i]
+            elif value is not None:
+                revoked[i] = revoked[i] or _issued_before(tokens[i], float(value))
+        return revoked
+
+    async def is_revoked(self, token_data: dto.TokenData) -> bool:
+        """Whether the token is revoked in any way, see ``are_revoked``"""
+        revoked, = await self.are_revoked([token_data])
+        return revoked
 
     async def remove(self, user_id: int) -> int:
         blacklist_key = f"{self.namespace}:{user_id}"
         return await self.protocol.execute("delete", blacklist_key)
 
-    async def clear(self, user_id: int, count_size: int = 10) -> int:
-        pattern = f"{self.namespace}:{user_id}:*"
-        cursor = b"0"
-        deleted_count = 0
+    # The keys of a user share a hash tag, so that they live on the same cluster node
+    def _sessions_key(self, user_id: int) -> str:
+        return f"{self.sessions_namespace}:{{{user_id}}}"
 
-        while cursor:
-            cursor, keys = await self.protocol.execute("scan", cursor, match=pattern, count=count_size)
-            deleted_count += await self.protocol.execute("unlink", *keys)
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.user_namespace}:{{{user_id}}}"
 
-        return deleted_count
+    async def track(self, user_id: int, tokens: Iterable[tuple[str, float | None]]) -> None:
+        """
+        Index the ``(jti, exp)`` pairs issued to the user, in one round trip. Expired members
+        are pruned on the way, and the index expires once all of its tokens have.
+        """
+        now = time.time()
+        sessions = {jti: exp if exp is not None else now + self.default_ttl for jti, exp in tokens}
+        if not sessions:
+            return
+        key = self._sessions_key(user_id)
+        # No token lives longer than default_ttl, so the index outlives every member
+        expires_at = max(now + self.default_ttl, *sessions.values())
+        async with self.protocol.batch(transaction=True, deferrable=True) as batch:
+            batch.add("zadd", key, sessions)
+            batch.add("zremrangebyscore", key, "-inf", now)
+            batch.add("expireat", key, math.ceil(expires_at))
 
-    async def get_jti(self, user_id: int, token_type: str) -> list[Any]:
-        pattern = f"{user_id}:{token_type}:*"
-        cursor = b"0"
-        jtis = []
+    async def get_sessions(self, user_id: int) -> list[tuple[str, float]]:
+        """The live ``(jti, exp)`` pairs issued to the user"""
+        return await self.protocol.execute(
+            "zrangebyscore", self._sessions_key(user_id), time.time(), "+inf", withscores=True
+        )
 
-        while cursor:
-            cursor, keys = await self.protocol.execute("scan", cursor, match=pattern, count=10)
-            jtis.extend(keys)
+    async def revoke_session(self, user_id: int, jti: str) -> bool:
+        """
+        Revoke one live token of the user, as listed by ``get_sessions``, and drop it from the
+        index. Returns False when the user holds no such token.
+        """
+        key = self._sessions_key(user_id)
+        exp = await self.protocol.execute("zscore", key, jti)
+        if exp is None or exp <= time.time():
+            return False
+        await self.add(jti, exp=exp)
+        await self.protocol.execute("zrem", key, jti)
+        return True
 
-        return jtis
+    async def revoke_all(self, user_id: int) -> int:
+        """
+        Revoke every token of the user with a watermark, in one round trip, and drop the
+        session index. Returns the number of live sessions.
+        """
+        now = time.time()
+        key = self._sessions_key(user_id)
+        async with self.protocol.batch(transaction=True, deferrable=True) as batch:
+            batch.add("zcount", key, now, "+inf")
+            batch.add("delete", key)
+            self._queue_user_revocation(batch, user_id, now)
+        if batch.deferred:
+            self._apply_locally(batch)
+            return 0
+        return batch.results[0]
@@ -10,6 +10,9 @@ from sqlalchemy import (
     or_,
     select,
 )
+from sqlalchemy.exc import (
+    IntegrityError,
+)
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
@@ -20,15 +23,21 @@ from src.application import (
 from src.application.dto import (
     ResetPassword,
 )
+from src.application.persistence.base import (
+    violates_primary_key,
+)
 from src.application.queries import (
     AuthQuery,
 )
-from src.domain.user import (
-    entity,
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
 )
 from src.infrastructure.database import (
     models,
 )
+from src.infrastructure.database.user_cache import (
+    UserCache,
+)
 from src.infrastructure.services.security import (
     HashService,
     JWTService,
@@ -54,6 +63,12 @@ class IAuthStrategy(abc.ABC):
 
 
 class DefaultAuthStrategy(IAuthStrategy):
+    def __init__(self, password_encoder: IAsyncPasswordEncoder, user_cache: UserCache | None = None) -> None:
+        """
+        :param user_cache: drops the user whose password gets rehashed or Telegram id gets linked on login
+        """
+        self.password_encoder = password_encoder
+        self.user_cache = user_cache
 
     @staticmethod
     def _get_query(*args: Any, **kwargs: Any) -> Select[tuple[Any]]:
@@ -76,10 +91,18 @@ class DefaultAuthStrategy(IAuthStrategy):
         if not user:
             raise ex.UserNotFound()
 
-        if user_in.password and not entity.User.check_password(password=user.password, password_in=user_in.password):
-            raise ex.IncorrectPassword()
+        if user_in.password:
+            if not await self.password_encoder.verify_password(
+                    password=user.password, hashed_password=user_in.password
+            ):
+                raise ex.IncorrectPassword()
+            if self.password_encoder.check_needs_rehash(user.password):
+                user.password = await self.password_encoder.hash_password(user_in.password)
+                await session.commit()
+                if self.user_cache is not None:
+                    await self.user_cache.invalidate(user.id)
 
-        access_token = JWTService.create_access_token(uid=str(user.id), fresh=True)
+        access_token = JWTService.create_access_token(uid=str(user.id), fresh=True, data=user.token_claims())
         refresh_token = JWTService.create_refresh_token(uid=str(user.id))
         if user.telegram_id:
             telegram_id = int(str(user.telegram_id))
@@ -87,6 +110,8 @@ class DefaultAuthStrategy(IAuthStrategy):
         if user_in.telegram_id:
             user.telegram_id = user_in.telegram_id
             await session.commit()
+            if self.user_cache is not None:
+                await self.user_cache.invalidate(user.id)
         return dto.JWTokens(access_token=access_token, refresh_token=refresh_token)
 
 
@@ -112,7 +137,7 @@ class TelegramAuthStrategy(IAuthStrategy):
                 raise ex.UserNotFound()
             else:
                 access_token = JWTService.create_access_token(
-                    uid=str(user.id), fresh=True
+                    uid=str(user.id), fresh=True, data=user.token_claims()
                 )
                 refresh_token = JWTService.create_refresh_token(uid=str(user.id))
                 return dto.JWTokens(access_token=access_token, refresh_token=refresh_token)
@@ -121,25 +146,44 @@ class TelegramAuthStrategy(IAuthStrategy):
 
 
 class AuthRepository(AuthQuery):
-    def __init__(self, session_factory: Callable[[], AsyncSession]) -> None:
-        super().__init__(session=session_factory, model=models.User)
-
-    async def signup(
+    def __init__(
             self,
-            user_in: CreateSchemaT,
-            *args: Any,
-            **kwargs: Any
-    ) -> ModelT:
+            session_factory: Callable[[], AsyncSession],
+            password_encoder: IAsyncPasswordEncoder,
+            user_cache: UserCache | None = None,
+    ) -> None:
+        """
+        :param user_cache: drops the users who sign up or reset their password
+        """
+        super().__init__(session=session_factory, model=models.User)
+        self.password_encoder = password_encoder
+        self.user_cache = user_cache
+
+    async def signup(self, user_in: CreateSchemaT) -> ModelT:
+        """
+        Insert the user in a single statement, raises ``ex.UserAlreadyExists`` when the username
+        or the Telegram id is taken. A taken username costs no more than the insert, the other
+        conflicts a rolled back statement.
+        """
         async with self._session_factory() as session:
-            stmt = self._get_query(*args, **kwargs)
-            result: Result = await session.execute(stmt)
-            if result.scalar() is not None:
+            for attempt in range(2):
+                try:
+                    result: Result = await session.execute(self._signup_query(user_in))
+                    break
+                except IntegrityError as e:
+                    await session.rollback()
+                    if attempt or not violates_primary_key(e, self.model):
+                        # The Telegram id is taken
+                        raise ex.UserAlreadyExists() from e
+                    # The sequence fell behind ids inserted explicitly, as in CRUDMixin.create
+                    await session.execute(self._resync_id_query())
+            user = result.scalar_one_or_none()
+            if user is None:
                 raise ex.UserAlreadyExists()
-            user = self.model(**user_in.__dict__)
-            session.add(user)
             await session.commit()
-            await session.refresh(user)
-            return user
+        if self.user_cache is not None:
+            await self.user_cache.invalidate_lookups(username=user.username, telegram_id=user.telegram_id)
+        return user
 
     async def signin(
             self,
@@ -150,15 +194,25 @@ class AuthRepository(AuthQuery):
             return await strategy.authenticate(user_in=user_in, session=session)
 
     async def reset_password(self, pk: int, password_in: ResetPassword) -> None:
+        """
+        Check the old password against the stored hash, then swap the hash with a conditional
+        update, so that a concurrent reset is not silently overwritten.
+        """
         async with self._session_factory() as session:
-            stmt = self._get_user(id=pk)
-            result: Result = await session.execute(stmt)
-            user: models.User = result.scalar_one_or_none()
-            if not user:
+            result: Result = await session.execute(self._password_query(pk))
+            row = result.one_or_none()
+            if row is None:
                 raise ex.UserNotFound()
-            if not HashService.verify_password(password=user.password, hashed_password=password_in.old_password):
+            current_password, = row
+            if not await self.password_encoder.verify_password(
+                    password=current_password, hashed_password=password_in.old_password
+            ):
+                raise ex.IncorrectPassword()
+            new_hashed_password = await self.password_encoder.hash_password(password=password_in.new_password)
+            result = await session.execute(self._set_password_query(pk, current_password, new_hashed_password))
+            if result.scalar_one_or_none() is None:
+                # The password changed since it was checked
                 raise ex.IncorrectPassword()
-            new_hashed_password = HashService.hash_password(password=password_in.new_password)
-            user.password = new_hashed_password
-            await session.execute(stmt)
             await session.commit()
+        if self.user_cache is not None:
+            await self.user_cache.invalidate(pk)
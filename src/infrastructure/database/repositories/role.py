@@ -1,4 +1,5 @@
 from typing import (
+    Any,
     Callable,
 )
 
@@ -6,14 +7,35 @@ from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
+from src.application import (
+    dto,
+)
 from src.application.queries import (
     RoleQuery,
 )
 from src.infrastructure.database import (
     models,
 )
+from src.infrastructure.database.user_cache import (
+    UserCache,
+)
 
 
 class RoleRepository(RoleQuery):
-    def __init__(self, session_factory: Callable[[], AsyncSession]):
+    def __init__(self, session_factory: Callable[[], AsyncSession], user_cache: UserCache | None = None):
+        """
+        :param user_cache: drops the cached role when it changes, cached users embed it
+        """
         super().__init__(session=session_factory, model=models.Role)
+        self.user_cache = user_cache
+
+    async def partial_update(self, pk: int, data_in: dto.RoleUpdate, **kwargs: Any) -> models.Role:
+        role = await super().partial_update(pk=pk, data_in=data_in, **kwargs)
+        if self.user_cache is not None:
+            await self.user_cache.invalidate_role(pk)
+        return role
+
+    async def destroy(self, *args: Any, **kwargs: Any) -> None:
+        await super().destroy(*args, **kwargs)
+        if self.user_cache is not None:
+            await self.user_cache.invalidate_role(kwargs["id"])
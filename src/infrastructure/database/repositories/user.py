@@ -1,19 +1,68 @@
+import functools
 from typing import (
+    Any,
     Callable,
 )
 
+from sqlalchemy import (
+    Result,
+)
+
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
 )
 
+from src.application import (
+    dto,
+)
 from src.application.queries import (
     UserQuery,
 )
 from src.infrastructure.database import (
     models,
 )
+from src.infrastructure.database.user_cache import (
+    CACHED_FIELDS,
+    UserCache,
+)
 
 
 class UserRepository(UserQuery):
-    def __init__(self, session_factory: Callable[[], AsyncSession]) -> None:
+    def __init__(self, session_factory: Callable[[], AsyncSession], cache: UserCache | None = None) -> None:
+        """
+        :param cache: serves the reads by id, username or Telegram id, and the reads by ids
+        """
         super().__init__(session=session_factory, model=models.User)
+        self.cache = cache
+
+    async def get_single(self, *args: Any, **kwargs: Any) -> models.User | None:
+        if self.cache is None or args or len(kwargs) != 1 or not kwargs.keys() <= CACHED_FIELDS:
+            return await super().get_single(*args, **kwargs)
+        (field, value), = kwargs.items()
+        return await self.cache.get(field, value, load=functools.partial(super().get_single, **kwargs))
+
+    async def get_by_ids(self, ids: list[int]) -> list[models.User]:
+        if self.cache is None:
+            return await self._get_by_ids(ids)
+        return await self.cache.get_many(ids, load=self._get_by_ids)
+
+    async def _get_by_ids(self, ids: list[int]) -> list[models.User]:
+        async with self._session_factory() as session:
+            result: Result = await session.execute(self._get_by_ids_query(ids))
+            return list(result.scalars().all())
+
+    async def partial_update(self, pk: int, data_in: dto.UserUpdate, **kwargs: Any) -> models.User:
+        user = await super().partial_update(pk=pk, data_in=data_in, **kwargs)
+        if self.cache is not None:
+            await self.cache.invalidate(pk)
+        return user
+
+    async def destroy(self, *args: Any, **kwargs: Any) -> None:
+        await super().destroy(*args, **kwargs)
+        if self.cache is not None:
+            await self.cache.invalidate(kwargs["id"])
+
+    async def count_password_parameters(self) -> list[tuple[str, str, int]]:
+        async with self._session_factory() as session:
+            result: Result = await session.execute(self._password_parameters_query())
+            return [(algorithm, parameters, count) for algorithm, parameters, count in result.all()]
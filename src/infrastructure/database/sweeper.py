@@ -0,0 +1,42 @@
+"""
+Index the JWT blacklist entries and role revocations written before their indexes, and give
+an expiry to the blacklist entries written before entries had one.
+
+The API does it on its first start; run it again after deploying, once no older API process
+is left writing unindexed entries:
+
+    $ python -m src.infrastructure.database.sweeper
+"""
+import asyncio
+import logging
+
+from src.shared import (
+    load_config,
+)
+
+from .redis import (
+    JTIRedisStorage,
+    RedisConnector,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    config = load_config()
+    storage = JTIRedisStorage(
+        RedisConnector(
+            url=config.db.construct_redis_dsn(),
+            mode=config.db.redis_mode,
+            sentinels=config.db.redis_sentinels,
+            sentinel_master=config.db.redis_sentinel_master,
+        ),
+        default_ttl=config.security.refresh_expire_time_in_seconds,
+    )
+    swept = await storage.sweep()
+    logger.info("Swept %d blacklist entries, %d revoked tokens are live", swept, await storage.count())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
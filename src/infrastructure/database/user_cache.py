@@ -0,0 +1,249 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Final,
+)
+
+from redis.exceptions import (  # type: ignore
+    NoScriptError,
+    RedisError,
+)
+
+from src.infrastructure import (
+    metrics,
+)
+from src.shared import (
+    ex,
+)
+
+from . import (
+    models,
+)
+from .redis import (
+    RedisConnector,
+)
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_NAMESPACE = "user_cache"
+# The lookups a user can be cached by; username and telegram_id keys hold the user id
+CACHED_FIELDS: Final[frozenset[str]] = frozenset({"id", "username", "telegram_id"})
+# Credentials are never copied to Redis, nothing read through the cache needs them
+_EXCLUDED_COLUMNS: Final[frozenset[str]] = frozenset({"password", "confirmation_code"})
+_USER_COLUMNS: Final[tuple[str, ...]] = tuple(
+    column.key for column in models.User.__table__.columns if column.key not in _EXCLUDED_COLUMNS
+)
+_DATETIME_COLUMNS: Final[tuple[str, ...]] = ("created_at", "updated_at", "deleted_at")
+# Without a circuit breaker the connector raises the Redis errors themselves
+_UNAVAILABLE = (ex.StorageUnavailable, RedisError)
+# A changed user or role is replaced by a tombstone rather than deleted. An entry is only
+# written over the value seen before it was loaded, so a read that loaded the user before
+# the change finds a new tombstone there and can't cache the stale row.
+TOMBSTONE_PREFIX = "!"
+WRITE_SCRIPT: Final[str] = """
+if (redis.call("GET", KEYS[1]) or "") ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3])
+return 1
+"""
+WRITE_SHA: Final[str] = hashlib.sha1(WRITE_SCRIPT.encode()).hexdigest()
+
+
+def _is_entry(value: str | None) -> bool:
+    return value is not None and not value.startswith(TOMBSTONE_PREFIX)
+
+
+def _dump_user(user: models.User) -> str:
+    row = {column: getattr(user, column) for column in _USER_COLUMNS}
+    for column in _DATETIME_COLUMNS:
+        if row[column] is not None:
+            row[column] = row[column].isoformat()
+    return json.dumps(row)
+
+
+def _load_user(row: dict[str, Any], role: models.Role | None) -> models.User:
+    for column in _DATETIME_COLUMNS:
+        if row[column] is not None:
+            row[column] = datetime.datetime.fromisoformat(row[column])
+    return models.User(**row, role=role)
+
+
+class UserCache:
+    """
+    Users read by id, username or Telegram id, cached in Redis for ``ttl`` seconds and in
+    process by the client cache of ``redis_connector``, which Redis keeps up to date.
+
+    A user and its role are cached under separate keys, so that a role change only drops
+    the role. Entries are dropped when the user changes, and a read that loaded the user
+    before the change does not cache it again (see ``WRITE_SCRIPT``); a username or Telegram
+    id key that no longer matches its user is ignored. When Redis is unavailable, reads go
+    to the database. Cached users are transient instances, without their password.
+
+    Examples:
+        >>> user = await cache.get("username", "johndoe", load=lambda: repository.get_single(username="johndoe"))
+        >>> await cache.invalidate(user.id)
+    """
+
+    def __init__(self, redis_connector: RedisConnector, ttl: int = 300) -> None:
+        self.protocol = redis_connector
+        self.ttl = ttl
+        self.namespace: str = USER_CACHE_NAMESPACE
+        self._hits = metrics.cache.READ_THROUGH_HITS.labels(USER_CACHE_NAMESPACE)
+        self._misses = metrics.cache.READ_THROUGH_MISSES.labels(USER_CACHE_NAMESPACE)
+        self._queries_avoided = metrics.cache.QUERIES_AVOIDED.labels(USER_CACHE_NAMESPACE)
+
+    def _key(self, field: str, value: Any) -> str:
+        return f"{self.namespace}:{field}:{value}"
+
+    async def get(
+            self,
+            field: str,
+            value: Any,
+            load: Callable[[], Awaitable[models.User | None]],
+    ) -> models.User | None:
+        """The user whose ``field``, one of ``CACHED_FIELDS``, is ``value``; ``load`` reads it on a miss"""
+        seen: dict[str, str] = {}
+        try:
+            user = await self._read(field, value, seen)
+        except _UNAVAILABLE:
+            user = None
+        if user is not None:
+            self._hits.inc()
+            self._queries_avoided.inc()
+            return user
+        self._misses.inc()
+        user = await load()
+        if user is not None:
+            await self._write([user], seen)
+        return user
+
+    async def get_many(
+            self,
+            ids: list[int],
+            load: Callable[[list[int]], Awaitable[list[models.User]]],
+    ) -> list[models.User]:
+        """The existing users among ``ids``; ``load`` reads the missing ones with a single query"""
+        seen: dict[str, str] = {}
+        try:
+            users = await self._read_many(ids, seen)
+        except _UNAVAILABLE:
+            users = {}
+        self._hits.inc(len(users))
+        missing = [user_id for user_id in ids if user_id not in users]
+        if not missing:
+            self._queries_avoided.inc()
+            return list(users.values())
+        self._misses.inc(len(missing))
+        loaded = await load(missing)
+        await self._write(loaded, seen)
+        return [*users.values(), *loaded]
+
+    async def _read(self, field: str, value: Any, seen: dict[str, str]) -> models.User | None:
+        if field == "id":
+            user_id = value
+        else:
+            user_id, = await self.protocol.get_many([self._key(field, value)])
+            if user_id is None:
+                return None
+        user = (await self._read_many([int(user_id)], seen)).get(int(user_id))
+        if user is None or getattr(user, field) != value:
+            return None
+        return user
+
+    async def _read_many(self, ids: list[int], seen: dict[str, str]) -> dict[int, models.User]:
+        """The cached users among ``ids``; the values read, tombstones included, are added to ``seen``"""
+        keys = [self._key("id", user_id) for user_id in ids]
+        values = await self.protocol.get_many(keys)
+        seen.update((key, value) for key, value in zip(keys, values) if value is not None)
+        rows = {user_id: json.loads(value) for user_id, value in zip(ids, values) if _is_entry(value)}
+        role_ids = list({row["role_id"] for row in rows.values()} - {None})
+        role_keys = [self._key("role", role_id) for role_id in role_ids]
+        role_values = await self.protocol.get_many(role_keys)
+        seen.update((key, value) for key, value in zip(role_keys, role_values) if value is not None)
+        roles = dict(zip(role_ids, role_values))
+        users = {}
+        for user_id, row in rows.items():
+            role_id = row["role_id"]
+            if role_id is not None and not _is_entry(roles[role_id]):
+                # The role changed since, the user is read again along with it
+                continue
+            role = models.Role(**json.loads(roles[role_id])) if role_id is not None else None
+            users[user_id] = _load_user(row, role)
+        return users
+
+    async def _write(self, users: list[models.User], seen: dict[str, str]) -> None:
+        """Cache ``users``, loaded after the values in ``seen`` were read"""
+        if not users:
+            return
+        entries: dict[str, str] = {}
+        lookups: dict[str, int] = {}
+        for user in users:
+            entries[self._key("id", user.id)] = _dump_user(user)
+            lookups[self._key("username", user.username)] = user.id
+            if user.telegram_id is not None:
+                lookups[self._key("telegram_id", user.telegram_id)] = user.id
+            if user.role is not None:
+                entries[self._key("role", user.role.id)] = json.dumps(user.role.to_dict())
+        try:
+            try:
+                await self._set(entries, lookups, seen)
+            except NoScriptError:
+                # Redis restarted or failed over since the script was loaded
+                await self.protocol.execute("script_load", WRITE_SCRIPT)
+                await self._set(entries, lookups, seen)
+        except _UNAVAILABLE:
+            pass
+
+    async def _set(self, entries: dict[str, str], lookups: dict[str, int], seen: dict[str, str]) -> None:
+        # Users and roles go over what was seen before loading them, or over an absent key
+        writes = [(key, seen.get(key, ""), value) for key, value in entries.items()]
+        if self.protocol.mode == "cluster":
+            # Cluster pipelines refuse scripts, each entry is sent to its node concurrently instead
+            await asyncio.gather(*(
+                self.protocol.execute("evalsha", WRITE_SHA, 1, key, expected, value, self.ttl)
+                for key, expected, value in writes
+            ))
+            writes = []
+        async with self.protocol.batch() as batch:
+            for key, expected, value in writes:
+                batch.add("evalsha", WRITE_SHA, 1, key, expected, value, self.ttl)
+            for key, user_id in lookups.items():
+                batch.add("set", key, user_id, ex=self.ttl)
+
+    async def _drop(self, keys: list[str], tombstones: list[str] | None = None) -> None:
+        # Deferred while Redis is unavailable, meanwhile nothing is read from it
+        tombstones = tombstones or []
+        try:
+            async with self.protocol.batch(deferrable=True) as batch:
+                for key in keys:
+                    batch.add("unlink", key)
+                for key in tombstones:
+                    # Unique, so that it differs from any tombstone a running read has seen
+                    batch.add("set", key, f"{TOMBSTONE_PREFIX}{os.urandom(8).hex()}", ex=self.ttl)
+        except _UNAVAILABLE as e:
+            logger.warning(
+                "Could not drop %s from the user cache, it expires in %ds: %s", [*keys, *tombstones], self.ttl, e
+            )
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop the cached user, once it changed in the database"""
+        await self._drop([], tombstones=[self._key("id", user_id)])
+
+    async def invalidate_lookups(self, username: str | None = None, telegram_id: int | None = None) -> None:
+        """Drop what the username and Telegram id pointed to, once a user took them"""
+        keys = [self._key("username", username)] if username is not None else []
+        if telegram_id is not None:
+            keys.append(self._key("telegram_id", telegram_id))
+        await self._drop(keys)
+
+    async def invalidate_role(self, role_id: int) -> None:
+        """Drop the cached role, so that its users are read again"""
+        await self._drop([], tombstones=[self._key("role", role_id)])
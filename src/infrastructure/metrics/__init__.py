@@ -0,0 +1,13 @@
+from . import (
+    blacklist,
+    cache,
+    hashing,
+    redis,
+)
+
+__all__ = (
+    "blacklist",
+    "cache",
+    "hashing",
+    "redis",
+)
@@ -0,0 +1,35 @@
+from typing import (
+    Final,
+)
+
+from prometheus_client import (
+    Counter,
+    Gauge,
+)
+
+REVOKED_TOKENS: Final[Gauge] = Gauge(
+    "que_account_revoked_tokens",
+    "Revoked tokens that have not expired yet, as last counted in Redis",
+)
+FILTER_LOOKUPS: Final[Counter] = Counter(
+    "que_account_revocation_filter_lookups_total",
+    "Revocation checks by the in-process filter answer: miss (not revoked), hit (ask Redis) or unloaded",
+    ["result"],
+)
+FILTER_FALSE_POSITIVES: Final[Counter] = Counter(
+    "que_account_revocation_filter_false_positives_total",
+    "Filter hits that Redis found were not revoked",
+)
+FILTER_ERROR_RATE: Final[Gauge] = Gauge(
+    "que_account_revocation_filter_false_positive_rate",
+    "Expected false positive rate of the revocation filter for the tokens it holds",
+)
+FILTER_ENTRIES: Final[Gauge] = Gauge(
+    "que_account_revocation_filter_entries",
+    "Revoked tokens held by the in-process revocation filter",
+)
+DEGRADED_CHECKS: Final[Counter] = Counter(
+    "que_account_revocation_degraded_checks_total",
+    "Revocation checks made without Redis, by degraded policy",
+    ["policy"],
+)
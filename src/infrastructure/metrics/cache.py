@@ -0,0 +1,44 @@
+from typing import (
+    Final,
+)
+
+from prometheus_client import (
+    Counter,
+    Gauge,
+)
+
+HITS: Final[Counter] = Counter(
+    "que_account_cache_hits_total",
+    "Lookups answered by an in-process cache",
+    ["cache"],
+)
+MISSES: Final[Counter] = Counter(
+    "que_account_cache_misses_total",
+    "Lookups an in-process cache could not answer",
+    ["cache"],
+)
+SIZE: Final[Gauge] = Gauge(
+    "que_account_cache_entries",
+    "Entries held by an in-process cache",
+    ["cache"],
+)
+INVALIDATIONS: Final[Counter] = Counter(
+    "que_account_cache_invalidations_total",
+    "Entries an in-process cache dropped because their source changed",
+    ["cache"],
+)
+READ_THROUGH_HITS: Final[Counter] = Counter(
+    "que_account_read_through_hits_total",
+    "Lookups a read-through cache answered from process memory or Redis",
+    ["cache"],
+)
+READ_THROUGH_MISSES: Final[Counter] = Counter(
+    "que_account_read_through_misses_total",
+    "Lookups a read-through cache loaded from the database",
+    ["cache"],
+)
+QUERIES_AVOIDED: Final[Counter] = Counter(
+    "que_account_cache_queries_avoided_total",
+    "Database queries a read-through cache answered instead",
+    ["cache"],
+)
@@ -0,0 +1,43 @@
+from typing import (
+    Final,
+)
+
+from prometheus_client import (
+    Counter,
+    Gauge,
+    Histogram,
+)
+
+QUEUE_DEPTH: Final[Gauge] = Gauge(
+    "que_account_password_hashing_queue_depth",
+    "Password hashing jobs waiting for a free worker",
+    ["operation"],
+)
+WAIT_TIME: Final[Histogram] = Histogram(
+    "que_account_password_hashing_wait_seconds",
+    "Time a password hashing job waited for a free worker",
+    ["operation"],
+)
+DURATION: Final[Histogram] = Histogram(
+    "que_account_password_hashing_duration_seconds",
+    "Time spent by a worker on a password hashing job",
+    ["operation"],
+)
+IN_FLIGHT: Final[Gauge] = Gauge(
+    "que_account_password_hashing_in_flight",
+    "Password hashing jobs currently running",
+)
+IN_FLIGHT_MEMORY: Final[Gauge] = Gauge(
+    "que_account_password_hashing_in_flight_memory_bytes",
+    "Argon2 memory held by the password hashing jobs currently running",
+)
+REJECTED: Final[Counter] = Counter(
+    "que_account_password_hashing_rejected_total",
+    "Password hashing jobs rejected by admission control",
+    ["reason"],
+)
+REMOTE_FALLBACKS: Final[Counter] = Counter(
+    "que_account_password_hashing_remote_fallbacks_total",
+    "Remote password hashing jobs that ran on the local pool instead",
+    ["reason"],
+)
@@ -0,0 +1,37 @@
+from typing import (
+    Final,
+)
+
+from prometheus_client import (
+    Counter,
+    Gauge,
+)
+
+BREAKER_STATE: Final[Gauge] = Gauge(
+    "que_account_circuit_breaker_state",
+    "State of a circuit breaker: 0 closed, 1 half-open, 2 open",
+    ["breaker"],
+)
+BREAKER_TRIPS: Final[Counter] = Counter(
+    "que_account_circuit_breaker_trips_total",
+    "Times a circuit breaker opened",
+    ["breaker"],
+)
+BREAKER_REJECTED: Final[Counter] = Counter(
+    "que_account_circuit_breaker_rejected_total",
+    "Calls refused by an open circuit breaker",
+    ["breaker"],
+)
+DEFERRED_WRITES: Final[Gauge] = Gauge(
+    "que_account_redis_deferred_writes",
+    "Redis write batches waiting to be replayed",
+)
+DEFERRED_WRITES_DROPPED: Final[Counter] = Counter(
+    "que_account_redis_deferred_writes_dropped_total",
+    "Redis write batches dropped because too many were waiting",
+)
+RATE_LIMITED: Final[Counter] = Counter(
+    "que_account_rate_limited_total",
+    "Requests rejected by a rate limit",
+    ["scope"],
+)
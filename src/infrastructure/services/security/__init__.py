@@ -4,8 +4,12 @@ from .hash import (
 from .jwt import (
     JWTService,
 )
+from .pool import (
+    PooledHashService,
+)
 
 __all__ = (
     "HashService",
     "JWTService",
+    "PooledHashService",
 )
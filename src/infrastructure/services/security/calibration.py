@@ -0,0 +1,86 @@
+import logging
+import time
+
+from argon2 import (
+    PasswordHasher,
+)
+
+from src.shared import (
+    Hashing,
+)
+
+from .hash import (
+    HashParameters,
+)
+
+logger = logging.getLogger(__name__)
+
+MIN_MEMORY_COST: int = 19 * 1024
+MAX_TIME_COST: int = 10
+
+
+def _measure_verify(parameters: HashParameters, rounds: int = 3) -> float:
+    """Return the best of ``rounds`` verify timings, in milliseconds."""
+    hasher = PasswordHasher(
+        time_cost=parameters.time_cost,
+        memory_cost=parameters.memory_cost,
+        parallelism=parameters.parallelism,
+    )
+    hashed_password = hasher.hash("calibration-password")
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.verify(hashed_password, "calibration-password")
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def calibrate_parameters(
+        target_verify_ms: float,
+        max_memory_cost: int = 65536,
+        parallelism: int = 4,
+) -> HashParameters:
+    """
+    Pick argon2 costs that make one verify take about ``target_verify_ms`` on this machine.
+
+    Memory is the stronger defence, so it is kept at ``max_memory_cost`` and the time cost
+    is raised until the target is reached. If a single pass is already too slow, memory is
+    halved down to ``MIN_MEMORY_COST`` instead.
+    """
+    parameters = HashParameters(time_cost=1, memory_cost=max_memory_cost, parallelism=parallelism)
+    elapsed = _measure_verify(parameters)
+
+    while elapsed > target_verify_ms and parameters.memory_cost // 2 >= MIN_MEMORY_COST:
+        parameters = HashParameters(
+            time_cost=1, memory_cost=parameters.memory_cost // 2, parallelism=parallelism
+        )
+        elapsed = _measure_verify(parameters)
+
+    per_pass = elapsed / parameters.time_cost
+    time_cost = max(1, min(MAX_TIME_COST, int(target_verify_ms // per_pass)))
+    if time_cost != parameters.time_cost:
+        parameters = HashParameters(
+            time_cost=time_cost, memory_cost=parameters.memory_cost, parallelism=parallelism
+        )
+        elapsed = _measure_verify(parameters)
+
+    logger.info(
+        "Calibrated argon2 parameters %s: verify takes %.1fms (target %.1fms)",
+        parameters, elapsed, target_verify_ms,
+    )
+    return parameters
+
+
+def resolve_parameters(config: Hashing) -> HashParameters:
+    """Return the argon2 parameters from the configuration, calibrating them if asked to."""
+    if config.calibrate:
+        return calibrate_parameters(
+            target_verify_ms=config.target_verify_ms,
+            max_memory_cost=config.memory_cost,
+            parallelism=config.parallelism,
+        )
+    return HashParameters(
+        time_cost=config.time_cost,
+        memory_cost=config.memory_cost,
+        parallelism=config.parallelism,
+    )
@@ -0,0 +1,136 @@
+import binascii
+from collections import (
+    OrderedDict,
+)
+import json
+import time
+from typing import (
+    Any,
+)
+
+from .keys import (
+    KeyRing,
+    SigningKey,
+    base64url_decode,
+    base64url_encode,
+)
+
+# Upper bound of the decoded header cache, which keeps the most recently verified headers
+MAX_CACHED_HEADERS: int = 64
+
+
+class TokenError(ValueError):
+    pass
+
+
+def encode_header(key: SigningKey, headers: dict[str, Any] | None = None) -> bytes:
+    header = {"typ": "JWT", "alg": key.algorithm}
+    if key.kid is not None:
+        header["kid"] = key.kid
+    if headers:
+        header.update(headers)
+    return base64url_encode(json.dumps(header, separators=(",", ":"), sort_keys=True).encode())
+
+
+class TokenCodec:
+    """
+    Signs and verifies JWTs with the key material prepared once.
+
+    Tokens are signed with the active key of ``keys`` and verified with the key their
+    ``kid`` header names, found with one dict lookup. For HMAC keys without a key id the
+    output is byte for byte what ``jose.jwt.encode`` produces for the same claims. Every
+    token ``jose`` accepts is accepted here, with the same claim checks as
+    ``jose.jwt.decode`` with its default options. Header segments are decoded once, and
+    keys prepare their own state once (see ``keys.py``); only the headers of tokens whose
+    signature checked out are kept, so that made-up headers can't crowd out real ones.
+
+    Examples:
+        >>> codec = TokenCodec(KeyRing(HMACKey(secret_key="secret", algorithm="HS256")))
+        >>> token = codec.encode({"sub": "1"})
+        >>> codec.decode(token)
+        {'sub': '1'}
+    """
+
+    def __init__(self, keys: KeyRing) -> None:
+        self.keys = keys
+        self._header = encode_header(keys.active)
+        self._header_keys: OrderedDict[str, SigningKey] = OrderedDict({self._header.decode(): keys.active})
+
+    def encode(self, claims: dict[str, Any], headers: dict[str, Any] | None = None) -> str:
+        key = self.keys.active
+        header = encode_header(key, headers) if headers else self._header
+        payload = base64url_encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = header + b"." + payload
+        return (signing_input + b"." + base64url_encode(key.sign(signing_input))).decode()
+
+    def _resolve_key(self, header_segment: str) -> SigningKey:
+        key = self._header_keys.get(header_segment)
+        if key is not None:
+            self._header_keys.move_to_end(header_segment)
+            return key
+        header = json.loads(base64url_decode(header_segment))
+        if not isinstance(header, dict):
+            raise TokenError("Invalid header string: must be a json object")
+        key = self.keys.get(header.get("kid"))
+        if key is None:
+            raise TokenError("Unknown key id")
+        if header.get("alg") != key.algorithm:
+            raise TokenError("The specified alg value is not allowed")
+        return key
+
+    def _remember(self, header_segment: str, key: SigningKey) -> None:
+        self._header_keys[header_segment] = key
+        if len(self._header_keys) > MAX_CACHED_HEADERS:
+            self._header_keys.popitem(last=False)
+
+    def decode(
+            self,
+            token: str,
+            audience: str | None = None,
+            issuer: str | None = None,
+            verify: bool = True,
+    ) -> dict[str, Any]:
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            if verify:
+                key = self._resolve_key(header_segment)
+                signature = base64url_decode(signature_segment)
+            claims = json.loads(base64url_decode(payload_segment))
+        except (ValueError, binascii.Error, UnicodeError) as e:
+            raise TokenError("Malformed token") from e
+
+        if verify:
+            signing_input = f"{header_segment}.{payload_segment}".encode()
+            if not key.verify(signing_input, signature):
+                raise TokenError("Signature verification failed")
+            self._remember(header_segment, key)
+        if not isinstance(claims, dict):
+            raise TokenError("Invalid payload string: must be a json object")
+        self._validate_claims(claims, audience=audience, issuer=issuer)
+        return claims
+
+    @staticmethod
+    def _validate_claims(claims: dict[str, Any], audience: str | None, issuer: str | None) -> None:
+        try:
+            # iat is only required to be a number
+            _, nbf, exp = (int(claims[name]) if name in claims else None for name in ("iat", "nbf", "exp"))
+        except (TypeError, ValueError) as e:
+            raise TokenError("Time claims must be numbers") from e
+        now = int(time.time())
+        if nbf is not None and nbf > now:
+            raise TokenError("The token is not yet valid (nbf)")
+        if exp is not None and exp < now:
+            raise TokenError("Signature has expired")
+
+        if "aud" in claims:
+            audiences = [claims["aud"]] if isinstance(claims["aud"], str) else claims["aud"]
+            if not isinstance(audiences, list) or not all(isinstance(aud, str) for aud in audiences):
+                raise TokenError("Invalid claim format in token")
+            if audience not in audiences:
+                raise TokenError("Invalid audience")
+        if issuer is not None and claims.get("iss") != issuer:
+            raise TokenError("Invalid issuer")
+        if "sub" in claims and not isinstance(claims["sub"], str):
+            raise TokenError("Subject must be a string")
+        if "jti" in claims and not isinstance(claims["jti"], str):
+            raise TokenError("JWT ID must be a string")
@@ -1,3 +1,6 @@
+from dataclasses import (
+    dataclass,
+)
 import hashlib
 import hmac
 import time
@@ -6,6 +9,7 @@ from argon2 import (
     PasswordHasher,
 )
 from argon2.exceptions import (
+    InvalidHashError,
     VerifyMismatchError,
 )
 
@@ -19,6 +23,38 @@ from src.shared import (
 config = load_config().security
 
 
+@dataclass(frozen=True, slots=True)
+class HashParameters:
+    """
+    Argon2 cost parameters.
+
+    Attributes
+    ----------
+    time_cost : int
+        The number of iterations.
+    memory_cost : int
+        The memory usage in kibibytes.
+    parallelism : int
+        The number of parallel threads.
+    """
+    time_cost: int = 3
+    memory_cost: int = 65536
+    parallelism: int = 4
+
+    def __str__(self) -> str:
+        return f"m={self.memory_cost},t={self.time_cost},p={self.parallelism}"
+
+    @staticmethod
+    def parse(value: str) -> "HashParameters":
+        """The parameters written by ``str``, as in ``m=65536,t=3,p=4``"""
+        costs = dict(part.split("=", 1) for part in value.split(","))
+        return HashParameters(
+            time_cost=int(costs["t"]),
+            memory_cost=int(costs["m"]),
+            parallelism=int(costs["p"]),
+        )
+
+
 class HashService(IPasswordEncoder):
     """
     A class for hashing and verifying passwords and signatures.
@@ -43,6 +79,22 @@ class HashService(IPasswordEncoder):
     """
     _ph = PasswordHasher()
 
+    @staticmethod
+    def configure(parameters: HashParameters) -> None:
+        HashService._ph = PasswordHasher(
+            time_cost=parameters.time_cost,
+            memory_cost=parameters.memory_cost,
+            parallelism=parameters.parallelism,
+        )
+
+    @staticmethod
+    def get_parameters() -> HashParameters:
+        return HashParameters(
+            time_cost=HashService._ph.time_cost,
+            memory_cost=HashService._ph.memory_cost,
+            parallelism=HashService._ph.parallelism,
+        )
+
     @staticmethod
     def hash_password(password: str) -> str:
         return HashService._ph.hash(password)
@@ -55,6 +107,13 @@ class HashService(IPasswordEncoder):
         except VerifyMismatchError:
             return False
 
+    @staticmethod
+    def check_needs_rehash(hashed_password: str) -> bool:
+        try:
+            return HashService._ph.check_needs_rehash(hashed_password)
+        except InvalidHashError:
+            return True
+
     @staticmethod
     def verify_signature(
             telegram_id: int,
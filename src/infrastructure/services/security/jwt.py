@@ -1,25 +1,72 @@
 import datetime
+import os
+import time
 from typing import (
     Any,
     Literal,
 )
-import uuid
 
 from fastapi import (
     Response,
 )
-from jose import (
-    jwt,
-)
 
 from src.shared import (
     ex,
     load_config,
 )
 
+from .codec import (
+    TokenCodec,
+)
+from .keys import (
+    HMAC_ALGORITHMS,
+    HMACKey,
+    KeyRing,
+    SigningKey,
+    load_signing_key,
+)
+
 config = load_config().security
 
 
+def _load_key(algorithm: str, key: str | None, key_file: str | None, kid: str | None) -> SigningKey:
+    if algorithm in HMAC_ALGORITHMS:
+        if key is None:
+            raise ValueError(f"{algorithm} needs a secret key")
+        return load_signing_key(algorithm, key, kid or HMACKey.derive_kid(key))
+    if key_file is None:
+        raise ValueError(f"{algorithm} needs a PEM key file")
+    with open(key_file) as pem:
+        return load_signing_key(algorithm, pem.read(), kid)
+
+
+def _load_key_ring() -> KeyRing:
+    active = _load_key(config.algorithm, config.secret_key, config.private_key_file, config.key_id)
+    previous = []
+    legacy = None
+    for entry in config.previous_keys:
+        key = _load_key(entry["alg"], entry.get("key"), entry.get("key_file"), entry.get("kid"))
+        previous.append(key)
+        if entry.get("legacy"):
+            legacy = key
+    return KeyRing(active=active, previous=previous, legacy=legacy)
+
+
+codec = TokenCodec(_load_key_ring())
+
+RESERVED_CLAIMS: frozenset[str] = frozenset(
+    {"fresh", "csrf", "iat", "exp", "iss", "aud", "type", "jti", "nbf", "sub"}
+)
+
+
+def _to_timestamp(value: float | datetime.datetime | datetime.timedelta, now: float) -> float:
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    if isinstance(value, datetime.timedelta):
+        return now + value.total_seconds()
+    return value
+
+
 class JWTService:
     @staticmethod
     def _create_token(
@@ -38,67 +85,42 @@ class JWTService:
             ignore_errors: bool = True,
     ) -> str:
         """Encode a token"""
-        reserved_claims = {
-            "fresh",
-            "csrf",
-            "iat",
-            "exp",
-            "iss",
-            "aud",
-            "type",
-            "jti",
-            "nbf",
-            "sub",
-        }
-        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        now = time.time()
 
         additional_claims = {}
         if data is not None:
-            if not ignore_errors and set(data.keys()).intersection(reserved_claims):
-                raise ValueError(f"{reserved_claims} are forbidden in additional claims")
-            additional_claims = {k: v for k, v in data.items() if k not in reserved_claims}
+            if not ignore_errors and RESERVED_CLAIMS.intersection(data):
+                raise ValueError(f"{set(RESERVED_CLAIMS)} are forbidden in additional claims")
+            additional_claims = {k: v for k, v in data.items() if k not in RESERVED_CLAIMS}
 
-        jwt_claims = {"sub": uid, "jti": jti or str(uuid.uuid4()), "type": type_}
+        # One urandom call for both ids, cheaper than two uuid4() and just as random
+        random_ids = os.urandom(32).hex()
+        jwt_claims = {"sub": uid, "jti": jti or random_ids[:32], "type": type_}
 
         if type_ == "access":
             jwt_claims["fresh"] = fresh  # type: ignore
 
         if csrf and not isinstance(csrf, str):
-            jwt_claims["csrf"] = str(uuid.uuid4())
+            jwt_claims["csrf"] = random_ids[32:]
         elif isinstance(csrf, str):
             jwt_claims["csrf"] = csrf
 
-        if isinstance(issued, datetime.datetime):
-            jwt_claims["iat"] = issued.timestamp()  # type: ignore
-        elif isinstance(issued, (float, int)):
-            jwt_claims["iat"] = issued
-        else:
-            jwt_claims["iat"] = datetime.datetime.now(tz=datetime.timezone.utc).timestamp()  # type: ignore
+        jwt_claims["iat"] = _to_timestamp(issued, now) if issued is not None else now  # type: ignore
 
-        if isinstance(expiry, datetime.datetime):
-            jwt_claims["exp"] = expiry.timestamp()  # type: ignore
-        elif isinstance(expiry, datetime.timedelta):
-            jwt_claims["exp"] = (now + expiry).timestamp()  # type: ignore
-        elif isinstance(expiry, (float, int)):
-            jwt_claims["exp"] = expiry
+        if expiry is not None:
+            jwt_claims["exp"] = _to_timestamp(expiry, now)  # type: ignore
 
         if audience:
             jwt_claims["aud"] = audience
         if issuer:
             jwt_claims["iss"] = issuer
 
-        if isinstance(not_before, datetime.datetime):
-            jwt_claims["nbf"] = not_before.timestamp()  # type: ignore
-        elif isinstance(not_before, datetime.timedelta):
-            jwt_claims["nbf"] = (now + not_before).timestamp()  # type: ignore
-        elif isinstance(not_before, (int, float)):
-            jwt_claims["nbf"] = not_before  # type: ignore
+        if not_before is not None:
+            jwt_claims["nbf"] = _to_timestamp(not_before, now)  # type: ignore
 
         payload = {**additional_claims, **jwt_claims}
 
-        return jwt.encode(
-            claims=payload, key=config.secret_key, algorithm=config.algorithm, headers=headers
-        )
+        return codec.encode(payload, headers=headers)
 
     @staticmethod
     def decode_token(
@@ -109,17 +131,15 @@ class JWTService:
     ) -> dict[str, Any]:
         """Decode a token"""
         try:
-            return jwt.decode(
-                token=token,
-                key=config.secret_key,
-                algorithms=config.algorithm,
-                audience=audience,
-                issuer=issuer,
-                options={"verify_signature": verify},
-            )
+            return codec.decode(token=token, audience=audience, issuer=issuer, verify=verify)
         except Exception as e:
             raise ex.JWTDecodeError() from e
 
+    @staticmethod
+    def get_jwks() -> dict[str, list[dict[str, str]]]:
+        """Public keys that verify the issued tokens, as a JWK set (empty for HMAC secrets)"""
+        return codec.keys.jwks()
+
     @staticmethod
     def create_access_token(
             uid: str,
@@ -128,7 +148,7 @@ class JWTService:
             data: dict[str, Any] | None = None,
             audience: str | None = None,
     ) -> str:
-        expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=config.access_expire_time_in_seconds)
+        expiry = datetime.timedelta(seconds=config.access_expire_time_in_seconds)
         return JWTService._create_token(
             uid=uid,
             type_="access",
@@ -146,7 +166,7 @@ class JWTService:
             data: dict[str, Any] | None = None,
             audience: str | None = None,
     ) -> str:
-        expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=config.refresh_expire_time_in_seconds)
+        expiry = datetime.timedelta(seconds=config.refresh_expire_time_in_seconds)
         return JWTService._create_token(
             uid=uid,
             type_="refresh",
@@ -0,0 +1,287 @@
+import abc
+import base64
+import hashlib
+import hmac
+import json
+from typing import (
+    Any,
+    Callable,
+    Final,
+    Iterable,
+    Iterator,
+)
+
+from cryptography.exceptions import (
+    InvalidSignature,
+)
+from cryptography.hazmat.primitives import (
+    hashes,
+    serialization,
+)
+from cryptography.hazmat.primitives.asymmetric import (
+    ec,
+    ed25519,
+    padding,
+    rsa,
+)
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+
+HMAC_ALGORITHMS: Final[dict[str, Callable[..., Any]]] = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+RSA_ALGORITHMS: Final[dict[str, type[hashes.HashAlgorithm]]] = {
+    "RS256": hashes.SHA256,
+    "RS384": hashes.SHA384,
+    "RS512": hashes.SHA512,
+}
+EC_ALGORITHMS: Final[dict[str, tuple[type[hashes.HashAlgorithm], type[ec.EllipticCurve], str]]] = {
+    "ES256": (hashes.SHA256, ec.SECP256R1, "P-256"),
+    "ES384": (hashes.SHA384, ec.SECP384R1, "P-384"),
+    "ES512": (hashes.SHA512, ec.SECP521R1, "P-521"),
+}
+ALGORITHMS: Final[frozenset[str]] = frozenset({*HMAC_ALGORITHMS, *RSA_ALGORITHMS, *EC_ALGORITHMS, "EdDSA"})
+
+
+def base64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def base64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _int_to_base64url(value: int, length: int | None = None) -> str:
+    length = length or (value.bit_length() + 7) // 8
+    return base64url_encode(value.to_bytes(length, "big")).decode()
+
+
+class SigningKey(abc.ABC):
+    """
+    A JWT signing key for one algorithm.
+
+    ``kid`` names the key in the token header. HMAC keys have none unless given one (see
+    ``HMACKey.derive_kid``); asymmetric keys default to their RFC 7638 thumbprint.
+    """
+
+    algorithm: str
+    kid: str | None
+
+    @abc.abstractmethod
+    def sign(self, signing_input: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        raise NotImplementedError
+
+    def public_jwk(self) -> dict[str, str] | None:
+        """The public key in JWK format, or None when the key must stay secret"""
+        return None
+
+
+class HMACKey(SigningKey):
+    @staticmethod
+    def derive_kid(secret_key: str) -> str:
+        """A stable key id that reveals nothing about the secret"""
+        digest = hmac.new(secret_key.encode(), b"que-account-jwt-kid", hashlib.sha256).digest()
+        return base64url_encode(digest[:12]).decode()
+
+    def __init__(self, secret_key: str, algorithm: str = "HS256", kid: str | None = None) -> None:
+        self.algorithm = algorithm
+        self.kid = kid
+        # Keyed once, every signature only copies the HMAC state
+        self._mac = hmac.new(secret_key.encode(), digestmod=HMAC_ALGORITHMS[algorithm])
+
+    def sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self.sign(signing_input), signature)
+
+
+class AsymmetricKey(SigningKey, abc.ABC):
+    def __init__(self, algorithm: str, kid: str | None = None) -> None:
+        self.algorithm = algorithm
+        self.kid = kid or self.thumbprint()
+
+    @abc.abstractmethod
+    def _jwk_members(self) -> dict[str, str]:
+        """The required JWK members of the public key"""
+        raise NotImplementedError
+
+    def thumbprint(self) -> str:
+        members = json.dumps(self._jwk_members(), separators=(",", ":"), sort_keys=True)
+        return base64url_encode(hashlib.sha256(members.encode()).digest()).decode()
+
+    def public_jwk(self) -> dict[str, str]:
+        return {**self._jwk_members(), "alg": self.algorithm, "use": "sig", "kid": self.kid}  # type: ignore
+
+
+class RSAKey(AsymmetricKey):
+    def __init__(self, key: rsa.RSAPrivateKey | rsa.RSAPublicKey, algorithm: str = "RS256", kid: str | None = None) -> None:
+        self._private_key = key if isinstance(key, rsa.RSAPrivateKey) else None
+        self._public_key = key.public_key() if isinstance(key, rsa.RSAPrivateKey) else key
+        self._hash = RSA_ALGORITHMS[algorithm]()
+        super().__init__(algorithm, kid)
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if self._private_key is None:
+            raise ValueError("A public key cannot sign")
+        return self._private_key.sign(signing_input, padding.PKCS1v15(), self._hash)
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        try:
+            self._public_key.verify(signature, signing_input, padding.PKCS1v15(), self._hash)
+            return True
+        except InvalidSignature:
+            return False
+
+    def _jwk_members(self) -> dict[str, str]:
+        numbers = self._public_key.public_numbers()
+        return {"kty": "RSA", "n": _int_to_base64url(numbers.n), "e": _int_to_base64url(numbers.e)}
+
+
+class ECKey(AsymmetricKey):
+    def __init__(
+            self,
+            key: ec.EllipticCurvePrivateKey | ec.EllipticCurvePublicKey,
+            algorithm: str = "ES256",
+            kid: str | None = None,
+    ) -> None:
+        hash_algorithm, curve, self._curve_name = EC_ALGORITHMS[algorithm]
+        if not isinstance(key.curve, curve):
+            raise ValueError(f"{algorithm} needs a {self._curve_name} key")
+        self._private_key = key if isinstance(key, ec.EllipticCurvePrivateKey) else None
+        self._public_key = key.public_key() if isinstance(key, ec.EllipticCurvePrivateKey) else key
+        self._signature_algorithm = ec.ECDSA(hash_algorithm())
+        self._size = (key.curve.key_size + 7) // 8
+        super().__init__(algorithm, kid)
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if self._private_key is None:
+            raise ValueError("A public key cannot sign")
+        # JWS wants the raw r || s pair instead of the DER structure
+        r, s = decode_dss_signature(self._private_key.sign(signing_input, self._signature_algorithm))
+        return r.to_bytes(self._size, "big") + s.to_bytes(self._size, "big")
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if len(signature) != 2 * self._size:
+            return False
+        r = int.from_bytes(signature[:self._size], "big")
+        s = int.from_bytes(signature[self._size:], "big")
+        try:
+            self._public_key.verify(encode_dss_signature(r, s), signing_input, self._signature_algorithm)
+            return True
+        except InvalidSignature:
+            return False
+
+    def _jwk_members(self) -> dict[str, str]:
+        numbers = self._public_key.public_numbers()
+        return {
+            "kty": "EC",
+            "crv": self._curve_name,
+            "x": _int_to_base64url(numbers.x, self._size),
+            "y": _int_to_base64url(numbers.y, self._size),
+        }
+
+
+class Ed25519Key(AsymmetricKey):
+    def __init__(
+            self,
+            key: ed25519.Ed25519PrivateKey | ed25519.Ed25519PublicKey,
+            algorithm: str = "EdDSA",
+            kid: str | None = None,
+    ) -> None:
+        self._private_key = key if isinstance(key, ed25519.Ed25519PrivateKey) else None
+        self._public_key = key.public_key() if isinstance(key, ed25519.Ed25519PrivateKey) else key
+        super().__init__(algorithm, kid)
+
+    def sign(self, signing_input: bytes) -> bytes:
+        if self._private_key is None:
+            raise ValueError("A public key cannot sign")
+        return self._private_key.sign(signing_input)
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        try:
+            self._public_key.verify(signature, signing_input)
+            return True
+        except InvalidSignature:
+            return False
+
+    def _jwk_members(self) -> dict[str, str]:
+        raw = self._public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "x": base64url_encode(raw).decode()}
+
+
+class KeyRing:
+    """
+    The signing key and every key tokens may still be verified with, indexed by ``kid``.
+
+    New tokens are signed with ``active``. During a rotation the ``previous`` keys keep
+    verifying the tokens they signed until those expire, so no session is lost. Tokens
+    without a ``kid`` header, issued before key ids existed, are verified with ``legacy``
+    (the active key by default).
+
+    Examples:
+        >>> ring = KeyRing(active=new_key, previous=[old_key])
+        >>> ring.get(old_key.kid) is old_key
+        True
+    """
+
+    def __init__(
+            self,
+            active: SigningKey,
+            previous: Iterable[SigningKey] = (),
+            legacy: SigningKey | None = None,
+    ) -> None:
+        self.active = active
+        self.legacy = legacy or active
+        self._keys: dict[str, SigningKey] = {}
+        for key in (*previous, active):
+            if key.kid is not None:
+                self._keys[key.kid] = key
+
+    def __iter__(self) -> Iterator[SigningKey]:
+        return iter(self._keys.values())
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        if kid is None:
+            return self.legacy
+        return self._keys.get(kid)
+
+    def jwks(self) -> dict[str, list[dict[str, str]]]:
+        """The public keys of the ring as a JWK set; HMAC secrets are never published"""
+        return {"keys": [jwk for key in self for jwk in (key.public_jwk(),) if jwk is not None]}
+
+
+def load_signing_key(algorithm: str, key: str, kid: str | None = None) -> SigningKey:
+    """
+    Build the signing key for ``algorithm``.
+
+    ``key`` is the shared secret for HMAC algorithms and a PEM encoded private (or, to only
+    verify, public) key otherwise.
+    """
+    if algorithm in HMAC_ALGORITHMS:
+        return HMACKey(key, algorithm, kid)
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+    pem = key.encode()
+    try:
+        loaded: Any = serialization.load_pem_private_key(pem, password=None)
+    except ValueError:
+        loaded = serialization.load_pem_public_key(pem)
+    if algorithm in RSA_ALGORITHMS and isinstance(loaded, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RSAKey(loaded, algorithm, kid)
+    if algorithm in EC_ALGORITHMS and isinstance(loaded, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        return ECKey(loaded, algorithm, kid)
+    if algorithm == "EdDSA" and isinstance(loaded, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return Ed25519Key(loaded, algorithm, kid)
+    raise ValueError(f"The key does not match the {algorithm} algorithm")
@@ -0,0 +1,166 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+import functools
+import os
+import time
+from typing import (
+    Any,
+    Callable,
+    Literal,
+    TypeVar,
+)
+
+from argon2 import (
+    PasswordHasher,
+    extract_parameters,
+)
+from argon2.exceptions import (
+    InvalidHashError,
+    VerifyMismatchError,
+)
+from argon2.low_level import (
+    ARGON2_VERSION,
+)
+
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
+)
+from src.infrastructure.metrics import (
+    hashing as metrics,
+)
+
+from .hash import (
+    HashParameters,
+    HashService,
+)
+from .scheduler import (
+    HashingScheduler,
+)
+
+T = TypeVar("T")
+
+
+@functools.lru_cache(maxsize=8)
+def _hasher_for(parameters: HashParameters) -> PasswordHasher:
+    return PasswordHasher(
+        time_cost=parameters.time_cost,
+        memory_cost=parameters.memory_cost,
+        parallelism=parameters.parallelism,
+    )
+
+
+def _hash_with(parameters: HashParameters, password: str) -> str:
+    # Module level, so that process workers can run it with parameters other than their own
+    return _hasher_for(parameters).hash(password)
+
+
+class PooledHashService(IAsyncPasswordEncoder):
+    """
+    Runs argon2 hashing and verification in a bounded pool, off the event loop.
+
+    Jobs are handed to the executor only when the ``scheduler`` admits them, so at most
+    ``max_workers`` jobs and the scheduler's memory budget are in flight, and the time a
+    job spends queued is observable. Each pool hashes with its own argon2 ``parameters``:
+    thread workers share the pool's hasher, process workers are configured with the same
+    parameters when they start. ``hash_password`` also takes the parameters of another
+    process, for the Redis workers that hash on behalf of the API.
+
+    Examples:
+        >>> encoder = PooledHashService(executor="process", max_workers=4)
+        >>> hashed_password = await encoder.hash_password("my_password")
+        >>> is_valid = await encoder.verify_password(password=hashed_password, hashed_password="my_password")
+    """
+
+    def __init__(
+            self,
+            executor: Literal["thread", "process"] = "thread",
+            max_workers: int | None = None,
+            parameters: HashParameters | None = None,
+            scheduler: HashingScheduler | None = None,
+    ) -> None:
+        self.parameters: HashParameters = parameters or HashService.get_parameters()
+        self._hasher = PasswordHasher(
+            time_cost=self.parameters.time_cost,
+            memory_cost=self.parameters.memory_cost,
+            parallelism=self.parameters.parallelism,
+        )
+        self.executor_kind = executor
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self._executor: Executor | None = None
+        self.scheduler = scheduler or HashingScheduler(max_concurrency=self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=HashService.configure,
+                    initargs=(self.parameters,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hashing"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, memory_cost: int, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        metrics.QUEUE_DEPTH.labels(operation).inc()
+        try:
+            await self.scheduler.acquire(memory_cost)
+        finally:
+            metrics.QUEUE_DEPTH.labels(operation).dec()
+        started_at = time.perf_counter()
+        metrics.WAIT_TIME.labels(operation).observe(started_at - queued_at)
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            duration = time.perf_counter() - started_at
+            self.scheduler.release(memory_cost, duration)
+            metrics.DURATION.labels(operation).observe(duration)
+
+    def _verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return self._hasher.verify(password, hashed_password)
+        except VerifyMismatchError:
+            return False
+
+    async def hash_password(self, password: str, parameters: HashParameters | None = None) -> str:
+        """Hash with the pool's parameters, or with the ``parameters`` another process asked for"""
+        if parameters is not None and parameters != self.parameters:
+            return await self._run("hash", parameters.memory_cost, _hash_with, parameters, password)
+        # Process workers hash with the HashService they were configured with on start
+        func = HashService.hash_password if self.executor_kind == "process" else self._hasher.hash
+        return await self._run("hash", self.parameters.memory_cost, func, password)
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        try:
+            memory_cost = extract_parameters(password).memory_cost
+        except InvalidHashError:
+            memory_cost = self.parameters.memory_cost
+        func = HashService.verify_password if self.executor_kind == "process" else self._verify
+        return await self._run("verify", memory_cost, func, password, hashed_password)
+
+    def check_needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Whether the hash is weaker than the pool's parameters, by memory cost first, then time
+        cost. Replicas that calibrated different costs only ever upgrade each other's hashes,
+        instead of rehashing the same passwords back and forth.
+        """
+        try:
+            stored = extract_parameters(hashed_password)
+        except InvalidHashError:
+            return True
+        if stored.type is not self._hasher.type or stored.version < ARGON2_VERSION:
+            return True
+        return (stored.memory_cost, stored.time_cost) < (self.parameters.memory_cost, self.parameters.time_cost)
+
+    async def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
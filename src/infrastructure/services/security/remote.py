@@ -0,0 +1,179 @@
+import asyncio
+import time
+from typing import (
+    Any,
+)
+import uuid
+
+from src.domain.auth import (
+    IAsyncPasswordEncoder,
+)
+from src.infrastructure.database.redis import (
+    RedisConnector,
+)
+from src.infrastructure.metrics import (
+    hashing as metrics,
+)
+
+from .pool import (
+    PooledHashService,
+)
+
+JOBS_STREAM: str = "password_hashing:jobs"
+WORKERS_GROUP: str = "password_hashing:workers"
+REPLIES_PREFIX: str = "password_hashing:replies"
+HEARTBEATS_KEY: str = "password_hashing:heartbeats"
+# A worker whose last heartbeat is older than this is considered gone
+WORKER_TIMEOUT: float = 10.0
+
+
+class RedisHashService(IAsyncPasswordEncoder):
+    """
+    Sends hashing jobs to dedicated worker processes through a Redis stream.
+
+    Jobs are added to ``JOBS_STREAM`` and consumed by the ``WORKERS_GROUP`` consumer group
+    (see ``worker.py``), so hashing capacity scales with the number of workers rather than
+    with API replicas. Each API process reads the results from its own reply stream and
+    matches them to the waiting calls by job id.
+
+    The ``fallback`` pool runs the job locally when no worker sent a heartbeat recently,
+    Redis fails, or the job is not answered within ``timeout`` seconds. Workers drop jobs
+    whose deadline has passed, so a timed out job is usually not hashed again; a job a
+    worker picked up just before its deadline still is, and its late reply is ignored.
+
+    Jobs carry the API's argon2 parameters, so workers hash exactly as the local pool would,
+    whatever their own configuration.
+
+    Passwords travel through Redis in clear text: Redis must only be reachable from the
+    service network. Workers delete every job as soon as it is handled, a job that falls
+    back is deleted by the API, and every new job trims the jobs whose deadline passed.
+
+    Examples:
+        >>> encoder = RedisHashService(redis_connector, fallback=PooledHashService())
+        >>> hashed_password = await encoder.hash_password("my_password")
+    """
+
+    def __init__(
+            self,
+            redis_connector: RedisConnector,
+            fallback: PooledHashService,
+            timeout: float = 2.0,
+    ) -> None:
+        self.protocol = redis_connector
+        self.fallback = fallback
+        self.parameters = fallback.parameters
+        self.timeout = timeout
+        self.reply_stream = f"{REPLIES_PREFIX}:{uuid.uuid4().hex}"
+        self._pending: dict[str, asyncio.Future[dict[str, str]]] = {}
+        self._listener: asyncio.Task[None] | None = None
+        self._workers_checked_at = 0.0
+        self._workers_alive = False
+
+    async def _listen(self) -> None:
+        # The reply stream belongs to this process only, so it is read from the start
+        last_id = "0-0"
+        while True:
+            try:
+                response = await self.protocol.execute(
+                    "xread", {self.reply_stream: last_id}, count=100, block=1000
+                )
+                for _, messages in response or []:
+                    for message_id, fields in messages:
+                        last_id = message_id
+                        future = self._pending.pop(fields.get("id", ""), None)
+                        if future is not None and not future.done():
+                            future.set_result(fields)
+                    await self.protocol.execute("xtrim", self.reply_stream, minid=last_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(1)
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def workers_alive(self) -> bool:
+        """Whether a worker sent a heartbeat recently, asked to Redis at most once a second"""
+        now = time.monotonic()
+        if now - self._workers_checked_at < 1:
+            return self._workers_alive
+        self._workers_checked_at = now
+        try:
+            alive = await self.protocol.execute("zcount", HEARTBEATS_KEY, time.time() - WORKER_TIMEOUT, "+inf")
+        except Exception:
+            alive = 0
+        self._workers_alive = alive > 0
+        return self._workers_alive
+
+    async def _submit(self, operation: str, **payload: str) -> dict[str, str] | None:
+        """Run a job on a worker, or return None when it has to run locally"""
+        if not await self.workers_alive():
+            metrics.REMOTE_FALLBACKS.labels("no_workers").inc()
+            return None
+        self._ensure_listener()
+        job_id = uuid.uuid4().hex
+        future: asyncio.Future[dict[str, str]] = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = future
+        now = time.time()
+        fields: dict[str, Any] = {
+            "id": job_id,
+            "operation": operation,
+            "reply_to": self.reply_stream,
+            "deadline": now + self.timeout,
+            **payload,
+        }
+        message_id = None
+        try:
+            # Stream ids are millisecond timestamps: the jobs trimmed are past their deadline
+            message_id = await self.protocol.execute(
+                "xadd", JOBS_STREAM, fields, minid=int((now - self.timeout) * 1000), approximate=False
+            )
+            reply = await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            metrics.REMOTE_FALLBACKS.labels("timeout").inc()
+            await self._discard(message_id)
+            return None
+        except Exception:
+            metrics.REMOTE_FALLBACKS.labels("redis_error").inc()
+            await self._discard(message_id)
+            return None
+        finally:
+            self._pending.pop(job_id, None)
+        if "error" in reply:
+            # Let the local pool raise the same exception the worker ran into
+            metrics.REMOTE_FALLBACKS.labels("worker_error").inc()
+            return None
+        return reply
+
+    async def _discard(self, message_id: str | None) -> None:
+        """Delete a job the API hashes itself, so that its password doesn't stay in Redis"""
+        if message_id is None:
+            return
+        try:
+            await self.protocol.execute("xdel", JOBS_STREAM, message_id)
+        except Exception:
+            pass
+
+    async def hash_password(self, password: str) -> str:
+        reply = await self._submit("hash", password=password, parameters=str(self.parameters))
+        if reply is None:
+            return await self.fallback.hash_password(password)
+        return reply["result"]
+
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        reply = await self._submit("verify", hash=password, password=hashed_password)
+        if reply is None:
+            return await self.fallback.verify_password(password=password, hashed_password=hashed_password)
+        return reply["result"] == "1"
+
+    def check_needs_rehash(self, hashed_password: str) -> bool:
+        return self.fallback.check_needs_rehash(hashed_password)
+
+    async def shutdown(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.protocol.execute("delete", self.reply_stream)
+        await self.fallback.shutdown()
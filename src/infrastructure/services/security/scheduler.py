@@ -0,0 +1,131 @@
+import asyncio
+import collections
+from contextlib import (
+    asynccontextmanager,
+)
+import math
+import time
+from typing import (
+    AsyncIterator,
+)
+
+from src.infrastructure.metrics import (
+    hashing as metrics,
+)
+from src.shared import (
+    ex,
+)
+
+
+class HashingScheduler:
+    """
+    Admission control for argon2 jobs, bounded by a total memory budget.
+
+    Every argon2 call allocates its whole ``memory_cost``, so the scheduler lets a job run
+    only while the memory of the jobs in flight stays within ``memory_budget`` (KiB) and
+    fewer than ``max_concurrency`` jobs run. Other jobs wait in FIFO order for at most
+    ``queue_timeout`` seconds; when ``max_queue`` jobs are already waiting, or the wait
+    times out, ``ex.HashingOverloaded`` is raised with a Retry-After estimate.
+
+    A job bigger than the whole budget is still admitted once nothing else is running.
+
+    Examples:
+        >>> scheduler = HashingScheduler(max_concurrency=4, memory_budget=4 * 65536)
+        >>> async with scheduler.admit(memory_cost=65536):
+        ...     ...
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            memory_budget: int | None = None,
+            max_queue: int = 100,
+            queue_timeout: float = 2.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.memory_budget = memory_budget
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._memory_in_flight = 0
+        self._waiters: collections.deque[tuple[int, asyncio.Future[None]]] = collections.deque()
+        # Exponentially weighted average of the job duration, used for Retry-After
+        self._average_duration = 0.1
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is expected to drain"""
+        return max(1, math.ceil(self._average_duration * (self.queued + 1) / self.max_concurrency))
+
+    def _can_run(self, memory_cost: int) -> bool:
+        if self._in_flight == 0:
+            return True
+        if self._in_flight >= self.max_concurrency:
+            return False
+        return self.memory_budget is None or self._memory_in_flight + memory_cost <= self.memory_budget
+
+    def _take(self, memory_cost: int) -> None:
+        self._in_flight += 1
+        self._memory_in_flight += memory_cost
+        metrics.IN_FLIGHT.set(self._in_flight)
+        metrics.IN_FLIGHT_MEMORY.set(self._memory_in_flight * 1024)
+
+    def _give_back(self, memory_cost: int) -> None:
+        self._in_flight -= 1
+        self._memory_in_flight -= memory_cost
+        metrics.IN_FLIGHT.set(self._in_flight)
+        metrics.IN_FLIGHT_MEMORY.set(self._memory_in_flight * 1024)
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        while self._waiters:
+            memory_cost, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._can_run(memory_cost):
+                break
+            self._waiters.popleft()
+            self._take(memory_cost)
+            future.set_result(None)
+
+    async def acquire(self, memory_cost: int) -> None:
+        if not self._waiters and self._can_run(memory_cost):
+            self._take(memory_cost)
+            return
+        if self.queued >= self.max_queue:
+            metrics.REJECTED.labels("queue_full").inc()
+            raise ex.HashingOverloaded(retry_after=self.retry_after())
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter = (memory_cost, future)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The job was admitted at the same moment it gave up waiting
+                self._give_back(memory_cost)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+                self._wake_up()
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.REJECTED.labels("deadline").inc()
+                raise ex.HashingOverloaded(retry_after=self.retry_after()) from e
+            raise
+
+    def release(self, memory_cost: int, duration: float) -> None:
+        self._average_duration = 0.8 * self._average_duration + 0.2 * duration
+        self._give_back(memory_cost)
+
+    @asynccontextmanager
+    async def admit(self, memory_cost: int) -> AsyncIterator[None]:
+        await self.acquire(memory_cost)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(memory_cost, time.perf_counter() - started_at)
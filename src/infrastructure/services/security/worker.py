@@ -0,0 +1,178 @@
+"""
+Password hashing worker for ``RedisHashService``.
+
+Run as many of these as hashing capacity requires, next to the API:
+
+    $ python -m src.infrastructure.services.security.worker
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+
+from redis.exceptions import (  # type: ignore
+    ResponseError,
+)
+
+from src.infrastructure.database.redis import (
+    RedisConnector,
+)
+from src.shared import (
+    load_config,
+)
+
+from .hash import (
+    HashParameters,
+)
+from .pool import (
+    PooledHashService,
+)
+from .remote import (
+    HEARTBEATS_KEY,
+    JOBS_STREAM,
+    WORKER_TIMEOUT,
+    WORKERS_GROUP,
+)
+
+logger = logging.getLogger(__name__)
+
+# Reply streams of API processes that went away expire after this long
+REPLY_STREAM_TTL_MS: int = 60000
+# Jobs left unacknowledged by a dead worker are reclaimed after this long
+CLAIM_IDLE_MS: int = 30000
+
+
+class HashingWorker:
+    """
+    Consumes hashing jobs from ``JOBS_STREAM`` as a member of ``WORKERS_GROUP``.
+
+    Up to ``encoder.max_workers`` jobs run at once on the local pool, hashing with the
+    parameters each job carries. Jobs past their deadline are dropped unanswered, since the
+    API hashes them itself by then; a job started before its deadline is answered even if
+    the API gave up on it meanwhile.
+    """
+
+    def __init__(
+            self,
+            redis_connector: RedisConnector,
+            encoder: PooledHashService,
+            name: str | None = None,
+    ) -> None:
+        self.protocol = redis_connector
+        self.encoder = encoder
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._slots = asyncio.Semaphore(encoder.max_workers)
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def _create_group(self) -> None:
+        try:
+            await self.protocol.execute("xgroup_create", JOBS_STREAM, WORKERS_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _handle(self, message_id: str, job: dict[str, str]) -> None:
+        try:
+            if float(job.get("deadline", 0)) < time.time():
+                return
+            reply = {"id": job["id"]}
+            try:
+                if job["operation"] == "hash":
+                    parameters = HashParameters.parse(job["parameters"]) if "parameters" in job else None
+                    reply["result"] = await self.encoder.hash_password(job["password"], parameters=parameters)
+                else:
+                    is_valid = await self.encoder.verify_password(
+                        password=job["hash"], hashed_password=job["password"]
+                    )
+                    reply["result"] = "1" if is_valid else "0"
+            except Exception as e:
+                reply["error"] = type(e).__name__
+            await self.protocol.execute("xadd", job["reply_to"], reply)
+            await self.protocol.execute("pexpire", job["reply_to"], REPLY_STREAM_TTL_MS)
+        finally:
+            await self.protocol.execute("xack", JOBS_STREAM, WORKERS_GROUP, message_id)
+            await self.protocol.execute("xdel", JOBS_STREAM, message_id)
+            self._slots.release()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            now = time.time()
+            await self.protocol.execute("zadd", HEARTBEATS_KEY, {self.name: now})
+            await self.protocol.execute("zremrangebyscore", HEARTBEATS_KEY, "-inf", now - 6 * WORKER_TIMEOUT)
+            await asyncio.sleep(WORKER_TIMEOUT / 4)
+
+    def _spawn(self, message_id: str, job: dict[str, str]) -> None:
+        task = asyncio.create_task(self._handle(message_id, job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _claim_stale(self) -> None:
+        _, messages, *_ = await self.protocol.execute(
+            "xautoclaim", JOBS_STREAM, WORKERS_GROUP, self.name, min_idle_time=CLAIM_IDLE_MS, count=100
+        )
+        for message_id, job in messages:
+            # Redis 6.2 still returns the pending jobs deleted meanwhile, without their id
+            if message_id is None:
+                continue
+            await self._slots.acquire()
+            self._spawn(message_id, job)
+
+    async def run(self) -> None:
+        await self._create_group()
+        self._tasks.add(asyncio.create_task(self._heartbeat()))
+        claimed_at = 0.0
+        logger.info("Hashing worker %s started with %d slots", self.name, self.encoder.max_workers)
+        while True:
+            if time.monotonic() - claimed_at > CLAIM_IDLE_MS / 1000:
+                claimed_at = time.monotonic()
+                await self._claim_stale()
+            await self._slots.acquire()
+            # A job is read only once a slot is free, so jobs stay available to idle workers
+            response = await self.protocol.execute(
+                "xreadgroup", WORKERS_GROUP, self.name, {JOBS_STREAM: ">"}, count=1, block=1000
+            )
+            messages = [message for _, stream in response or [] for message in stream]
+            if not messages:
+                self._slots.release()
+            for message_id, job in messages:
+                self._spawn(message_id, job)
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.protocol.execute("zrem", HEARTBEATS_KEY, self.name)
+        await self.protocol.execute("xgroup_delconsumer", JOBS_STREAM, WORKERS_GROUP, self.name)
+        await self.encoder.shutdown()
+
+
+async def main() -> None:
+    config = load_config()
+    # Jobs carry the API's calibrated parameters, these only serve jobs sent without them
+    encoder = PooledHashService(
+        executor=config.hashing.executor,
+        max_workers=config.hashing.max_workers,
+        parameters=HashParameters(
+            time_cost=config.hashing.time_cost,
+            memory_cost=config.hashing.memory_cost,
+            parallelism=config.hashing.parallelism,
+        ),
+    )
+    redis_connector = RedisConnector(
+        url=config.db.construct_redis_dsn(),
+        mode=config.db.redis_mode,
+        sentinels=config.db.redis_sentinels,
+        sentinel_master=config.db.redis_sentinel_master,
+    )
+    worker = HashingWorker(redis_connector, encoder)
+    try:
+        await worker.run()
+    finally:
+        await worker.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,4 +1,10 @@
 import asyncio
+from contextlib import (
+    asynccontextmanager,
+)
+from typing import (
+    AsyncIterator,
+)
 
 from fastapi import (
     FastAPI,
@@ -22,14 +28,24 @@ from src.shared import (
 logger = structlog.stdlib.get_logger()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    # Stops the hashing pool, and with Redis workers the reply listener
+    await app.container.password_encoder().shutdown()
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Que Account",
         version="0.1.0",
         summary="The service API which provides access to the account",
-        swagger_ui_parameters={"syntaxHighlight.theme": "obsidian"}
+        swagger_ui_parameters={"syntaxHighlight.theme": "obsidian"},
+        lifespan=lifespan,
     )
     container = Container()
+    # Resolve argon2 parameters now, so calibration never delays the first login.
+    container.password_encoder()
     app.container = container
     setup_routes(app)
     return app
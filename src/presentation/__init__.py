@@ -15,6 +15,7 @@ from starlette_exporter import (
 from .api import (
     auth_router,
     healthcheck_router,
+    jwks_router,
     role_router,
     user_router,
 )
@@ -40,6 +41,9 @@ def setup_routes(app: FastAPI) -> None:
     app.include_router(
         router=healthcheck_router, prefix=f"{prefix}/healthcheck", tags=["Healthcheck"],
     )
+    app.include_router(
+        router=jwks_router, tags=["Authorization"],
+    )
     app.add_route("/metrics", handle_metrics)
 
 
@@ -1,6 +1,7 @@
 from .controllers import (
     auth_router,
     healthcheck_router,
+    jwks_router,
     role_router,
     user_router,
 )
@@ -9,5 +10,6 @@ __all__ = (
     "user_router",
     "auth_router",
     "healthcheck_router",
+    "jwks_router",
     "role_router",
 )
@@ -4,6 +4,9 @@ from .auth import (
 from .healthcheck import (
     healthcheck_router,
 )
+from .jwks import (
+    jwks_router,
+)
 from .role import (
     role_router,
 )
@@ -16,4 +19,5 @@ __all__ = (
     "user_router",
     "role_router",
     "healthcheck_router",
+    "jwks_router",
 )
@@ -32,15 +32,23 @@ from src.infrastructure.services.security import (
 from src.presentation.api.exceptions import (
     InvalidSignatureError,
     PasswordIncorrectError,
+    ServiceOverloadedError,
+    SessionNotFoundError,
     UserAlreadyExistsError,
     UserNotFoundError,
 )
 from src.presentation.api.providers import (
     Container,
     get_current_user,
+    get_token_claims,
+    limit_login,
+    limit_signup,
+    limit_telegram_login,
     refresh_tokens,
-    revoke_tokens,
+    revoke_all_tokens,
+    track_tokens,
     verify_token_from_request,
+    verify_tokens,
 )
 from src.shared import (
     ex,
@@ -55,6 +63,8 @@ auth_router = APIRouter()
     response_model_exclude_none=True,
     status_code=status.HTTP_201_CREATED,
     summary="Register a new user",
+    dependencies=[Depends(limit_signup)],
+    responses={429: {"description": "Too many attempts, see the Retry-After header"}},
 )
 @inject
 async def signup(
@@ -65,6 +75,8 @@ async def signup(
         return await auth_service.signup(user_in=user_in)
     except ex.UserAlreadyExists:
         raise UserAlreadyExistsError()
+    except ex.HashingOverloaded as e:
+        raise ServiceOverloadedError(retry_after=e.retry_after)
 
 
 @auth_router.post(
@@ -73,11 +85,14 @@ async def signup(
     summary="Login in telegram",
     description="Login with telegram_id",
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(limit_telegram_login)],
+    responses={429: {"description": "Too many attempts, see the Retry-After header"}},
 )
 @inject
 async def signin_telegram(
         user_in: dto.UserTMELogin,
         auth_service: AuthService = Depends(Provide[Container.auth_service]),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
 ) -> dto.JWTokens | None:
     strategy = TelegramAuthStrategy()
     try:
@@ -86,6 +101,7 @@ async def signin_telegram(
         raise UserNotFoundError()
     except ex.InvalidSignature:
         raise InvalidSignatureError()
+    await track_tokens(blacklist_service, jwt_tokens.access_token, jwt_tokens.refresh_token)
     return jwt_tokens
 
 
@@ -95,6 +111,8 @@ async def signin_telegram(
     summary="Default login",
     description="Login with username and password",
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(limit_login)],
+    responses={429: {"description": "Too many attempts, see the Retry-After header"}},
 )
 @inject
 async def login(
@@ -102,10 +120,12 @@ async def login(
         request: Request,
         response: Response,
         auth_service: AuthService = Depends(Provide[Container.auth_service]),
+        strategy: DefaultAuthStrategy = Depends(Provide[Container.default_auth_strategy]),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
 ) -> dto.JWTokens | None:
-    strategy = DefaultAuthStrategy()
     try:
         jwt_tokens = await auth_service.signin(user_in=user_in, strategy=strategy, request=request)
+        await track_tokens(blacklist_service, jwt_tokens.access_token, jwt_tokens.refresh_token)
         JWTService.set_cookies(
             response=response,
             access_token=jwt_tokens.access_token,
@@ -115,6 +135,8 @@ async def login(
         raise UserNotFoundError()
     except ex.IncorrectPassword:
         raise PasswordIncorrectError()
+    except ex.HashingOverloaded as e:
+        raise ServiceOverloadedError(retry_after=e.retry_after)
     return jwt_tokens
 
 
@@ -147,20 +169,39 @@ async def verify_token(
     )
 
 
+@auth_router.post(
+    "/verify/batch/",
+    response_model=list[dto.TokenVerification],
+    response_model_exclude_none=True,
+    summary="Verification of many access tokens at once",
+    description="Results follow the order of the transmitted tokens",
+    status_code=status.HTTP_200_OK,
+)
+async def verify_token_batch(
+        batch_in: dto.BatchVerify,
+) -> list[dto.TokenVerification]:
+    return await verify_tokens(
+        tokens=batch_in.tokens,
+    )
+
+
 @auth_router.post(
     "/reset_password/",
     status_code=status.HTTP_200_OK,
 )
 @inject
 async def reset_password(
-        request: Request,
         password_in: dto.ResetPassword,
         current_user: Annotated[models.User, Depends(get_current_user)],
         auth_service: AuthService = Depends(Provide[Container.auth_service]),
         blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service])
 ) -> Response:
-    await revoke_tokens(request=request, blacklist_service=blacklist_service)
-    await auth_service.reset_password(pk=current_user.id, password_in=password_in)
+    try:
+        await auth_service.reset_password(pk=current_user.id, password_in=password_in)
+    except ex.HashingOverloaded as e:
+        raise ServiceOverloadedError(retry_after=e.retry_after)
+    # Every session of the user ends with the old password, this one included
+    await blacklist_service.revoke_user(user_id=current_user.id)
     return Response(status_code=status.HTTP_200_OK, content="Password was updating")
 
 
@@ -177,6 +218,51 @@ async def logout(
     )
 
 
+@auth_router.post(
+    "/logout/all/",
+    summary="Logout from every session of the user",
+    description="Revokes every token issued to the user, on any device",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout_all(
+        response: Response,
+        _: Annotated[int, Depends(revoke_all_tokens)],
+) -> None:
+    JWTService.unset_cookies(
+        response=response,
+    )
+
+
+@auth_router.get(
+    "/sessions/",
+    response_model=list[dto.Session],
+    summary="List the live tokens of the user",
+    status_code=status.HTTP_200_OK,
+)
+@inject
+async def get_sessions(
+        token_data: Annotated[dto.TokenData, Depends(get_token_claims)],
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
+) -> list[dto.Session]:
+    sessions = await blacklist_service.get_sessions(user_id=token_data.user_id)
+    return [dto.Session(jti=jti, expires_at=expires_at) for jti, expires_at in sessions]
+
+
+@auth_router.delete(
+    "/sessions/{jti}/",
+    summary="Revoke one live token of the user",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+@inject
+async def revoke_session(
+        jti: str,
+        token_data: Annotated[dto.TokenData, Depends(get_token_claims)],
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
+) -> None:
+    if not await blacklist_service.revoke_session(user_id=token_data.user_id, jti=jti):
+        raise SessionNotFoundError()
+
+
 @auth_router.post(
     "/send-otp-code/",
     summary="Send otp code",
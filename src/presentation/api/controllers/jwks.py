@@ -0,0 +1,47 @@
+import functools
+import hashlib
+import json
+
+from fastapi import (
+    APIRouter,
+    Request,
+    Response,
+    status,
+)
+
+from src.infrastructure.services.security import (
+    JWTService,
+)
+from src.shared import (
+    load_config,
+)
+
+jwks_router = APIRouter()
+
+
+@functools.cache
+def _jwks_document() -> tuple[bytes, dict[str, str]]:
+    """The serialized key set and its caching headers, built once per process"""
+    body = json.dumps(JWTService.get_jwks(), separators=(",", ":"), sort_keys=True).encode()
+    max_age = load_config().security.jwks_max_age_in_seconds
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age}, stale-if-error=86400",
+    }
+    return body, headers
+
+
+@jwks_router.get(
+    "/.well-known/jwks.json",
+    summary="Public keys to verify tokens locally",
+    status_code=status.HTTP_200_OK,
+    responses={304: {"description": "The cached key set is still current"}},
+)
+async def get_jwks(request: Request) -> Response:
+    body, headers = _jwks_document()
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+        if headers["ETag"] in etags or "*" in etags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -20,6 +20,9 @@ from src.application import (
 from src.application.services import (
     RoleService,
 )
+from src.domain.auth import (
+    Permission,
+)
 from src.infrastructure.database import (
     models,
 )
@@ -28,7 +31,7 @@ from src.presentation.api.exceptions import (
 )
 from src.presentation.api.providers import (
     Container,
-    require_role,
+    require_permission,
 )
 
 role_router = APIRouter()
@@ -38,7 +41,7 @@ role_router = APIRouter()
     "/",
     response_model=dto.RoleResponse,
     status_code=status.HTTP_201_CREATED,
-    dependencies=[Depends(require_role())],
+    dependencies=[Depends(require_permission(Permission.MANAGE_ROLES))],
 )
 @inject
 async def create_role(
@@ -76,7 +79,7 @@ async def get_role(
     "/{role_id}/",
     response_model=dto.RoleResponse,
     status_code=status.HTTP_200_OK,
-    dependencies=[Depends(require_role())],
+    dependencies=[Depends(require_permission(Permission.MANAGE_ROLES))],
 )
 @inject
 async def update_role(
@@ -90,7 +93,7 @@ async def update_role(
 @role_router.delete(
     "/{role_id}/",
     status_code=status.HTTP_204_NO_CONTENT,
-    dependencies=[Depends(require_role())],
+    dependencies=[Depends(require_permission(Permission.MANAGE_ROLES))],
 )
 @inject
 async def delete_role(
@@ -1,5 +1,6 @@
 from typing import (
     Annotated,
+    Final,
 )
 
 from dependency_injector.wiring import (
@@ -10,6 +11,8 @@ from fastapi import (
     APIRouter,
     Depends,
     Query,
+    Request,
+    Response,
     status,
 )
 
@@ -22,13 +25,28 @@ from src.application.services import (
 from src.infrastructure.database import (
     models,
 )
+from src.infrastructure.services.security import (
+    JWTService,
+)
+from src.infrastructure.services.security.hash import (
+    HashParameters,
+)
 from src.presentation.api.exceptions import (
+    InvalidCursorError,
     UserDeactivatedError,
 )
 from src.presentation.api.providers import (
     Container,
+    get_current_profile,
     get_current_user,
+    refresh_tokens,
+    require_role,
 )
+from src.shared import (
+    ex,
+)
+
+MAX_PAGE_SIZE: Final[int] = 100
 
 user_router = APIRouter()
 
@@ -36,16 +54,35 @@ user_router = APIRouter()
 @user_router.get(
     "/",
     summary="Getting all users",
-    response_model=list[dto.UserResponse],
+    response_model=dto.UserPage,
+    responses={422: {"description": "Invalid page cursor"}},
     status_code=status.HTTP_200_OK,
 )
 @inject
 async def get_list(
-        skip: int = Query(0, ge=0),
-        limit: int = Query(10, gt=0),
+        cursor: str | None = Query(None, description="The `next_cursor` of the previous page"),
+        limit: int = Query(10, gt=0, le=MAX_PAGE_SIZE),
+        user_service: UserService = Depends(Provide[Container.user_service]),
+) -> dto.UserPage:
+    try:
+        return await user_service.get_users(limit=limit, cursor=cursor)
+    except ex.InvalidCursor:
+        raise InvalidCursorError()
+
+
+@user_router.get(
+    "/password-parameters/",
+    summary="Count password hashes per argon2 parameter set",
+    response_model=list[dto.PasswordParameters],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(require_role())],
+)
+@inject
+async def get_password_parameters(
         user_service: UserService = Depends(Provide[Container.user_service]),
-) -> list[models.User]:
-    return await user_service.get_users(skip=skip, limit=limit)
+        hash_parameters: HashParameters = Depends(Provide[Container.hash_parameters]),
+) -> list[dto.PasswordParameters]:
+    return await user_service.get_password_parameters(current=str(hash_parameters))
 
 
 @user_router.get(
@@ -55,12 +92,9 @@ async def get_list(
     responses={400: {"description": "Your account is deactivated"}},
     status_code=status.HTTP_200_OK,
 )
-@inject
 async def get_user(
-        current_user: Annotated[models.User, Depends(get_current_user)],
-) -> models.User:
-    if not current_user.is_active:
-        raise UserDeactivatedError()
+        current_user: Annotated[models.User | dto.UserResponse, Depends(get_current_profile)],
+) -> models.User | dto.UserResponse:
     return current_user
 
 
@@ -72,13 +106,18 @@ async def get_user(
 )
 @inject
 async def update_user(
+        request: Request,
+        response: Response,
         user_in: dto.UserUpdate,
         current_user: Annotated[models.User, Depends(get_current_user)],
         user_service: UserService = Depends(Provide[Container.user_service]),
 ) -> models.User:
     if not current_user.is_active:
         raise UserDeactivatedError()
-    return await user_service.update_user(pk=current_user.id, user_in=user_in)
+    user = await user_service.update_user(pk=current_user.id, user_in=user_in)
+    # The profile claims of the current tokens are stale now
+    await refresh_tokens(request=request, response=response, user_service=user_service)
+    return user
 
 
 @user_router.post(
@@ -87,10 +126,13 @@ async def update_user(
 )
 @inject
 async def reactivate_user(
+        request: Request,
+        response: Response,
         current_user: Annotated[models.User, Depends(get_current_user)],
         user_service: UserService = Depends(Provide[Container.user_service]),
 ) -> None:
-    return await user_service.reactivate_user(user_id=current_user.id)
+    await user_service.reactivate_user(user_id=current_user.id)
+    await refresh_tokens(request=request, response=response, user_service=user_service)
 
 
 @user_router.delete(
@@ -100,7 +142,10 @@ async def reactivate_user(
 )
 @inject
 async def deactivate_user(
+        response: Response,
         current_user: Annotated[models.User, Depends(get_current_user)],
         user_service: UserService = Depends(Provide[Container.user_service]),
 ) -> None:
-    return await user_service.deactivate_user(user_id=current_user.id)
+    await user_service.deactivate_user(user_id=current_user.id)
+    # Every token of the user is revoked, log in again to reactivate the account
+    JWTService.unset_cookies(response=response)
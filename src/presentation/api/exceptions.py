@@ -116,6 +116,18 @@ class RoleNotFoundError(HTTPException):
         super().__init__(status_code=status_code, detail=detail)
 
 
+class SessionNotFoundError(HTTPException):
+    """Custom error when the user holds no live token with the given id"""
+
+    def __init__(
+            self,
+            status_code: int = status.HTTP_404_NOT_FOUND,
+            message: str = "Session is not exists",
+    ) -> None:
+        detail = {"code": ex.AuthExceptionCodes.TOKEN_NOT_FOUND, "message": message}
+        super().__init__(status_code=status_code, detail=detail)
+
+
 class CredentialsError(HTTPException):
     """Custom error when credentials are invalid or missing."""
 
@@ -138,3 +150,54 @@ class OldPasswordIncorrectError(HTTPException):
     ):
         detail = {"code": ex.AuthExceptionCodes.OLD_PASSWORD_INVALID, "message": message}
         super().__init__(status_code=status_code, detail=detail)
+
+
+class ServiceOverloadedError(HTTPException):
+    """Custom error when the service sheds load."""
+
+    def __init__(
+            self,
+            retry_after: int,
+            status_code: int = status.HTTP_503_SERVICE_UNAVAILABLE,
+            message: str = "Service is overloaded, try again later",
+    ) -> None:
+        detail = {"code": ex.AuthExceptionCodes.SERVICE_OVERLOADED, "message": message}
+        super().__init__(status_code=status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class TooManyTokensError(HTTPException):
+    """Custom error when a batch holds more tokens than allowed."""
+
+    def __init__(
+            self,
+            limit: int,
+            status_code: int = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message: str = "Too many tokens in one request",
+    ) -> None:
+        detail = {"code": ex.AuthExceptionCodes.TOO_MANY_TOKENS, "message": f"{message}, the limit is {limit}"}
+        super().__init__(status_code=status_code, detail=detail)
+
+
+class TooManyRequestsError(HTTPException):
+    """Custom error when a client exceeds a rate limit."""
+
+    def __init__(
+            self,
+            headers: dict[str, str],
+            status_code: int = status.HTTP_429_TOO_MANY_REQUESTS,
+            message: str = "Too many attempts, try again later",
+    ) -> None:
+        detail = {"code": ex.AuthExceptionCodes.RATE_LIMITED, "message": message}
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class InvalidCursorError(HTTPException):
+    """Custom error when a page cursor was not issued by the service."""
+
+    def __init__(
+            self,
+            status_code: int = status.HTTP_422_UNPROCESSABLE_ENTITY,
+            message: str = "Invalid page cursor",
+    ) -> None:
+        detail = {"code": ex.AuthExceptionCodes.INVALID_CURSOR, "message": message}
+        super().__init__(status_code=status_code, detail=detail)
@@ -1,10 +1,18 @@
 from .dependencies import (
+    get_current_profile,
     get_current_user,
+    get_token_claims,
+    limit_login,
+    limit_signup,
+    limit_telegram_login,
+    require_permission,
     require_role,
     refresh_tokens,
     verify_token_from_request,
+    verify_tokens,
+    revoke_all_tokens,
     revoke_tokens,
-
+    track_tokens,
 )
 from .di_containers import (
     Container,
@@ -13,8 +21,17 @@ from .di_containers import (
 __all__ = (
     "Container",
     "require_role",
+    "require_permission",
+    "get_token_claims",
+    "limit_login",
+    "limit_signup",
+    "limit_telegram_login",
     "get_current_user",
+    "get_current_profile",
     "refresh_tokens",
     "verify_token_from_request",
+    "verify_tokens",
+    "revoke_all_tokens",
     "revoke_tokens",
+    "track_tokens",
 )
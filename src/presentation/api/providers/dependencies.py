@@ -1,3 +1,10 @@
+import datetime
+import functools
+import hashlib
+import logging
+import math
+import operator
+import time
 from typing import (
     Any,
     Callable,
@@ -26,8 +33,19 @@ from src.application import (
 from src.application.services import (
     UserService,
 )
+from src.domain.auth import (
+    Permission,
+)
+from src.infrastructure.cache import (
+    TTLCache,
+)
+from src.infrastructure import (
+    metrics,
+)
 from src.infrastructure.database import (
     JTIRedisStorage,
+    RateLimit,
+    RedisRateLimiter,
     models,
 )
 from src.infrastructure.services.security import (
@@ -35,13 +53,27 @@ from src.infrastructure.services.security import (
 )
 from src.presentation.api.exceptions import (
     CredentialsError,
+    ServiceOverloadedError,
     TokenExpiredError,
+    TooManyRequestsError,
+    TooManyTokensError,
+    UserDeactivatedError,
 )
 from src.presentation.api.providers.di_containers import (
     Container,
 )
 from src.shared import (
     ex,
+    load_config,
+)
+
+logger = logging.getLogger(__name__)
+
+config = load_config().security
+
+# Verified tokens by digest, so a token sent on every request is verified once
+token_cache: TTLCache[bytes, dto.TokenData] = TTLCache(
+    maxsize=config.token_cache_size, name="verified_tokens"
 )
 
 
@@ -63,6 +95,10 @@ def _decode_token_from_request(
 ) -> dto.TokenData:
     if token is None and token_type is not None:
         token = _get_token_from_request(request=request, token_type=token_type)
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
     try:
         payload = JWTService.decode_token(token=token)
         user_id: int = int(payload.get("sub"))
@@ -71,38 +107,94 @@ def _decode_token_from_request(
             raise CredentialsError
         if user_id is None:
             raise CredentialsError
-        return dto.TokenData(
+        token_data = dto.TokenData(
             user_id=user_id,
-            jti=jti
+            jti=jti,
+            exp=payload.get("exp"),
+            iat=payload.get("iat"),
+            permissions=payload.get("perm"),
+            is_superuser=payload.get("su", False),
+            is_active=payload.get("act", True),
+            role_id=payload.get("rid"),
+            role_title=payload.get("rname"),
+            username=payload.get("name"),
+            language=payload.get("lang"),
+            telegram_id=payload.get("tg"),
+            created_at=payload.get("ctd"),
         )
+        if "exp" in payload:
+            token_cache.set(key, token_data, expires_at=payload["exp"])
+        return token_data
     except JWTError:
         raise CredentialsError
     except ex.JWTDecodeError:
         raise TokenExpiredError
 
 
+async def track_tokens(blacklist_service: JTIRedisStorage, *tokens: str) -> None:
+    """Index freshly issued tokens under their user, so that all of them can be revoked at once"""
+    claims = [JWTService.decode_token(token=token, verify=False) for token in tokens]
+    await blacklist_service.track(
+        user_id=int(claims[0]["sub"]),
+        tokens=[(claim["jti"], claim.get("exp")) for claim in claims],
+    )
+
+
+def _revocations_unavailable(error: ex.StorageUnavailable) -> ServiceOverloadedError:
+    return ServiceOverloadedError(
+        retry_after=error.retry_after, message="Token revocations cannot be checked, try again later"
+    )
+
+
+async def _is_revoked(blacklist_service: JTIRedisStorage, token_data: dto.TokenData) -> bool:
+    try:
+        return await blacklist_service.is_revoked(token_data)
+    except ex.StorageUnavailable as e:
+        raise _revocations_unavailable(e)
+
+
+def _needs_renewal(token_data: dto.TokenData) -> bool:
+    """Whether the access token is close enough to expiry to be replaced"""
+    if token_data.exp is None:
+        return True
+    return token_data.exp - time.time() <= config.renewal_window_in_seconds
+
+
 @inject
 async def _get_user_and_tokens(
         request: Request,
         response: Response,
         user_service: UserService = Depends(Provide[Container.user_service]),
         blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
-) -> tuple[models.User, str, str] | None:
+        force_renewal: bool = False,
+) -> tuple[models.User, str | None, str | None]:
+    """
+    Authenticate the request, issuing a new token pair only when the session must slide:
+    on ``force_renewal``, when the access token is missing, or when it expires within
+    ``renewal_window_in_seconds``. Otherwise, no token is returned and no cookie is set.
+    """
     try:
         token_data = _decode_token_from_request(request=request, token_type="access_token")
+        # Revoked claims are renewed from the refresh token, unless it is revoked as well
+        if await _is_revoked(blacklist_service, token_data):
+            raise CredentialsError
+        renew = force_renewal or _needs_renewal(token_data)
     except CredentialsError:
         token_data = _decode_token_from_request(request=request, token_type="refresh_token")
         if token_data is None:
             raise CredentialsError
+        if await _is_revoked(blacklist_service, token_data):
+            raise CredentialsError
+        renew = True
 
     user = await user_service.get_user_by_id(user_id=token_data.user_id)
     if user is None:
         raise CredentialsError
-    is_in_blacklist = await blacklist_service.is_in_blacklist(jti=token_data.jti)
-    if is_in_blacklist:
-        raise CredentialsError
-    access_token = JWTService.create_access_token(uid=str(user.id), fresh=False)
+    if not renew:
+        return user, None, None
+    access_token = JWTService.create_access_token(uid=str(user.id), fresh=False, data=user.token_claims())
     refresh_token = JWTService.create_refresh_token(uid=str(user.id))
+    await track_tokens(blacklist_service, access_token, refresh_token)
     JWTService.set_cookies(response=response, access_token=access_token, refresh_token=refresh_token)
 
     return user, access_token, refresh_token
@@ -125,7 +217,9 @@ async def refresh_tokens(
         response: Response,
         user_service: UserService = Depends(Provide[Container.user_service]),
 ) -> dto.JWTokens:
-    user, access_token, refresh_token = await _get_user_and_tokens(request, response, user_service)
+    user, access_token, refresh_token = await _get_user_and_tokens(
+        request, response, user_service, force_renewal=True
+    )
     return dto.JWTokens(access_token=access_token, refresh_token=refresh_token)
 
 
@@ -133,9 +227,12 @@ async def refresh_tokens(
 async def verify_token_from_request(
         request: Request,
         user_service: UserService = Depends(Provide[Container.user_service]),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
 ) -> bool:
     try:
         token_data = _decode_token_from_request(request=request, token_type="access_token")
+        if config.stateless:
+            return token_data.is_active and not await _is_revoked(blacklist_service, token_data)
         user = await user_service.get_user_by_id(user_id=token_data.user_id)
         if user is None:
             return False
@@ -144,20 +241,152 @@ async def verify_token_from_request(
         return False
 
 
+def _profile_from_claims(token_data: dto.TokenData) -> dto.UserResponse:
+    role = None
+    if token_data.role_id is not None:
+        role = dto.RoleResponse(
+            id=token_data.role_id, title=token_data.role_title or "", permissions=token_data.permissions or 0
+        )
+    created_at = datetime.datetime.fromtimestamp(token_data.created_at or time.time())
+    return dto.UserResponse(
+        id=token_data.user_id,
+        username=token_data.username,
+        language=token_data.language,
+        telegram_id=token_data.telegram_id,
+        role_id=token_data.role_id,
+        role=role,
+        days_since_created=(datetime.datetime.now() - created_at).days,
+    )
+
+
+@inject
+async def get_current_profile(
+        request: Request,
+        response: Response,
+        user_service: UserService = Depends(Provide[Container.user_service]),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
+) -> models.User | dto.UserResponse:
+    """
+    The profile of the authenticated active user. In stateless mode it is built from the
+    access token claims, unless the token predates them or is due for renewal.
+    """
+    if config.stateless:
+        try:
+            token_data = _decode_token_from_request(request=request, token_type="access_token")
+        except CredentialsError:
+            token_data = None
+        if token_data is not None and token_data.username is not None and not _needs_renewal(token_data):
+            if await _is_revoked(blacklist_service, token_data):
+                raise CredentialsError
+            if not token_data.is_active:
+                raise UserDeactivatedError
+            return _profile_from_claims(token_data)
+
+    user, _, _ = await _get_user_and_tokens(request, response, user_service, blacklist_service)
+    if not user.is_active:
+        raise UserDeactivatedError
+    return user
+
+
 @inject
-def require_role() -> Callable[[models.User], Coroutine[Any, Any, models.User]]:
-    async def check_user_roles(user: models.User = Depends(get_current_user)) -> models.User:
-        if user.is_superuser:
-            return user
+async def verify_tokens(
+        tokens: list[str],
+        user_service: UserService = Depends(Provide[Container.user_service]),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
+) -> list[dto.TokenVerification]:
+    """
+    Verify a batch of access tokens with one blacklist round trip and one user query,
+    whatever the number of tokens. Results keep the order of ``tokens``.
+    """
+    if len(tokens) > config.verify_batch_max_tokens:
+        raise TooManyTokensError(limit=config.verify_batch_max_tokens)
+
+    decoded: list[dto.TokenData | None] = []
+    for token in tokens:
+        try:
+            decoded.append(_decode_token_from_request(token=token))
+        except (CredentialsError, TokenExpiredError):
+            decoded.append(None)
+
+    verified = [token_data for token_data in decoded if token_data is not None]
+    try:
+        revoked = await blacklist_service.are_revoked(verified)
+    except ex.StorageUnavailable as e:
+        raise _revocations_unavailable(e)
+    revoked_jtis = {token_data.jti for token_data, is_revoked in zip(verified, revoked) if is_revoked}
+    users = await user_service.get_users_by_ids(
+        [token_data.user_id for token_data in verified if token_data.jti not in revoked_jtis]
+    )
+
+    results = []
+    for token_data in decoded:
+        if token_data is None:
+            results.append(dto.TokenVerification(valid=False, reason="invalid"))
+        elif token_data.jti in revoked_jtis:
+            results.append(dto.TokenVerification(valid=False, user_id=token_data.user_id, reason="revoked"))
+        elif token_data.user_id not in users:
+            results.append(dto.TokenVerification(valid=False, user_id=token_data.user_id, reason="user_not_found"))
         else:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You do not have permission to perform this operation",
-            )
+            results.append(dto.TokenVerification(valid=True, user_id=token_data.user_id))
+    return results
+
+
+@inject
+async def get_token_claims(
+        request: Request,
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service]),
+) -> dto.TokenData:
+    """
+    The verified access token claims, for authorization without loading the user. Tokens
+    issued before permission claims are refused, so that the client refreshes them.
+    """
+    token_data = _decode_token_from_request(request=request, token_type="access_token")
+    if token_data.permissions is None:
+        raise CredentialsError
+    if await _is_revoked(blacklist_service, token_data):
+        raise CredentialsError
+    if not token_data.is_active:
+        raise UserDeactivatedError
+    return token_data
+
+
+def _forbidden() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You do not have permission to perform this operation",
+    )
+
+
+def require_permission(*permissions: Permission) -> Callable[[dto.TokenData], Coroutine[Any, Any, dto.TokenData]]:
+    """Allow superusers and users whose role holds every one of ``permissions``"""
+    required = Permission(functools.reduce(operator.or_, permissions, Permission.NONE))
+
+    async def check_permissions(token_data: dto.TokenData = Depends(get_token_claims)) -> dto.TokenData:
+        if token_data.is_superuser or required in Permission(token_data.permissions):
+            return token_data
+        raise _forbidden()
+
+    return check_permissions
+
+
+def require_role() -> Callable[[dto.TokenData], Coroutine[Any, Any, dto.TokenData]]:
+    async def check_user_roles(token_data: dto.TokenData = Depends(get_token_claims)) -> dto.TokenData:
+        if token_data.is_superuser:
+            return token_data
+        else:
+            raise _forbidden()
 
     return check_user_roles
 
 
+@inject
+async def revoke_all_tokens(
+        token_data: dto.TokenData = Depends(get_token_claims),
+        blacklist_service: JTIRedisStorage = Depends(Provide[Container.blacklist_service])
+) -> int:
+    return await blacklist_service.revoke_all(user_id=token_data.user_id)
+
+
 @inject
 async def revoke_tokens(
         request: Request,
@@ -167,8 +396,76 @@ async def revoke_tokens(
     refresh_token = _get_token_from_request(request, "refresh_token")
     decode_access_token = JWTService.decode_token(token=access_token)
     decode_refresh_token = JWTService.decode_token(token=refresh_token)
-    access_jti = decode_access_token["jti"]
-    await blacklist_service.add(access_jti)
+    await blacklist_service.add_many([
+        (decode_access_token["jti"], decode_access_token.get("exp")),
+        (decode_refresh_token["jti"], decode_refresh_token.get("exp")),
+    ])
+
+
+def _rate_limit_headers(decision: RateLimit) -> dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset_after)),
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(decision.retry_after))
+    return headers
 
-    refresh_jti = decode_refresh_token["jti"]
-    await blacklist_service.add(refresh_jti)
+
+async def _rate_limit(
+        rate_limiter: RedisRateLimiter,
+        request: Request,
+        response: Response,
+        scope: str,
+        account: str | None,
+) -> None:
+    """
+    Count the request against the limits of its client address and of the account it targets,
+    rejecting it with ``429`` once either is exceeded. Without Redis, requests are not limited.
+    """
+    limits = {f"ip:{request.client.host if request.client else 'unknown'}": config.rate_limit_per_ip}
+    if account is not None:
+        limits[f"account:{account}"] = config.rate_limit_per_account
+    try:
+        decision = await rate_limiter.hit(scope, limits, period=config.rate_limit_period)
+    except ex.StorageUnavailable as e:
+        logger.warning("Rate limits unavailable, letting the request through: %s", e)
+        return
+    if not decision.limit:
+        return
+    headers = _rate_limit_headers(decision)
+    if not decision.allowed:
+        metrics.redis.RATE_LIMITED.labels(scope).inc()
+        raise TooManyRequestsError(headers=headers)
+    response.headers.update(headers)
+
+
+@inject
+async def limit_login(
+        request: Request,
+        response: Response,
+        user_in: dto.UserLogin,
+        rate_limiter: RedisRateLimiter = Depends(Provide[Container.rate_limiter]),
+) -> None:
+    await _rate_limit(rate_limiter, request, response, "login", account=user_in.username.lower())
+
+
+@inject
+async def limit_signup(
+        request: Request,
+        response: Response,
+        user_in: dto.UserRegistration,
+        rate_limiter: RedisRateLimiter = Depends(Provide[Container.rate_limiter]),
+) -> None:
+    await _rate_limit(rate_limiter, request, response, "signup", account=user_in.username.lower())
+
+
+@inject
+async def limit_telegram_login(
+        request: Request,
+        response: Response,
+        user_in: dto.UserTMELogin,
+        rate_limiter: RedisRateLimiter = Depends(Provide[Container.rate_limiter]),
+) -> None:
+    await _rate_limit(rate_limiter, request, response, "telegram_login", account=str(user_in.telegram_id))
@@ -10,17 +10,37 @@ from src.application.services import (
     UserService,
 )
 from src.infrastructure.database import (
+    CircuitBreaker,
     DBConnector,
     JTIRedisStorage,
     RedisConnector,
+    RedisRateLimiter,
+    RevocationFilter,
+    UserCache,
 )
 from src.infrastructure.database.repositories import (
     AuthRepository,
+    DefaultAuthStrategy,
     UserRepository,
 )
 from src.infrastructure.database.repositories.role import (
     RoleRepository,
 )
+from src.infrastructure.database.user_cache import (
+    USER_CACHE_NAMESPACE,
+)
+from src.infrastructure.services.security import (
+    PooledHashService,
+)
+from src.infrastructure.services.security.calibration import (
+    resolve_parameters,
+)
+from src.infrastructure.services.security.remote import (
+    RedisHashService,
+)
+from src.infrastructure.services.security.scheduler import (
+    HashingScheduler,
+)
 from src.shared import (
     load_config,
 )
@@ -39,29 +59,124 @@ class Container(containers.DeclarativeContainer):
     config = providers.Singleton(load_config)
     db = providers.Singleton(DBConnector, db_url=config().db.construct_sqlalchemy_url())
     session = db.provided.get_db_session
-    redis = providers.Singleton(RedisConnector, url=config().db.construct_redis_dsn())
+    redis = providers.Singleton(
+        RedisConnector,
+        url=config().db.construct_redis_dsn(),
+        mode=config().db.redis_mode,
+        sentinels=config().db.redis_sentinels,
+        sentinel_master=config().db.redis_sentinel_master,
+    )
+    # Revocation checks and rate limits run on every request, so they get their own connector that fails fast
+    revocations_redis = providers.Singleton(
+        RedisConnector,
+        url=config().db.construct_redis_dsn(),
+        cache_prefixes=config().db.redis_client_cache_prefixes,
+        cache_size=config().db.redis_client_cache_size,
+        breaker=providers.Singleton(
+            CircuitBreaker,
+            name="redis_revocations",
+            failure_threshold=config().db.redis_breaker_threshold,
+            reset_timeout=config().db.redis_breaker_reset_timeout,
+        ) if config().db.redis_breaker_threshold > 0 else None,
+        command_timeout=config().db.redis_command_timeout_ms / 1000,
+        max_deferred_writes=config().db.redis_max_deferred_writes,
+        mode=config().db.redis_mode,
+        sentinels=config().db.redis_sentinels,
+        sentinel_master=config().db.redis_sentinel_master,
+    )
+
+    # Users are read on nearly every request; their connector keeps a client cache of its own
+    users_redis = providers.Singleton(
+        RedisConnector,
+        url=config().db.construct_redis_dsn(),
+        cache_prefixes=(f"{USER_CACHE_NAMESPACE}:",),
+        cache_size=config().db.user_cache_size,
+        cache_name=USER_CACHE_NAMESPACE,
+        breaker=providers.Singleton(
+            CircuitBreaker,
+            name="redis_users",
+            failure_threshold=config().db.redis_breaker_threshold,
+            reset_timeout=config().db.redis_breaker_reset_timeout,
+        ) if config().db.redis_breaker_threshold > 0 else None,
+        command_timeout=config().db.redis_command_timeout_ms / 1000,
+        max_deferred_writes=config().db.redis_max_deferred_writes,
+        mode=config().db.redis_mode,
+        sentinels=config().db.redis_sentinels,
+        sentinel_master=config().db.redis_sentinel_master,
+    )
+    user_cache = providers.Singleton(
+        UserCache,
+        redis_connector=users_redis,
+        ttl=config().db.user_cache_ttl,
+    )
+
+    hash_parameters = providers.Singleton(resolve_parameters, config=config().hashing)
+    hashing_scheduler = providers.Singleton(
+        HashingScheduler,
+        max_concurrency=config().hashing.max_workers,
+        memory_budget=config().hashing.memory_budget,
+        max_queue=config().hashing.max_queue,
+        queue_timeout=config().hashing.queue_timeout_ms / 1000,
+    )
+    local_password_encoder = providers.Singleton(
+        PooledHashService,
+        executor=config().hashing.executor,
+        max_workers=config().hashing.max_workers,
+        parameters=hash_parameters,
+        scheduler=hashing_scheduler,
+    )
+    password_encoder = providers.Selector(
+        providers.Object(config().hashing.backend),
+        local=local_password_encoder,
+        redis=providers.Singleton(
+            RedisHashService,
+            redis_connector=redis,
+            fallback=local_password_encoder,
+            timeout=config().hashing.remote_timeout_ms / 1000,
+        ),
+    )
 
+    revocation_filter = providers.Singleton(
+        RevocationFilter,
+        redis_connector=revocations_redis,
+        capacity=config().security.revocation_filter_capacity,
+        error_rate=config().security.revocation_filter_error_rate,
+        default_ttl=config().security.refresh_expire_time_in_seconds,
+    )
     blacklist_service = providers.Factory(
         JTIRedisStorage,
-        redis_connector=redis,
+        redis_connector=revocations_redis,
+        default_ttl=config().security.refresh_expire_time_in_seconds,
+        revocation_filter=revocation_filter if config().security.revocation_filter_capacity > 0 else None,
+        degraded_policy=config().security.revocation_degraded_policy,
+    )
+
+    rate_limiter = providers.Singleton(
+        RedisRateLimiter,
+        redis_connector=revocations_redis,
     )
 
     user_repository = providers.Factory(
         UserRepository,
         session_factory=session,
+        cache=user_cache if config().db.user_cache_ttl > 0 else None,
     )
     user_service = providers.Factory(
         UserService,
         user_repository=user_repository,
+        blacklist_service=blacklist_service,
     )
 
     role_repository = providers.Factory(
         RoleRepository,
         session_factory=session,
+        user_cache=user_cache if config().db.user_cache_ttl > 0 else None,
     )
     role_service = providers.Factory(
         RoleService,
         role_repository=role_repository,
+        blacklist_service=blacklist_service,
+        revocation_ttl=config().security.access_expire_time_in_seconds,
     )
     notifier = providers.Factory(
         CompositeNotifier,
@@ -69,10 +184,18 @@ class Container(containers.DeclarativeContainer):
     auth_repository = providers.Factory(
         AuthRepository,
         session_factory=session,
+        password_encoder=password_encoder,
+        user_cache=user_cache if config().db.user_cache_ttl > 0 else None,
     )
     auth_service = providers.Factory(
         AuthService,
         auth_repository=auth_repository,
         role_service=role_service,
-        notifier=notifier
+        notifier=notifier,
+        password_encoder=password_encoder,
+    )
+    default_auth_strategy = providers.Factory(
+        DefaultAuthStrategy,
+        password_encoder=password_encoder,
+        user_cache=user_cache if config().db.user_cache_ttl > 0 else None,
     )
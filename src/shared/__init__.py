@@ -3,6 +3,7 @@ from . import (
 )
 from .settings import (
     Config,
+    Hashing,
     Security,
     load_config,
 )
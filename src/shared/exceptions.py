@@ -20,6 +20,11 @@ class AuthExceptionCodes:
     TOKEN_NOT_FOUND: int = 3007
     CREDENTIALS_INVALID: int = 3008
     OLD_PASSWORD_INVALID: int = 3009
+    SERVICE_OVERLOADED: int = 3010
+    TOO_MANY_TOKENS: int = 3011
+    STORAGE_UNAVAILABLE: int = 3012
+    RATE_LIMITED: int = 3013
+    INVALID_CURSOR: int = 3014
 
 
 @dataclass(eq=False)
@@ -112,6 +117,35 @@ class InvalidSignature(DomainException):
         return "Given signature is invalid"
 
 
+@dataclass(eq=False)
+class HashingOverloaded(DomainException):
+    status = 503
+    retry_after: int = 1
+
+    @property
+    def title(self) -> str:
+        return f"Too many password operations in progress, retry in {self.retry_after}s"
+
+
+@dataclass(eq=False)
+class StorageUnavailable(DomainException):
+    status = 503
+    retry_after: int = 1
+
+    @property
+    def title(self) -> str:
+        return f"Redis is unavailable, retry in {self.retry_after}s"
+
+
+@dataclass(eq=False)
+class InvalidCursor(DomainException):
+    status = 422
+
+    @property
+    def title(self) -> str:
+        return "Given page cursor is invalid"
+
+
 @dataclass(eq=False)
 class JWTDecodeError(Exception):
     status = 401
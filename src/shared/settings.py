@@ -1,7 +1,9 @@
 from dataclasses import (
     dataclass,
 )
+import os
 from typing import (
+    Any,
     Literal,
 )
 
@@ -31,6 +33,30 @@ class DbConfig:
         The name of the database.
     port : int
         The port where the database server is listening.
+    redis_mode : str
+        How Redis is deployed: 'standalone', 'cluster' (the Redis host is a startup node) or
+        'sentinel' (default is 'standalone').
+    redis_sentinels : tuple[str, ...]
+        The 'host:port' addresses of the sentinels, in sentinel mode.
+    redis_sentinel_master : str
+        The name of the master monitored by the sentinels (default is 'mymaster').
+    redis_client_cache_size : int
+        Redis values kept in process while Redis tracks their keys, 0 disables (default is 10000).
+    redis_client_cache_prefixes : tuple[str, ...]
+        The key prefixes whose values are cached in process.
+    redis_command_timeout_ms : int
+        How long a revocation command may wait for Redis, in milliseconds (default is 250).
+    redis_breaker_threshold : int
+        Consecutive Redis failures that open the circuit breaker, 0 disables it (default is 5).
+    redis_breaker_reset_timeout : float
+        How long the open circuit refuses calls before a probe, in seconds (default is 5).
+    redis_max_deferred_writes : int
+        Revocation writes kept while Redis is unavailable, replayed once it recovers (default is 10000).
+    user_cache_ttl : int
+        How long users read from the database stay cached in Redis, in seconds, 0 disables the
+        user cache (default is 300).
+    user_cache_size : int
+        Cached users also kept in process while Redis tracks them, 0 disables (default is 10000).
     """
 
     host: str
@@ -43,6 +69,17 @@ class DbConfig:
     redis_database: str
     redis_port: int
     redis_password: str | None = None
+    redis_mode: Literal["standalone", "cluster", "sentinel"] = "standalone"
+    redis_sentinels: tuple[str, ...] = ()
+    redis_sentinel_master: str = "mymaster"
+    redis_client_cache_size: int = 10000
+    redis_client_cache_prefixes: tuple[str, ...] = ("jwt_blacklist:", "role_revocations:", "user_revocations:")
+    redis_command_timeout_ms: int = 250
+    redis_breaker_threshold: int = 5
+    redis_breaker_reset_timeout: float = 5
+    redis_max_deferred_writes: int = 10000
+    user_cache_ttl: int = 300
+    user_cache_size: int = 10000
 
     def construct_sqlalchemy_url(
             self,
@@ -103,6 +140,19 @@ class DbConfig:
         redis_host = env.str("REDIS_HOST")
         redis_port = env.int("REDIS_PORT")
         redis_database = env.str("REDIS_DB")
+        redis_mode = env.str("REDIS_MODE", "standalone")
+        redis_sentinels = env.str("REDIS_SENTINELS", "").split(",")
+        redis_sentinel_master = env.str("REDIS_SENTINEL_MASTER", "mymaster")
+        redis_client_cache_size = env.int("REDIS_CLIENT_CACHE_SIZE", 10000)
+        redis_client_cache_prefixes = env.str(
+            "REDIS_CLIENT_CACHE_PREFIXES", "jwt_blacklist:,role_revocations:,user_revocations:"
+        ).split(",")
+        redis_command_timeout_ms = env.int("REDIS_COMMAND_TIMEOUT_MS", 250)
+        redis_breaker_threshold = env.int("REDIS_BREAKER_THRESHOLD", 5)
+        redis_breaker_reset_timeout = env.float("REDIS_BREAKER_RESET_TIMEOUT", 5)
+        redis_max_deferred_writes = env.int("REDIS_MAX_DEFERRED_WRITES", 10000)
+        user_cache_ttl = env.int("USER_CACHE_TTL", 300)
+        user_cache_size = env.int("USER_CACHE_SIZE", 10000)
         return DbConfig(
             host=host,
             password=password,
@@ -111,7 +161,18 @@ class DbConfig:
             port=port,
             redis_host=redis_host,
             redis_port=redis_port,
-            redis_database=redis_database
+            redis_database=redis_database,
+            redis_mode=redis_mode,
+            redis_sentinels=tuple(sentinel for sentinel in redis_sentinels if sentinel),
+            redis_sentinel_master=redis_sentinel_master,
+            redis_client_cache_size=redis_client_cache_size,
+            redis_client_cache_prefixes=tuple(prefix for prefix in redis_client_cache_prefixes if prefix),
+            redis_command_timeout_ms=redis_command_timeout_ms,
+            redis_breaker_threshold=redis_breaker_threshold,
+            redis_breaker_reset_timeout=redis_breaker_reset_timeout,
+            redis_max_deferred_writes=redis_max_deferred_writes,
+            user_cache_ttl=user_cache_ttl,
+            user_cache_size=user_cache_size,
         )
 
 
@@ -123,12 +184,23 @@ class Security:
      such as JWT keys, token expiration times, and cookie settings.
     Attributes
     ----------
-    secret_key : str
-        The secret key used to sign JWT tokens.
+    secret_key : str | None
+        The secret key used to sign JWT tokens with HMAC algorithms, required only with those.
     signature_secret_key : str
         The ...
     algorithm : str
-        The algorithm used for signing and verifying JWT tokens.
+        The algorithm used for signing and verifying JWT tokens: HS256/384/512, RS256/384/512,
+        ES256/384/512 or EdDSA.
+    private_key_file : str | None
+        The path of the PEM private key used to sign JWT tokens with asymmetric algorithms.
+    key_id : str | None
+        The 'kid' of the signing key (default is derived from the key).
+    previous_keys : tuple[dict[str, Any], ...]
+        Keys that only verify tokens, kept during a rotation. Each one has an 'alg', a 'key'
+        (HMAC secret) or 'key_file' (PEM path), an optional 'kid', and 'legacy: true' on the
+        key that verifies tokens issued without a 'kid'.
+    jwks_max_age_in_seconds : int
+        How long clients may cache the published public keys (default is 300).
     access_expire_time_in_seconds : int
         The lifetime of access tokens in seconds.
     refresh_expire_time_in_seconds : int
@@ -141,8 +213,34 @@ class Security:
         Flag indicating whether access token cookies should only be sent over secure connections (HTTPS).
     sessions_cookie_name : str
         The name of the cookie used for storing access tokens.
+    token_cache_size : int
+        The number of verified tokens kept in memory, 0 disables the cache (default is 10000).
+    renewal_window_in_seconds : int
+        How close to expiry an access token must be to get a new token pair on an authenticated
+        request (default is 3600). A window as long as the access token lifetime renews on every request.
+    verify_batch_max_tokens : int
+        The largest number of tokens accepted by one batch verification request (default is 100).
+    stateless : bool
+        Whether token verification and the current user profile are served from token claims
+        and a revocation check only, without reading the database (default is False).
+    revocation_filter_capacity : int
+        The number of revoked tokens the in-process revocation filter is sized for, 0 disables
+        the filter (default is 100000).
+    revocation_filter_error_rate : float
+        The share of unrevoked tokens the filter sends to Redis at capacity (default is 0.001).
+    revocation_degraded_policy : str
+        How tokens are checked while Redis is unavailable: 'closed' refuses them, 'open' accepts
+        those the in-process revocation filter does not hold (default is 'closed'). Read case
+        insensitively, any other value is refused at startup.
+    rate_limit_period : int
+        The period of the login, signup and Telegram login rate limits, in seconds (default is 60).
+    rate_limit_per_ip : int
+        Requests a client address may send to each of those endpoints per period, 0 disables the
+        limit (default is 20).
+    rate_limit_per_account : int
+        Attempts per period on one username or Telegram account, 0 disables the limit (default is 5).
     """
-    secret_key: str
+    secret_key: str | None
     signature_secret_key: str
     algorithm: str
     access_token_cookie_httponly: bool
@@ -151,16 +249,52 @@ class Security:
     access_token_cookie_samesite: Literal["lax", "strict", "none"] = "lax"
     access_expire_time_in_seconds: int = 60 * 60 * 24
     refresh_expire_time_in_seconds: int = 60 * 60 * 24 * 30
+    token_cache_size: int = 10000
+    renewal_window_in_seconds: int = 60 * 60
+    private_key_file: str | None = None
+    jwks_max_age_in_seconds: int = 300
+    key_id: str | None = None
+    previous_keys: tuple[dict[str, Any], ...] = ()
+    verify_batch_max_tokens: int = 100
+    stateless: bool = False
+    revocation_filter_capacity: int = 100000
+    revocation_filter_error_rate: float = 0.001
+    revocation_degraded_policy: Literal["open", "closed"] = "closed"
+    rate_limit_period: int = 60
+    rate_limit_per_ip: int = 20
+    rate_limit_per_account: int = 5
 
     @staticmethod
     def from_env(env: Env) -> "Security":
-        secret_key = env.str("SECRET_JWT_KEY")
-        signature_secret_key = env.str("SIGNATURE_SECRET_KEY")
         algorithm = env.str("ALGORITHM")
+        # Asymmetric algorithms sign with PRIVATE_JWT_KEY_FILE, only HMAC needs the secret
+        if algorithm.upper().startswith("HS"):
+            secret_key = env.str("SECRET_JWT_KEY")
+        else:
+            secret_key = env.str("SECRET_JWT_KEY", None)
+        signature_secret_key = env.str("SIGNATURE_SECRET_KEY")
         access_token_cookie_samesite = env.str("ACCESS_TOKEN_COOKIE_SAMESITE")
         access_token_cookie_httponly = env.bool("ACCESS_TOKEN_COOKIE_HTTPONLY")
         access_token_cookie_secure = env.bool("ACCESS_TOKEN_SECURE")
         sessions_cookie_name = env.str("SESSION_COOKIE_NAME")
+        token_cache_size = env.int("TOKEN_CACHE_SIZE", 10000)
+        renewal_window_in_seconds = env.int("TOKEN_RENEWAL_WINDOW", 60 * 60)
+        private_key_file = env.str("PRIVATE_JWT_KEY_FILE", None)
+        jwks_max_age_in_seconds = env.int("JWKS_MAX_AGE", 300)
+        key_id = env.str("JWT_KEY_ID", None)
+        previous_keys = tuple(env.json("PREVIOUS_JWT_KEYS", "[]"))
+        verify_batch_max_tokens = env.int("VERIFY_BATCH_MAX_TOKENS", 100)
+        stateless = env.bool("AUTH_STATELESS", False)
+        revocation_filter_capacity = env.int("REVOCATION_FILTER_CAPACITY", 100000)
+        revocation_filter_error_rate = env.float("REVOCATION_FILTER_ERROR_RATE", 0.001)
+        revocation_degraded_policy = env.str("REVOCATION_DEGRADED_POLICY", "closed").lower()
+        if revocation_degraded_policy not in ("open", "closed"):
+            raise ValueError(
+                f"REVOCATION_DEGRADED_POLICY must be 'open' or 'closed', not {revocation_degraded_policy!r}"
+            )
+        rate_limit_period = env.int("RATE_LIMIT_PERIOD", 60)
+        rate_limit_per_ip = env.int("RATE_LIMIT_PER_IP", 20)
+        rate_limit_per_account = env.int("RATE_LIMIT_PER_ACCOUNT", 5)
 
         return Security(
             secret_key=secret_key,
@@ -170,6 +304,85 @@ class Security:
             access_token_cookie_secure=access_token_cookie_secure,
             sessions_cookie_name=sessions_cookie_name,
             signature_secret_key=signature_secret_key,
+            token_cache_size=token_cache_size,
+            renewal_window_in_seconds=renewal_window_in_seconds,
+            private_key_file=private_key_file,
+            jwks_max_age_in_seconds=jwks_max_age_in_seconds,
+            key_id=key_id,
+            previous_keys=previous_keys,
+            verify_batch_max_tokens=verify_batch_max_tokens,
+            stateless=stateless,
+            revocation_filter_capacity=revocation_filter_capacity,
+            revocation_filter_error_rate=revocation_filter_error_rate,
+            revocation_degraded_policy=revocation_degraded_policy,
+            rate_limit_period=rate_limit_period,
+            rate_limit_per_ip=rate_limit_per_ip,
+            rate_limit_per_account=rate_limit_per_account,
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class Hashing:
+    """
+    Password hashing configuration class.
+
+    This class holds the settings of the pool that runs argon2 off the event loop.
+
+    Attributes
+    ----------
+    executor : str
+        The kind of pool used for hashing: 'thread' or 'process' (default is 'thread').
+    max_workers : int | None
+        The number of hashing workers (default is the number of CPUs).
+    time_cost : int
+        The argon2 number of iterations.
+    memory_cost : int
+        The argon2 memory usage in kibibytes. With calibration, the upper bound for it.
+    parallelism : int
+        The argon2 number of parallel threads.
+    calibrate : bool
+        Flag indicating whether the costs are measured on startup instead of taken as is.
+    target_verify_ms : int
+        The verify latency the calibration aims for, in milliseconds.
+    memory_budget : int | None
+        The total argon2 memory in kibibytes that running jobs may hold (default is unbounded).
+    max_queue : int
+        The number of jobs allowed to wait for admission before new ones are rejected.
+    queue_timeout_ms : int
+        How long a job may wait for admission, in milliseconds.
+    backend : str
+        Where jobs run: 'local' pool or 'redis' workers (default is 'local').
+    remote_timeout_ms : int
+        How long a job may wait for a Redis worker before it runs locally, in milliseconds.
+    """
+    executor: Literal["thread", "process"] = "thread"
+    max_workers: int | None = None
+    time_cost: int = 3
+    memory_cost: int = 65536
+    parallelism: int = 4
+    calibrate: bool = False
+    target_verify_ms: int = 100
+    memory_budget: int | None = None
+    max_queue: int = 100
+    queue_timeout_ms: int = 2000
+    backend: Literal["local", "redis"] = "local"
+    remote_timeout_ms: int = 2000
+
+    @staticmethod
+    def from_env(env: Env) -> "Hashing":
+        return Hashing(
+            executor=env.str("HASHING_EXECUTOR", "thread"),
+            max_workers=env.int("HASHING_MAX_WORKERS", os.cpu_count() or 1),
+            time_cost=env.int("HASHING_TIME_COST", 3),
+            memory_cost=env.int("HASHING_MEMORY_COST", 65536),
+            parallelism=env.int("HASHING_PARALLELISM", 4),
+            calibrate=env.bool("HASHING_CALIBRATE", False),
+            target_verify_ms=env.int("HASHING_TARGET_VERIFY_MS", 100),
+            memory_budget=env.int("HASHING_MEMORY_BUDGET", None),
+            max_queue=env.int("HASHING_MAX_QUEUE", 100),
+            queue_timeout_ms=env.int("HASHING_QUEUE_TIMEOUT_MS", 2000),
+            backend=env.str("HASHING_BACKEND", "local"),
+            remote_timeout_ms=env.int("HASHING_REMOTE_TIMEOUT_MS", 2000),
         )
 
 
@@ -235,10 +448,13 @@ class Config:
         Holds the settings specific to the database (default is None).
     security: Optional[Security]
         Holds the settings specific to the jwt
+    hashing: Hashing
+        Holds the settings specific to the password hashing pool
     """
 
     db: DbConfig
     security: Security
+    hashing: Hashing
     settings: Settings
     misc: Miscellaneous
 
@@ -257,6 +473,7 @@ def load_config(path: str = None) -> Config:
     return Config(
         db=DbConfig.from_env(env),
         security=Security.from_env(env),
+        hashing=Hashing.from_env(env),
         settings=Settings.from_env(env),
         misc=Miscellaneous.from_env(env),
     )
@@ -1,3 +1,4 @@
+import asyncio
 import time
 from typing import (
     Any,
@@ -7,6 +8,11 @@ from httpx import (
     AsyncClient,
 )
 import pytest
+from sqlalchemy import (
+    delete,
+    func,
+    select,
+)
 from starlette import (
     status,
 )
@@ -15,9 +21,15 @@ from src.application import (
     dto,
     services,
 )
+from src.infrastructure.database import (
+    models,
+)
 from src.shared import (
     ex,
 )
+from tests.integration.conftest import (
+    async_session_maker,
+)
 from tests.misc import (
     fake,
 )
@@ -122,6 +134,47 @@ async def test_signup_telegram(
     assert response.status_code == expected_status
 
 
+@pytest.mark.asyncio
+async def test_concurrent_signups_with_one_username(ac: Any) -> None:
+    body = {"username": fake.username(), "password": fake.password(length=9)}
+
+    responses = await asyncio.gather(*(ac.post(url="/api/v1/auth/signup/", json=body) for _ in range(5)))
+
+    assert sorted(response.status_code for response in responses) == [
+        status.HTTP_201_CREATED, *[status.HTTP_409_CONFLICT] * 4
+    ]
+
+
+@pytest.mark.asyncio
+async def test_signup_with_a_taken_telegram_id(ac: Any) -> None:
+    telegram_id = fake.telegram_id()
+    body = {"password": fake.password(length=9), "telegram_id": telegram_id}
+
+    first = await ac.post(url="/api/v1/auth/signup/", json={"username": fake.username(), **body})
+    second = await ac.post(url="/api/v1/auth/signup/", json={"username": fake.username(), **body})
+
+    assert first.status_code == status.HTTP_201_CREATED
+    assert second.status_code == status.HTTP_409_CONFLICT
+
+
+@pytest.mark.asyncio
+async def test_signup_behind_the_id_sequence(ac: Any) -> None:
+    async with async_session_maker() as session:
+        next_id = (await session.execute(select(func.nextval(func.pg_get_serial_sequence("users", "id"))))).scalar()
+        # An id inserted explicitly, as fixtures and imports do, leaves the sequence behind it
+        session.add(models.User(id=next_id + 1, username="explicit_id_user"))
+        await session.commit()
+
+    response = await ac.post(
+        url="/api/v1/auth/signup/", json={"username": fake.username(), "password": fake.password(length=9)}
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    async with async_session_maker() as session:
+        await session.execute(delete(models.User).where(models.User.username == "explicit_id_user"))
+        await session.commit()
+
+
 async def create_test_user(ac, body: dict[str, Any]):
     response = await ac.post("/api/v1/auth/signup/", json=body)
     assert response.status_code == status.HTTP_201_CREATED
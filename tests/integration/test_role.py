@@ -1,12 +1,37 @@
+import asyncio
 from typing import (
     Final,
 )
 
 import pytest
+from sqlalchemy import (
+    delete,
+    func,
+    select,
+)
+from sqlalchemy.exc import (
+    IntegrityError,
+)
 from starlette import (
     status,
 )
 
+from src.application import (
+    dto,
+)
+from src.application.persistence.base import (
+    violated_constraint,
+)
+from src.infrastructure.database import (
+    models,
+)
+from src.infrastructure.database.repositories import (
+    RoleRepository,
+)
+from tests.integration.conftest import (
+    async_session_maker,
+)
+
 URL_PATH: Final[str] = "/api/v1/roles"
 
 
@@ -87,3 +112,61 @@ async def test_delete_role(ac, data_roles, admin_token):
     assert response.status_code == status.HTTP_204_NO_CONTENT
     get_response = await ac.get(f"{URL_PATH}/single/")
     assert get_response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_concurrent_creates_get_free_ids_behind_the_sequence(data_roles):
+    repository = RoleRepository(session_factory=async_session_maker)
+    async with async_session_maker() as session:
+        next_id = (await session.execute(select(func.nextval(func.pg_get_serial_sequence("roles", "id"))))).scalar()
+        # Ids inserted explicitly, as fixtures and imports do, leave the sequence behind them
+        session.add_all([models.Role(id=next_id + i, title=f"Explicit{i}") for i in range(1, 21)])
+        await session.commit()
+
+    roles = await asyncio.wait_for(
+        asyncio.gather(*(repository.create(dto.RoleCreate(title=f"Concurrent{i}")) for i in range(50))),
+        timeout=5,
+    )
+
+    assert len({role.id for role in roles}) == 50
+    assert min(role.id for role in roles) > next_id
+    async with async_session_maker() as session:
+        await session.execute(delete(models.Role).where(models.Role.title.startswith("Explicit")))
+        await session.execute(delete(models.Role).where(models.Role.title.startswith("Concurrent")))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_create_on_a_taken_id_resyncs_the_sequence(data_roles):
+    repository = RoleRepository(session_factory=async_session_maker)
+    sequence = func.pg_get_serial_sequence("roles", "id")
+    async with async_session_maker() as session:
+        next_id = (await session.execute(select(func.nextval(sequence)))).scalar()
+        # The id the sequence hands out next is taken
+        session.add(models.Role(id=next_id + 1, title="Collision"))
+        await session.commit()
+
+    role = await repository.create(dto.RoleCreate(title="Resynced"))
+
+    assert role.id > next_id + 1
+    async with async_session_maker() as session:
+        # Inserts that follow no longer collide
+        assert (await session.execute(select(func.nextval(sequence)))).scalar() > role.id
+        await session.execute(delete(models.Role).where(models.Role.title.in_(["Collision", "Resynced"])))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_other_integrity_errors_leave_the_sequence_alone(data_roles):
+    repository = RoleRepository(session_factory=async_session_maker)
+    sequence = func.pg_get_serial_sequence("roles", "id")
+    async with async_session_maker() as session:
+        before = (await session.execute(select(func.nextval(sequence)))).scalar()
+
+    with pytest.raises(IntegrityError) as exc_info:
+        await repository.create(dto.RoleCreate(title=data_roles[0].title))
+
+    assert violated_constraint(exc_info.value) == "roles_title_key"
+    async with async_session_maker() as session:
+        # Only the failed insert drew an id
+        assert (await session.execute(select(func.nextval(sequence)))).scalar() == before + 2
@@ -36,6 +36,28 @@ async def test_get_users(ac, users):
     assert response.status_code == status.HTTP_200_OK
 
 
+@pytest.mark.asyncio
+async def test_get_users_by_pages(ac, users):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"cursor": cursor} if cursor is not None else {})}
+        response = await ac.get(f"{URL_PATH}/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        ids.extend(user["id"] for user in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == sorted(set(ids))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [{"cursor": "not a cursor"}, {"limit": 101}])
+async def test_get_users_invalid_page(ac, users, params):
+    response = await ac.get(f"{URL_PATH}/", params=params)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 @pytest.mark.asyncio
 async def test_get_user(ac, users, active_user):
     get_user_response = await ac.get(f"{URL_PATH}/me/", headers=active_user)
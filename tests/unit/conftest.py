@@ -20,4 +20,4 @@ def mock_user_repository():
 
 @pytest.fixture()
 def user_service(mock_user_repository):
-    return UserService(user_repository=mock_user_repository)
+    return UserService(user_repository=mock_user_repository, blacklist_service=AsyncMock())
@@ -0,0 +1,290 @@
+from contextlib import (
+    asynccontextmanager,
+)
+import time
+from unittest.mock import (
+    AsyncMock,
+    MagicMock,
+    patch,
+)
+
+import pytest
+
+from src.application import (
+    dto,
+)
+from src.infrastructure.database import (
+    JTIRedisStorage,
+    RedisConnector,
+    RevocationFilter,
+)
+from src.infrastructure.database.redis import (
+    Batch,
+)
+
+
+class FakePipeline(MagicMock):
+    """Records the commands of a batch, whose replies are all 1"""
+
+    async def execute(self) -> list[int]:
+        return [1] * len(self.method_calls)
+
+
+def _redis_connector() -> tuple[AsyncMock, FakePipeline]:
+    redis_connector = AsyncMock()
+    pipeline = FakePipeline()
+
+    @asynccontextmanager
+    async def batch(transaction: bool = False, deferrable: bool = False):
+        commands = Batch(pipeline)
+        yield commands
+        commands.results = await pipeline.execute()
+
+    redis_connector.batch = batch
+    return redis_connector, pipeline
+
+
+@pytest.mark.asyncio
+class TestBlacklistExpiry:
+
+    async def test_entry_lives_until_token_expiry(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector, default_ttl=3600)
+
+        await storage.add("jti", exp=time.time() + 60)
+
+        key, _ = pipeline.set.call_args.args
+        assert key == "jwt_blacklist:jti"
+        assert pipeline.set.call_args.kwargs["ex"] in (60, 61)
+
+    async def test_unknown_expiry_uses_default_ttl(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector, default_ttl=3600)
+
+        await storage.add("jti")
+
+        pipeline.set.assert_called_once_with("jwt_blacklist:jti", 1, ex=3600)
+
+    async def test_expired_token_is_not_stored(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector)
+
+        await storage.add("jti", exp=time.time() - 1)
+
+        assert not pipeline.method_calls
+
+    async def test_many_tokens_are_revoked_in_one_batch(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector)
+
+        await storage.add_many([("access", time.time() + 60), ("refresh", time.time() + 600)])
+
+        assert [call.args[0] for call in pipeline.set.call_args_list] == [
+            "jwt_blacklist:access", "jwt_blacklist:refresh",
+        ]
+        redis_connector.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch.object(RevocationFilter, "start")
+class TestRevocationFilter:
+
+    @pytest.fixture
+    def storage(self):
+        redis_connector = AsyncMock()
+        revocation_filter = RevocationFilter(redis_connector, capacity=1000, error_rate=0.001)
+        return JTIRedisStorage(redis_connector, revocation_filter=revocation_filter)
+
+    async def test_unloaded_filter_asks_redis(self, _, storage):
+        storage.protocol.execute.return_value = 0
+
+        assert await storage.is_in_blacklist("jti") is False
+        storage.protocol.execute.assert_awaited_once()
+
+    async def test_filter_miss_skips_redis(self, _, storage):
+        storage.revocation_filter.loaded = True
+
+        assert await storage.is_in_blacklist("jti") is False
+        assert await storage.are_in_blacklist(["jti", "other"]) == [False, False]
+        storage.protocol.execute.assert_not_awaited()
+        storage.protocol.get_many.assert_not_awaited()
+
+    async def test_filter_hit_is_confirmed_by_redis(self, _, storage):
+        storage.revocation_filter.loaded = True
+        storage.revocation_filter._apply("jti:revoked")
+        storage.protocol.get_many.return_value = ["1"]
+
+        assert await storage.are_in_blacklist(["fresh", "revoked"]) == [False, True]
+        assert list(storage.protocol.get_many.await_args.args[0]) == ["jwt_blacklist:revoked"]
+
+    async def test_role_revocation_is_applied_locally(self, _, storage):
+        storage.revocation_filter.loaded = True
+        storage.revocation_filter._apply(f"role:2:{time.time()}")
+        token_data = dto.TokenData(user_id=1, jti="jti", iat=time.time() - 60, role_id=2)
+
+        assert await storage.is_revoked(token_data) is True
+        assert await storage.is_revoked(token_data.model_copy(update={"iat": time.time() + 60})) is False
+        storage.protocol.get_many.assert_not_awaited()
+
+    async def test_role_revocations_are_indexed(self, _, storage):
+        redis_connector, pipeline = _redis_connector()
+        storage.protocol = redis_connector
+
+        await storage.revoke_role(role_id=2, ttl=60)
+
+        key, revoked = pipeline.zadd.call_args.args
+        assert key == "role_revocations_index" and list(revoked) == [2]
+
+    async def test_load_reads_the_indexes_without_scanning(self, _, storage):
+        revocation_filter = storage.revocation_filter
+        revoked_at = time.time()
+        replies = {
+            "get": "1",
+            "zrangebyscore": ["revoked"],
+            "zrange": [("2", revoked_at)],
+        }
+        storage.protocol.execute.side_effect = lambda command, *args, **kwargs: replies[command]
+
+        await revocation_filter._load()
+
+        assert revocation_filter.loaded
+        assert revocation_filter.might_be_revoked("revoked")
+        assert revocation_filter.role_revoked_at(2) == revoked_at
+        storage.protocol.scan_iter.assert_not_called()
+
+    @patch("src.infrastructure.database.redis.index_revocations")
+    async def test_first_load_indexes_older_revocations_once(self, index_revocations, _, storage):
+        revocation_filter = storage.revocation_filter
+        backfilled = None
+
+        async def execute(command: str, *args, **kwargs):
+            nonlocal backfilled
+            if command == "get":
+                return backfilled
+            if command == "set":
+                backfilled = args[1]
+            return []
+
+        storage.protocol.execute.side_effect = execute
+
+        await revocation_filter._load()
+        await revocation_filter._load()
+        # Another process finds the entries indexed already
+        await RevocationFilter(storage.protocol, capacity=1000, error_rate=0.001)._load()
+
+        index_revocations.assert_awaited_once_with(storage.protocol, revocation_filter.default_ttl)
+        assert revocation_filter.loaded
+
+
+@pytest.mark.asyncio
+class TestUserSessions:
+
+    async def test_issued_tokens_are_indexed_by_user(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector, default_ttl=3600)
+        exp = time.time() + 60
+
+        await storage.track(user_id=7, tokens=[("access", exp), ("refresh", None)])
+
+        key, sessions = pipeline.zadd.call_args.args
+        assert key == "user_sessions:{7}"
+        assert sessions["access"] == exp and sessions["refresh"] > exp
+        pipeline.zremrangebyscore.assert_called_once()
+
+    async def test_revoke_all_sets_a_watermark(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector)
+
+        assert await storage.revoke_all(user_id=7) == 1
+
+        pipeline.delete.assert_called_once_with("user_sessions:{7}")
+        assert pipeline.set.call_args.args[0] == "user_revocations:{7}"
+        pipeline.zadd.assert_called_once()
+
+    async def test_revoke_session_blacklists_a_listed_token(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector)
+        exp = time.time() + 60
+        redis_connector.execute.return_value = exp
+
+        assert await storage.revoke_session(user_id=7, jti="access")
+
+        assert pipeline.set.call_args.args == ("jwt_blacklist:access", 1)
+        assert pipeline.set.call_args.kwargs["ex"] in (60, 61)
+        redis_connector.execute.assert_awaited_with("zrem", "user_sessions:{7}", "access")
+
+    async def test_revoke_session_of_another_user_is_refused(self):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector)
+        redis_connector.execute.return_value = None
+
+        assert not await storage.revoke_session(user_id=7, jti="access")
+
+        pipeline.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch.object(RevocationFilter, "start")
+class TestUserRevocation:
+
+    @pytest.fixture
+    def storage(self):
+        redis_connector = AsyncMock()
+        revocation_filter = RevocationFilter(redis_connector, capacity=1000, error_rate=0.001)
+        return JTIRedisStorage(redis_connector, default_ttl=3600, revocation_filter=revocation_filter)
+
+    async def test_revocation_is_one_key_per_user(self, _):
+        redis_connector, pipeline = _redis_connector()
+        storage = JTIRedisStorage(redis_connector, default_ttl=3600)
+
+        await storage.revoke_user(user_id=7)
+
+        key, revoked_at = pipeline.set.call_args.args
+        assert key == "user_revocations:{7}" and pipeline.set.call_args.kwargs == {"ex": 3600}
+        pipeline.publish.assert_called_once_with("jwt_revocations", f"user:7:{revoked_at}")
+
+    async def test_watermark_is_read_with_the_jti(self, _, storage):
+        storage.protocol.get_many.return_value = [str(time.time()), None]
+        token_data = dto.TokenData(user_id=7, jti="jti", iat=time.time() - 60)
+
+        assert await storage.is_revoked(token_data) is True
+        assert list(storage.protocol.get_many.await_args.args[0]) == ["user_revocations:{7}", "jwt_blacklist:jti"]
+
+    async def test_watermark_is_applied_locally(self, _, storage):
+        storage.revocation_filter.loaded = True
+        storage.revocation_filter._apply(f"user:7:{time.time()}")
+        issued_before = dto.TokenData(user_id=7, jti="old", iat=time.time() - 60)
+        issued_after = dto.TokenData(user_id=7, jti="new", iat=time.time() + 60)
+        other_user = dto.TokenData(user_id=8, jti="other", iat=time.time() - 60)
+
+        assert await storage.are_revoked([issued_before, issued_after, other_user]) == [True, False, False]
+        storage.protocol.get_many.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+class TestClusterMode:
+
+    async def test_keyless_commands_are_sent_after_the_batch(self):
+        connector = RedisConnector(url="redis://localhost:7000", mode="cluster")
+        pipeline, held_pipeline = FakePipeline(), FakePipeline()
+        held_pipeline.execute = AsyncMock(return_value=[2])
+        connector.protocol.pipeline = MagicMock(return_value=pipeline)
+        connector._pubsub_protocol.pipeline = MagicMock(return_value=held_pipeline)
+        pipeline.__aenter__.return_value = pipeline
+        held_pipeline.__aenter__.return_value = held_pipeline
+
+        async with connector.batch(transaction=True) as batch:
+            batch.add("set", "key", 1)
+            batch.add("publish", "channel", "message")
+            batch.add("zcard", "index")
+
+        connector.protocol.pipeline.assert_called_once_with()
+        pipeline.publish.assert_not_called()
+        held_pipeline.publish.assert_called_once_with("channel", "message")
+        assert batch.results == [1, 2, 1]
+
+    async def test_user_keys_share_a_hash_slot(self):
+        storage = JTIRedisStorage(AsyncMock())
+
+        assert storage._sessions_key(7) == "user_sessions:{7}"
+        assert storage._user_key(7) == "user_revocations:{7}"
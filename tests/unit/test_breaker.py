@@ -0,0 +1,141 @@
+from unittest.mock import (
+    AsyncMock,
+    MagicMock,
+    patch,
+)
+
+from environs import (
+    Env,
+)
+import pytest
+from redis.exceptions import (
+    ConnectionError,
+)
+
+from src.application import (
+    dto,
+)
+from src.infrastructure.database import (
+    CircuitBreaker,
+    JTIRedisStorage,
+    RedisConnector,
+    RevocationFilter,
+)
+from src.infrastructure.database.breaker import (
+    BreakerState,
+)
+from src.shared import (
+    Security,
+    ex,
+)
+from tests.unit.test_cache import (
+    FakeClock,
+)
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN and not breaker.allow()
+
+    clock.now += 5
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state is BreakerState.CLOSED
+
+
+def _connector(threshold: int = 5) -> RedisConnector:
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_timeout=5)
+    return RedisConnector(url="redis://localhost", breaker=breaker, command_timeout=0.1)
+
+
+@pytest.mark.asyncio
+class TestRedisConnectorBreaker:
+
+    async def test_open_circuit_fails_fast(self):
+        connector = _connector(threshold=2)
+        connector.protocol.mget = AsyncMock(side_effect=ConnectionError)
+
+        for _ in range(3):
+            with pytest.raises(ex.StorageUnavailable):
+                await connector.get_many(["key"])
+
+        assert connector.protocol.mget.await_count == 2
+
+    async def test_deferred_writes_are_replayed(self):
+        connector = _connector()
+        pipeline = MagicMock()
+        pipeline.__aenter__.return_value = pipeline
+        pipeline.execute = AsyncMock(side_effect=[ConnectionError(), [True]])
+        connector.protocol.pipeline = MagicMock(return_value=pipeline)
+
+        async with connector.batch(transaction=True, deferrable=True) as batch:
+            batch.add("set", "key", 1, ex=60)
+
+        assert batch.deferred
+        assert await connector.replay() == 1
+        assert [call.args for call in pipeline.set.call_args_list] == [("key", 1), ("key", 1)]
+
+
+@pytest.mark.asyncio
+@patch.object(RevocationFilter, "start")
+class TestDegradedPolicy:
+
+    @staticmethod
+    def _storage(policy: str) -> JTIRedisStorage:
+        redis_connector = AsyncMock()
+        redis_connector.get_many.side_effect = ex.StorageUnavailable()
+        revocation_filter = RevocationFilter(redis_connector, capacity=1000, error_rate=0.001)
+        revocation_filter._apply("jti:revoked")
+        return JTIRedisStorage(redis_connector, revocation_filter=revocation_filter, degraded_policy=policy)
+
+    async def test_fail_open_answers_from_local_revocations(self, _):
+        storage = self._storage("open")
+        tokens = [dto.TokenData(user_id=1, jti="fresh"), dto.TokenData(user_id=1, jti="revoked")]
+
+        assert await storage.are_revoked(tokens) == [False, True]
+
+    @pytest.mark.parametrize("policy", ["closed", "CLOSED", "fail-open"])
+    async def test_fail_closed_refuses_to_answer(self, _, policy):
+        storage = self._storage(policy)
+
+        with pytest.raises(ex.StorageUnavailable):
+            await storage.is_revoked(dto.TokenData(user_id=1, jti="fresh"))
+
+
+@pytest.mark.parametrize("value, policy", [("open", "open"), ("CLOSED", "closed"), (None, "closed")])
+def test_degraded_policy_is_read_case_insensitively(monkeypatch, value, policy):
+    if value is None:
+        monkeypatch.delenv("REVOCATION_DEGRADED_POLICY", raising=False)
+    else:
+        monkeypatch.setenv("REVOCATION_DEGRADED_POLICY", value)
+
+    assert Security.from_env(Env()).revocation_degraded_policy == policy
+
+
+def test_unknown_degraded_policy_is_refused_at_startup(monkeypatch):
+    monkeypatch.setenv("REVOCATION_DEGRADED_POLICY", "fail-closed")
+
+    with pytest.raises(ValueError, match="REVOCATION_DEGRADED_POLICY"):
+        Security.from_env(Env())
+
+
+def test_secret_key_is_optional_for_asymmetric_algorithms(monkeypatch):
+    monkeypatch.setenv("ALGORITHM", "RS256")
+    monkeypatch.delenv("SECRET_JWT_KEY", raising=False)
+
+    assert Security.from_env(Env()).secret_key is None
+
+
+def test_secret_key_is_required_for_hmac_algorithms(monkeypatch):
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    monkeypatch.delenv("SECRET_JWT_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="SECRET_JWT_KEY"):
+        Security.from_env(Env())
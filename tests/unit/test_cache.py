@@ -0,0 +1,290 @@
+import asyncio
+from contextlib import (
+    asynccontextmanager,
+)
+import datetime
+from unittest.mock import (
+    AsyncMock,
+    MagicMock,
+    patch,
+)
+
+import pytest
+
+from src.infrastructure.cache import (
+    BloomFilter,
+    TTLCache,
+)
+from src.infrastructure.database import (
+    RedisConnector,
+    UserCache,
+    models,
+)
+from src.infrastructure.database.redis import (
+    Batch,
+    ClientCache,
+)
+from src.shared import (
+    ex,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_at_their_deadline():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, name="test", clock=clock)
+    cache.set("short", 1, expires_at=clock.now + 10)
+    cache.set("long", 2, expires_at=clock.now + 100)
+
+    clock.now += 10
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, name="test")
+    cache.set("a", 1, expires_at=float("inf"))
+    cache.set("b", 2, expires_at=float("inf"))
+    cache.get("a")
+
+    cache.set("c", 3, expires_at=float("inf"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_zero_maxsize_disables_cache():
+    cache: TTLCache[str, int] = TTLCache(maxsize=0, name="test")
+
+    cache.set("a", 1, expires_at=float("inf"))
+
+    assert cache.get("a") is None
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert abs(bloom.false_positive_rate - 0.01) < 0.002
+
+
+def _tracked_connector() -> RedisConnector:
+    connector = RedisConnector(url="redis://localhost", cache_prefixes=("tracked:",), cache_size=100)
+    connector.cache.tracking = True
+    connector.protocol.mget = AsyncMock()
+    return connector
+
+
+@pytest.mark.asyncio
+@patch.object(ClientCache, "start")
+async def test_client_cache_serves_tracked_keys_until_invalidated(_):
+    connector = _tracked_connector()
+    connector.protocol.mget.return_value = ["1", None, "2"]
+    assert await connector.get_many(["tracked:a", "tracked:b", "other"]) == ["1", None, "2"]
+
+    connector.protocol.mget.return_value = ["3"]
+    assert await connector.get_many(["tracked:a", "tracked:b", "other"]) == ["1", None, "3"]
+    assert connector.protocol.mget.await_args.args[0] == ["other"]
+
+    connector.cache._invalidate(["tracked:b"])
+    connector.protocol.mget.return_value = ["4"]
+    assert await connector.get_many(["tracked:a", "tracked:b"]) == ["1", "4"]
+
+
+@pytest.mark.asyncio
+@patch.object(ClientCache, "start")
+async def test_client_cache_skips_values_read_during_an_invalidation(_):
+    connector = _tracked_connector()
+
+    async def invalidated_meanwhile(keys):
+        connector.cache._invalidate(keys)
+        return ["stale"]
+
+    connector.protocol.mget.side_effect = invalidated_meanwhile
+    await connector.get_many(["tracked:a"])
+
+    assert connector.cache.get("tracked:a") is None
+
+
+class FakeRedisConnector:
+    """Keys in a dict, expiring by ``clock``, enough of RedisConnector for the user cache"""
+
+    mode = "standalone"
+
+    def __init__(self) -> None:
+        self.clock = FakeClock()
+        self.data: dict[str, tuple[str, float]] = {}
+
+    def _get(self, key: str) -> str | None:
+        value, expires_at = self.data.get(key, (None, float("inf")))
+        return value if expires_at > self.clock.now else None
+
+    async def get_many(self, keys):
+        return [self._get(key) for key in keys]
+
+    @asynccontextmanager
+    async def batch(self, transaction: bool = False, deferrable: bool = False):
+        batch = Batch(MagicMock())
+        yield batch
+        for command, args, kwargs in batch.commands:
+            if command == "set":
+                self.data[args[0]] = (str(args[1]), self.clock.now + kwargs["ex"])
+            elif command == "unlink":
+                self.data.pop(args[0], None)
+            elif command == "evalsha":
+                # WRITE_SCRIPT
+                _, _, key, expected, value, ttl = args
+                if (self._get(key) or "") == expected:
+                    self.data[key] = (value, self.clock.now + ttl)
+
+
+def _user() -> models.User:
+    created_at = datetime.datetime(2024, 1, 1)
+    role = models.Role(id=2, title="moderator", permissions=3)
+    return models.User(
+        id=7, username="johndoe", telegram_id=42, password="hash", is_active=True, is_superuser=False,
+        language="en", role_id=2, role=role, created_at=created_at, updated_at=created_at, deleted_at=None,
+    )
+
+
+@pytest.mark.asyncio
+class TestUserCache:
+
+    async def test_users_are_read_through_by_any_lookup(self):
+        cache = UserCache(FakeRedisConnector(), ttl=60)
+        load = AsyncMock(return_value=_user())
+
+        await cache.get("id", 7, load=load)
+        by_username = await cache.get("username", "johndoe", load=load)
+        by_telegram_id = await cache.get("telegram_id", 42, load=load)
+
+        load.assert_awaited_once()
+        assert by_username.token_claims() == by_telegram_id.token_claims() == _user().token_claims()
+        assert by_username.password is None
+
+    async def test_stale_lookups_and_changed_roles_are_read_again(self):
+        cache = UserCache(FakeRedisConnector(), ttl=60)
+        await cache.get("id", 7, load=AsyncMock(return_value=_user()))
+        renamed = _user()
+        renamed.username = "janedoe"
+
+        await cache.invalidate(7)
+        load = AsyncMock(return_value=renamed)
+        assert await cache.get("username", "johndoe", load=AsyncMock(return_value=None)) is None
+        await cache.get("id", 7, load=load)
+        await cache.invalidate_role(2)
+        await cache.get("username", "janedoe", load=load)
+
+        assert load.await_count == 2
+
+    async def test_user_changed_while_loading_is_not_cached(self):
+        cache = UserCache(FakeRedisConnector(), ttl=60)
+        await cache.get("id", 7, load=AsyncMock(return_value=_user()))
+        await cache.invalidate(7)
+
+        async def load_then_deactivate() -> models.User:
+            # Read before the deactivation, which drops the user meanwhile
+            user = _user()
+            await cache.invalidate(7)
+            return user
+
+        await cache.get("id", 7, load=load_then_deactivate)
+        deactivated = _user()
+        deactivated.is_active = False
+        load = AsyncMock(return_value=deactivated)
+
+        assert (await cache.get("id", 7, load=load)).is_active is False
+        assert (await cache.get("username", "johndoe", load=load)).is_active is False
+        load.assert_awaited_once()
+
+    async def test_role_changed_while_loading_is_not_cached(self):
+        cache = UserCache(FakeRedisConnector(), ttl=60)
+
+        async def load_then_change_role(ids: list[int]) -> list[models.User]:
+            users = [_user()]
+            await cache.invalidate_role(2)
+            return users
+
+        await cache.get_many([7], load=load_then_change_role)
+        load = AsyncMock(return_value=[_user()])
+        await cache.get_many([7], load=load)
+        await cache.get_many([7], load=load)
+
+        load.assert_awaited_once()
+
+    async def test_invalidation_during_a_concurrent_read_is_not_undone(self):
+        cache = UserCache(FakeRedisConnector(), ttl=60)
+        loaded = asyncio.Event()
+        changed = asyncio.Event()
+
+        async def slow_load() -> models.User:
+            user = _user()
+            loaded.set()
+            await changed.wait()
+            return user
+
+        # The read loads the user, the deactivation commits and drops it, then the read writes
+        read = asyncio.create_task(cache.get("id", 7, load=slow_load))
+        await loaded.wait()
+        await cache.invalidate(7)
+        changed.set()
+        await read
+        deactivated = _user()
+        deactivated.is_active = False
+        load = AsyncMock(return_value=deactivated)
+
+        assert (await cache.get("id", 7, load=load)).is_active is False
+        load.assert_awaited_once()
+
+    async def test_tombstones_expire_with_the_entries(self):
+        redis_connector = FakeRedisConnector()
+        cache = UserCache(redis_connector, ttl=60)
+        await cache.get("id", 7, load=AsyncMock(return_value=_user()))
+        await cache.invalidate(7)
+        assert (await redis_connector.get_many(["user_cache:id:7"]))[0].startswith("!")
+
+        redis_connector.clock.now += 60
+        load = AsyncMock(return_value=_user())
+        await cache.get("id", 7, load=load)
+        await cache.get("id", 7, load=load)
+
+        assert redis_connector.data["user_cache:id:7"][0].startswith("{")
+        load.assert_awaited_once()
+
+    async def test_read_outliving_the_tombstone_it_saw_is_not_cached(self):
+        redis_connector = FakeRedisConnector()
+        cache = UserCache(redis_connector, ttl=60)
+        await cache.invalidate(7)
+
+        async def load_past_the_tombstone() -> models.User:
+            redis_connector.clock.now += 60
+            return _user()
+
+        await cache.get("id", 7, load=load_past_the_tombstone)
+
+        assert await redis_connector.get_many(["user_cache:id:7"]) == [None]
+
+    async def test_users_are_read_from_the_database_without_redis(self):
+        redis_connector = AsyncMock()
+        redis_connector.get_many.side_effect = ex.StorageUnavailable()
+        redis_connector.batch = MagicMock(side_effect=ex.StorageUnavailable())
+        cache = UserCache(redis_connector, ttl=60)
+
+        users = await cache.get_many([7], load=AsyncMock(return_value=[_user()]))
+
+        assert [user.id for user in users] == [7]
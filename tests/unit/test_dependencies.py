@@ -0,0 +1,266 @@
+import dataclasses
+import datetime
+from unittest.mock import (
+    AsyncMock,
+)
+
+from fastapi import (
+    HTTPException,
+    Request,
+    Response,
+)
+import pytest
+
+from src.domain.auth import (
+    Permission,
+)
+from src.infrastructure.database import (
+    RateLimit,
+    models,
+)
+from src.infrastructure.services.security import (
+    JWTService,
+)
+from src.presentation.api.exceptions import (
+    CredentialsError,
+    TooManyRequestsError,
+    TooManyTokensError,
+)
+from src.presentation.api.providers import (
+    dependencies,
+)
+from src.presentation.api.providers.dependencies import (
+    _get_user_and_tokens,
+    _rate_limit,
+    config,
+    get_current_profile,
+    get_token_claims,
+    require_permission,
+    verify_token_from_request,
+    verify_tokens,
+)
+from src.shared import (
+    ex,
+)
+from tests.misc import (
+    fake,
+)
+
+
+def _request(access_token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"cookie", f"access_token={access_token}".encode())]})
+
+
+def _access_token(user_id: int, expires_in: int, claims: dict | None = None) -> str:
+    return JWTService._create_token(
+        uid=str(user_id), type_="access", expiry=datetime.timedelta(seconds=expires_in), data=claims
+    )
+
+
+@pytest.mark.asyncio
+class TestSlidingSession:
+
+    @pytest.fixture
+    def services(self, user_service, mock_user_repository):
+        user_id = fake.random_int(min=1)
+        mock_user_repository.get_single.return_value = models.User(id=user_id, username=fake.user_name())
+        blacklist_service = AsyncMock()
+        blacklist_service.is_revoked.return_value = False
+        return user_id, user_service, blacklist_service
+
+    async def test_fresh_access_token_is_not_reissued(self, services):
+        user_id, user_service, blacklist_service = services
+        response = Response()
+        request = _request(_access_token(user_id, expires_in=config.renewal_window_in_seconds + 60))
+
+        user, access_token, refresh_token = await _get_user_and_tokens(
+            request, response, user_service, blacklist_service
+        )
+
+        assert user.id == user_id
+        assert access_token is None and refresh_token is None
+        assert "set-cookie" not in response.headers
+
+    async def test_access_token_close_to_expiry_is_reissued(self, services):
+        user_id, user_service, blacklist_service = services
+        response = Response()
+        request = _request(_access_token(user_id, expires_in=config.renewal_window_in_seconds - 60))
+
+        _, access_token, refresh_token = await _get_user_and_tokens(
+            request, response, user_service, blacklist_service
+        )
+
+        assert access_token is not None and refresh_token is not None
+        assert "access_token=" in response.headers["set-cookie"]
+
+    async def test_forced_renewal_always_reissues(self, services):
+        user_id, user_service, blacklist_service = services
+        request = _request(_access_token(user_id, expires_in=config.renewal_window_in_seconds + 60))
+
+        _, access_token, _ = await _get_user_and_tokens(
+            request, Response(), user_service, blacklist_service, force_renewal=True
+        )
+
+        assert access_token is not None
+
+
+@pytest.mark.asyncio
+class TestBatchVerification:
+
+    async def test_results_follow_token_order(self, user_service, mock_user_repository):
+        active_id, revoked_id, deleted_id = 1, 2, 3
+        tokens = [
+            _access_token(active_id, expires_in=60),
+            "not.a.token",
+            _access_token(revoked_id, expires_in=60),
+            _access_token(deleted_id, expires_in=60),
+        ]
+        mock_user_repository.get_by_ids.return_value = [models.User(id=active_id, username=fake.user_name())]
+        blacklist_service = AsyncMock()
+        blacklist_service.are_revoked.return_value = [False, True, False]
+
+        results = await verify_tokens(tokens, user_service, blacklist_service)
+
+        assert [(result.valid, result.reason) for result in results] == [
+            (True, None), (False, "invalid"), (False, "revoked"), (False, "user_not_found"),
+        ]
+        blacklist_service.are_revoked.assert_awaited_once()
+        mock_user_repository.get_by_ids.assert_awaited_once()
+        assert sorted(mock_user_repository.get_by_ids.call_args.kwargs["ids"]) == [active_id, deleted_id]
+
+    async def test_batch_over_the_limit_is_rejected(self, user_service):
+        tokens = ["token"] * (config.verify_batch_max_tokens + 1)
+
+        with pytest.raises(TooManyTokensError):
+            await verify_tokens(tokens, user_service, AsyncMock())
+
+
+@pytest.mark.asyncio
+class TestPermissionClaims:
+
+    @staticmethod
+    async def _authorize(claims: dict | None, *permissions: Permission, revoked: bool = False):
+        blacklist_service = AsyncMock()
+        blacklist_service.is_revoked.return_value = revoked
+        request = _request(_access_token(fake.random_int(min=1), expires_in=60, claims=claims))
+        token_data = await get_token_claims(request, blacklist_service)
+        return await require_permission(*permissions)(token_data)
+
+    async def test_issued_tokens_carry_role_permissions(self):
+        role = models.Role(id=2, title="moderator", permissions=Permission.VIEW_ROLES | Permission.MANAGE_ROLES)
+        user = models.User(id=1, username=fake.user_name(), is_active=True, is_superuser=False, role_id=2, role=role)
+
+        token_data = await self._authorize(user.token_claims(), Permission.MANAGE_ROLES)
+
+        assert Permission(token_data.permissions) == Permission.VIEW_ROLES | Permission.MANAGE_ROLES
+        assert token_data.role_id == 2
+
+    async def test_missing_permission_is_forbidden(self):
+        claims = {"perm": int(Permission.VIEW_ROLES), "su": False, "act": True, "rid": 2}
+
+        with pytest.raises(HTTPException) as error:
+            await self._authorize(claims, Permission.VIEW_ROLES, Permission.MANAGE_ROLES)
+        assert error.value.status_code == 403
+
+    async def test_superuser_holds_every_permission(self):
+        claims = {"perm": 0, "su": True, "act": True, "rid": None}
+
+        assert await self._authorize(claims, Permission.MANAGE_USERS)
+
+    async def test_revoked_claims_are_refused(self):
+        claims = {"perm": int(Permission.all()), "su": False, "act": True, "rid": 2}
+
+        with pytest.raises(CredentialsError):
+            await self._authorize(claims, Permission.VIEW_ROLES, revoked=True)
+
+    async def test_tokens_without_claims_must_be_refreshed(self):
+        with pytest.raises(CredentialsError):
+            await self._authorize(None, Permission.VIEW_ROLES)
+
+
+@pytest.mark.asyncio
+class TestStatelessMode:
+
+    @pytest.fixture(autouse=True)
+    def stateless(self, monkeypatch):
+        monkeypatch.setattr(dependencies, "config", dataclasses.replace(config, stateless=True))
+
+    @pytest.fixture
+    def user(self):
+        role = models.Role(id=3, title="support", permissions=int(Permission.VIEW_USERS))
+        return models.User(
+            id=fake.random_int(min=1),
+            username=fake.user_name(),
+            language="en",
+            is_active=True,
+            is_superuser=False,
+            role_id=3,
+            role=role,
+            created_at=datetime.datetime.now() - datetime.timedelta(days=10),
+        )
+
+    @pytest.fixture
+    def blacklist_service(self):
+        blacklist_service = AsyncMock()
+        blacklist_service.is_revoked.return_value = False
+        return blacklist_service
+
+    async def test_verify_reads_no_user(self, user, user_service, mock_user_repository, blacklist_service):
+        request = _request(_access_token(user.id, expires_in=60, claims=user.token_claims()))
+
+        assert await verify_token_from_request(request, user_service, blacklist_service) is True
+        mock_user_repository.get_single.assert_not_awaited()
+
+    async def test_profile_is_built_from_claims(self, user, user_service, mock_user_repository, blacklist_service):
+        expires_in = config.renewal_window_in_seconds + 60
+        request = _request(_access_token(user.id, expires_in=expires_in, claims=user.token_claims()))
+
+        profile = await get_current_profile(request, Response(), user_service, blacklist_service)
+
+        assert (profile.id, profile.username, profile.language) == (user.id, user.username, "en")
+        assert profile.role.title == "support" and profile.days_since_created == 10
+        mock_user_repository.get_single.assert_not_awaited()
+
+    async def test_tokens_without_profile_claims_load_the_user(
+            self, user, user_service, mock_user_repository, blacklist_service
+    ):
+        mock_user_repository.get_single.return_value = user
+        request = _request(_access_token(user.id, expires_in=config.renewal_window_in_seconds + 60))
+
+        assert await get_current_profile(request, Response(), user_service, blacklist_service) is user
+        mock_user_repository.get_single.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+class TestRateLimiting:
+
+    @staticmethod
+    def _rate_limiter(**decision) -> AsyncMock:
+        rate_limiter = AsyncMock()
+        rate_limiter.hit.return_value = RateLimit(limit=5, remaining=0, reset_after=60, retry_after=0, **decision)
+        return rate_limiter
+
+    async def test_client_and_account_are_limited(self):
+        rate_limiter = self._rate_limiter(allowed=True)
+        response = Response()
+        request = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1234)})
+
+        await _rate_limit(rate_limiter, request, response, "login", account="johndoe")
+
+        scope, limits = rate_limiter.hit.call_args.args
+        assert scope == "login" and set(limits) == {"ip:10.0.0.1", "account:johndoe"}
+        assert response.headers["RateLimit-Remaining"] == "0"
+
+    async def test_exceeded_limit_is_rejected_with_retry_after(self):
+        rate_limiter = self._rate_limiter(allowed=False)
+        rate_limiter.hit.return_value = dataclasses.replace(rate_limiter.hit.return_value, retry_after=11.2)
+
+        with pytest.raises(TooManyRequestsError) as error:
+            await _rate_limit(rate_limiter, _request("token"), Response(), "login", account="johndoe")
+        assert error.value.status_code == 429 and error.value.headers["Retry-After"] == "12"
+
+    async def test_requests_are_not_limited_without_redis(self):
+        rate_limiter = AsyncMock()
+        rate_limiter.hit.side_effect = ex.StorageUnavailable()
+
+        await _rate_limit(rate_limiter, _request("token"), Response(), "signup", account=None)
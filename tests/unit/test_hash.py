@@ -0,0 +1,349 @@
+import asyncio
+import time
+from typing import (
+    Any,
+)
+from unittest.mock import (
+    AsyncMock,
+)
+
+from argon2 import (
+    extract_parameters,
+)
+import pytest
+
+from src.domain.user import (
+    entity,
+)
+from src.infrastructure.services.security import (
+    HashService,
+    PooledHashService,
+)
+from src.infrastructure.services.security.calibration import (
+    MIN_MEMORY_COST,
+    calibrate_parameters,
+)
+from src.infrastructure.services.security.hash import (
+    HashParameters,
+)
+from src.infrastructure.services.security.remote import (
+    JOBS_STREAM,
+    RedisHashService,
+)
+from src.infrastructure.services.security.scheduler import (
+    HashingScheduler,
+)
+from src.infrastructure.services.security.worker import (
+    HashingWorker,
+)
+from src.shared import (
+    ex,
+)
+from tests.misc import (
+    fake,
+)
+
+
+@pytest.mark.asyncio
+class TestPooledHashService:
+
+    async def test_hash_and_verify_password(self):
+        encoder = PooledHashService(executor="thread", max_workers=2)
+        password = fake.password()
+
+        hashed_password = await encoder.hash_password(password)
+
+        assert hashed_password != password
+        assert await encoder.verify_password(password=hashed_password, hashed_password=password)
+        assert not await encoder.verify_password(password=hashed_password, hashed_password=fake.password())
+        await encoder.shutdown()
+
+    async def test_concurrent_jobs_do_not_block_event_loop(self):
+        encoder = PooledHashService(executor="thread", max_workers=2)
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker_task = asyncio.create_task(ticker())
+        await asyncio.gather(*(encoder.hash_password(fake.password()) for _ in range(4)))
+        ticker_task.cancel()
+
+        assert ticks > 4
+        await encoder.shutdown()
+
+    async def test_register_user_with_password(self):
+        encoder = PooledHashService(executor="thread", max_workers=1)
+        password = fake.password()
+
+        user = await entity.User.register(
+            password=password, telegram_id=None, username=fake.username(), password_encoder=encoder
+        )
+
+        assert await encoder.verify_password(password=user.password, hashed_password=password)
+        await encoder.shutdown()
+
+    async def test_check_needs_rehash(self):
+        encoder = PooledHashService(executor="thread", max_workers=1)
+        password = fake.password()
+        hashed_password = await encoder.hash_password(password)
+
+        assert not encoder.check_needs_rehash(hashed_password)
+        assert encoder.check_needs_rehash("not-an-argon2-hash")
+
+        stronger = PooledHashService(
+            executor="thread",
+            max_workers=1,
+            parameters=HashParameters(time_cost=4, memory_cost=65536, parallelism=1),
+        )
+        assert stronger.check_needs_rehash(hashed_password)
+        assert await stronger.verify_password(password=hashed_password, hashed_password=password)
+        # Pools don't share their parameters, with each other or with HashService
+        assert not encoder.check_needs_rehash(hashed_password)
+        assert HashService.get_parameters() == HashParameters()
+        await encoder.shutdown()
+        await stronger.shutdown()
+
+    async def test_hash_with_the_parameters_of_another_process(self):
+        encoder = PooledHashService(executor="thread", max_workers=1)
+        parameters = HashParameters(time_cost=2, memory_cost=MIN_MEMORY_COST, parallelism=1)
+
+        hashed_password = await encoder.hash_password(fake.password(), parameters=HashParameters.parse(str(parameters)))
+
+        stored = extract_parameters(hashed_password)
+        assert (stored.time_cost, stored.memory_cost, stored.parallelism) == (2, MIN_MEMORY_COST, 1)
+        await encoder.shutdown()
+
+    async def test_stronger_hashes_are_not_rehashed(self):
+        encoder = PooledHashService(executor="thread", max_workers=1)
+        weaker = PooledHashService(
+            executor="thread",
+            max_workers=1,
+            parameters=HashParameters(time_cost=10, memory_cost=MIN_MEMORY_COST, parallelism=1),
+        )
+        hashed_password = await encoder.hash_password(fake.password())
+        weak_hash = await weaker.hash_password(fake.password())
+
+        # Memory cost weighs first, whatever the time cost
+        assert not weaker.check_needs_rehash(hashed_password)
+        assert encoder.check_needs_rehash(weak_hash)
+        assert not weaker.check_needs_rehash(weak_hash)
+        await encoder.shutdown()
+        await weaker.shutdown()
+
+
+def test_calibrate_parameters_respects_bounds():
+    parameters = calibrate_parameters(target_verify_ms=1, max_memory_cost=MIN_MEMORY_COST * 2, parallelism=1)
+
+    assert parameters.time_cost == 1
+    assert parameters.memory_cost == MIN_MEMORY_COST
+    assert parameters.parallelism == 1
+
+
+@pytest.mark.asyncio
+class TestHashingScheduler:
+
+    async def test_memory_budget_limits_jobs_in_flight(self):
+        scheduler = HashingScheduler(max_concurrency=4, memory_budget=100)
+        running = 0
+        peak = 0
+
+        async def job() -> None:
+            nonlocal running, peak
+            async with scheduler.admit(memory_cost=40):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(job() for _ in range(6)))
+
+        assert peak == 2
+
+    async def test_rejects_when_queue_is_full(self):
+        scheduler = HashingScheduler(max_concurrency=1, max_queue=1)
+        await scheduler.acquire(memory_cost=1)
+        waiting = asyncio.create_task(scheduler.acquire(memory_cost=1))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ex.HashingOverloaded) as exc_info:
+            await scheduler.acquire(memory_cost=1)
+        assert exc_info.value.retry_after >= 1
+
+        scheduler.release(memory_cost=1, duration=0.01)
+        await waiting
+        scheduler.release(memory_cost=1, duration=0.01)
+
+    async def test_rejects_after_queue_timeout(self):
+        scheduler = HashingScheduler(max_concurrency=1, queue_timeout=0.01)
+        await scheduler.acquire(memory_cost=1)
+
+        with pytest.raises(ex.HashingOverloaded):
+            await scheduler.acquire(memory_cost=1)
+        assert scheduler.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_remote_hashing_falls_back_without_workers():
+    redis_connector = AsyncMock()
+    redis_connector.execute.return_value = 0
+    encoder = RedisHashService(redis_connector, fallback=PooledHashService(max_workers=1))
+    password = fake.password()
+
+    hashed_password = await encoder.hash_password(password)
+
+    assert await encoder.verify_password(password=hashed_password, hashed_password=password)
+    redis_connector.execute.assert_awaited_once()
+    assert redis_connector.execute.await_args.args[0] == "zcount"
+
+
+class FakeStreams:
+    """The Redis stream commands used by RedisHashService and HashingWorker, in memory"""
+
+    def __init__(self) -> None:
+        self.streams: dict[str, list[tuple[str, dict[str, str]]]] = {}
+        self.delivered: set[str] = set()
+        self._sequence = 0
+        self._added = asyncio.Condition()
+
+    async def _wait(self, block: int) -> None:
+        async with self._added:
+            try:
+                await asyncio.wait_for(self._added.wait(), timeout=block / 1000)
+            except asyncio.TimeoutError:
+                pass
+
+    async def execute(self, command: str, *args: Any, **kwargs: Any) -> Any:
+        if command == "zcount":
+            return 1
+        if command == "xadd":
+            stream, fields = args
+            self._sequence += 1
+            message_id = f"{self._sequence}-0"
+            self.streams.setdefault(stream, []).append((message_id, {k: str(v) for k, v in fields.items()}))
+            async with self._added:
+                self._added.notify_all()
+            return message_id
+        if command == "xread":
+            (stream, last_id), = args[0].items()
+            for _ in range(2):
+                after = int(last_id.split("-")[0])
+                messages = [m for m in self.streams.get(stream, []) if int(m[0].split("-")[0]) > after]
+                if messages:
+                    return [(stream, messages)]
+                await self._wait(kwargs["block"])
+            return []
+        if command == "xreadgroup":
+            for _ in range(2):
+                messages = [m for m in self.streams.get(JOBS_STREAM, []) if m[0] not in self.delivered][:1]
+                if messages:
+                    self.delivered.add(messages[0][0])
+                    return [(JOBS_STREAM, messages)]
+                await self._wait(kwargs["block"])
+            return []
+        if command == "xdel":
+            stream, *message_ids = args
+            messages = self.streams.get(stream, [])
+            self.streams[stream] = [m for m in messages if m[0] not in message_ids]
+            return len(messages) - len(self.streams[stream])
+        if command == "xautoclaim":
+            return "0-0", [], []
+        return 0
+
+
+@pytest.mark.asyncio
+class TestRemoteHashing:
+
+    @pytest.fixture
+    def redis_connector(self):
+        return FakeStreams()
+
+    @staticmethod
+    def _fallback() -> AsyncMock:
+        fallback = AsyncMock(spec=PooledHashService)
+        fallback.parameters = HashParameters(time_cost=2, memory_cost=MIN_MEMORY_COST, parallelism=1)
+        fallback.hash_password.return_value = "local"
+        return fallback
+
+    @staticmethod
+    async def _start(worker: HashingWorker) -> asyncio.Task[None]:
+        task = asyncio.create_task(worker.run())
+        await asyncio.sleep(0)
+        return task
+
+    @staticmethod
+    async def _stop(encoder: RedisHashService, *tasks: asyncio.Task[None]) -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await encoder.shutdown()
+        encoder.fallback.shutdown.assert_awaited_once()
+
+    async def test_jobs_are_hashed_by_a_worker(self, redis_connector):
+        fast = HashParameters(time_cost=1, memory_cost=MIN_MEMORY_COST, parallelism=1)
+        worker = HashingWorker(redis_connector, PooledHashService(max_workers=1, parameters=fast))
+        encoder = RedisHashService(redis_connector, fallback=self._fallback())
+        task = await self._start(worker)
+        password = fake.password()
+
+        hashed_password = await encoder.hash_password(password)
+
+        assert hashed_password.startswith("$argon2id$")
+        # The worker hashes with the parameters of the API, not its own
+        stored = extract_parameters(hashed_password)
+        assert (stored.time_cost, stored.memory_cost) == (2, MIN_MEMORY_COST)
+        assert await encoder.verify_password(password=hashed_password, hashed_password=password)
+        assert not await encoder.verify_password(password=hashed_password, hashed_password="other")
+        encoder.fallback.hash_password.assert_not_awaited()
+        encoder.fallback.verify_password.assert_not_awaited()
+        await self._stop(encoder, task)
+        await worker.close()
+
+    async def test_unanswered_job_falls_back_and_is_dropped_by_workers(self, redis_connector):
+        encoder = RedisHashService(redis_connector, fallback=self._fallback(), timeout=0.05)
+
+        assert await encoder.hash_password(fake.password()) == "local"
+
+        # The password of the job doesn't stay in Redis
+        assert redis_connector.streams[JOBS_STREAM] == []
+        job = {
+            "id": "job",
+            "operation": "hash",
+            "password": fake.password(),
+            "reply_to": encoder.reply_stream,
+            "deadline": str(time.time() - 1),
+        }
+        worker_encoder = AsyncMock(spec=PooledHashService, max_workers=1)
+        worker = HashingWorker(redis_connector, worker_encoder)
+        await worker._slots.acquire()
+        await worker._handle("1-0", job)
+        worker_encoder.hash_password.assert_not_awaited()
+        assert encoder.reply_stream not in redis_connector.streams
+        await self._stop(encoder)
+
+    async def test_results_past_the_deadline_are_ignored(self, redis_connector):
+        async def slow_hash(password: str, parameters: HashParameters | None = None) -> str:
+            await asyncio.sleep(0.1)
+            return "late"
+
+        worker_encoder = AsyncMock(spec=PooledHashService, max_workers=1)
+        worker_encoder.hash_password.side_effect = slow_hash
+        worker = HashingWorker(redis_connector, worker_encoder)
+        encoder = RedisHashService(redis_connector, fallback=self._fallback(), timeout=0.05)
+        task = await self._start(worker)
+
+        assert await encoder.hash_password(fake.password()) == "local"
+
+        # The worker took the job before its deadline and answers it anyway
+        started = time.monotonic()
+        while encoder.reply_stream not in redis_connector.streams and time.monotonic() - started < 1:
+            await asyncio.sleep(0.01)
+        (_, reply), = redis_connector.streams[encoder.reply_stream]
+        assert reply["result"] == "late"
+        await asyncio.sleep(0.01)
+        assert encoder._pending == {}
+        await self._stop(encoder, task)
+        await worker.close()
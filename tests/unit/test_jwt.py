@@ -0,0 +1,197 @@
+import time
+
+from cryptography.hazmat.primitives import (
+    serialization,
+)
+from cryptography.hazmat.primitives.asymmetric import (
+    ec,
+    ed25519,
+    rsa,
+)
+from fastapi import (
+    FastAPI,
+)
+from fastapi.testclient import (
+    TestClient,
+)
+from jose import (
+    jwk,
+    jwt,
+)
+import pytest
+
+from src.infrastructure.services.security import (
+    JWTService,
+)
+from src.infrastructure.services.security.codec import (
+    MAX_CACHED_HEADERS,
+    TokenCodec,
+    TokenError,
+)
+from src.infrastructure.services.security.keys import (
+    HMACKey,
+    KeyRing,
+    load_signing_key,
+)
+from src.presentation.api.controllers import (
+    jwks_router,
+)
+from src.shared import (
+    ex,
+    load_config,
+)
+
+SECRET_KEY = "secret"
+config = load_config().security
+
+
+@pytest.fixture
+def codec():
+    return TokenCodec(KeyRing(HMACKey(secret_key=SECRET_KEY, algorithm="HS256")))
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "HS384", "HS512"])
+def test_codec_encodes_like_jose(algorithm):
+    codec = TokenCodec(KeyRing(HMACKey(secret_key=SECRET_KEY, algorithm=algorithm)))
+    claims = {"role": "user", "sub": "1", "jti": "abc", "type": "access", "fresh": False, "iat": time.time()}
+
+    assert codec.encode(claims) == jwt.encode(claims, SECRET_KEY, algorithm=algorithm)
+    assert codec.encode(claims, headers={"kid": "1"}) == jwt.encode(
+        claims, SECRET_KEY, algorithm=algorithm, headers={"kid": "1"}
+    )
+
+
+def test_codec_decodes_jose_tokens(codec):
+    claims = {"sub": "1", "jti": "abc", "exp": time.time() + 60}
+    token = jwt.encode(claims, SECRET_KEY, algorithm="HS256")
+
+    assert codec.decode(token) == claims
+
+
+def test_key_ring_keeps_previous_keys_during_rotation():
+    old_key = HMACKey("old-secret", kid=HMACKey.derive_kid("old-secret"))
+    new_key = HMACKey("new-secret", kid=HMACKey.derive_kid("new-secret"))
+    legacy_token = jwt.encode({"sub": "1"}, "old-secret", algorithm="HS256")
+    old_token = TokenCodec(KeyRing(old_key)).encode({"sub": "2"})
+    codec = TokenCodec(KeyRing(new_key, previous=[old_key], legacy=old_key))
+
+    new_token = codec.encode({"sub": "3"})
+
+    assert jwt.get_unverified_header(new_token)["kid"] == new_key.kid
+    assert codec.decode(old_token) == {"sub": "2"}
+    assert codec.decode(legacy_token) == {"sub": "1"}
+    assert codec.decode(new_token) == {"sub": "3"}
+    with pytest.raises(TokenError):
+        codec.decode(jwt.encode({"sub": "1"}, "old-secret", algorithm="HS256", headers={"kid": "unknown"}))
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"sub": "1", "exp": time.time() - 60},
+        {"sub": "1", "nbf": time.time() + 60},
+        {"sub": 1},
+        {"sub": "1", "aud": "other"},
+    ],
+)
+def test_codec_rejects_invalid_claims(codec, claims):
+    token = jwt.encode(claims, SECRET_KEY, algorithm="HS256")
+
+    with pytest.raises(TokenError):
+        codec.decode(token)
+
+
+def test_codec_rejects_bad_signature(codec):
+    token = jwt.encode({"sub": "1"}, "other-secret", algorithm="HS256")
+
+    with pytest.raises(TokenError):
+        codec.decode(token)
+    assert codec.decode(token, verify=False) == {"sub": "1"}
+
+
+def test_codec_caches_only_verified_headers(codec):
+    forged = [
+        jwt.encode({"sub": "1"}, "other-secret", algorithm="HS256", headers={"x": i})
+        for i in range(MAX_CACHED_HEADERS)
+    ]
+    for token in forged:
+        with pytest.raises(TokenError):
+            codec.decode(token)
+    valid = [jwt.encode({"sub": "1"}, SECRET_KEY, algorithm="HS256", headers={"y": i}) for i in range(2)]
+
+    for token in valid:
+        codec.decode(token)
+
+    cached = codec._header_keys
+    assert not {token.split(".")[0] for token in forged} & cached.keys()
+    assert list(cached)[-2:] == [token.split(".")[0] for token in valid]
+
+
+def test_codec_evicts_least_recently_used_headers(codec):
+    tokens = [
+        jwt.encode({"sub": "1"}, SECRET_KEY, algorithm="HS256", headers={"x": i})
+        for i in range(MAX_CACHED_HEADERS + 1)
+    ]
+    for token in tokens:
+        codec.decode(token)
+
+    assert len(codec._header_keys) == MAX_CACHED_HEADERS
+    assert tokens[-1].split(".")[0] in codec._header_keys
+
+
+def test_jwt_service_tokens_are_readable_by_jose():
+    token = JWTService.create_access_token(uid="1")
+
+    payload = JWTService.decode_token(token)
+
+    assert payload == jwt.decode(token, config.secret_key, algorithms=config.algorithm)
+    assert payload["jti"] != payload["csrf"]
+    assert payload["exp"] > payload["iat"]
+    with pytest.raises(ex.JWTDecodeError):
+        JWTService.decode_token(token[:-2])
+
+
+def _private_pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+@pytest.mark.parametrize(
+    "algorithm, private_key",
+    [
+        ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+    ],
+)
+def test_asymmetric_tokens_verify_with_published_jwk(algorithm, private_key):
+    key = load_signing_key(algorithm, _private_pem(private_key))
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_key = load_signing_key(algorithm, public_pem.decode())
+    token = TokenCodec(KeyRing(key)).encode({"sub": "1"})
+
+    assert jwt.get_unverified_header(token)["kid"] == key.kid == public_key.kid
+    assert TokenCodec(KeyRing(public_key)).decode(token) == {"sub": "1"}
+    with pytest.raises(TokenError):
+        TokenCodec(KeyRing(public_key)).decode(token[:-4] + "AAAA")
+    if algorithm != "EdDSA":
+        # python-jose has no EdDSA support, the others must interoperate with it
+        assert jwt.decode(token, jwk.construct(key.public_jwk()), algorithms=algorithm) == {"sub": "1"}
+
+
+def test_jwks_endpoint_supports_conditional_requests():
+    app = FastAPI()
+    app.include_router(jwks_router)
+    client = TestClient(app)
+
+    response = client.get("/.well-known/jwks.json")
+    not_modified = client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert response.json() == JWTService.get_jwks()
+    assert "max-age" in response.headers["Cache-Control"]
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
@@ -1,3 +1,4 @@
+import datetime
 from typing import (
     Any,
 )
@@ -5,12 +6,24 @@ import unittest
 
 import pytest
 
+from src.application.services.user import (
+    decode_cursor,
+)
 from src.domain.user import (
     entity,
 )
 from src.infrastructure.database import (
     models,
 )
+from src.infrastructure.services.security import (
+    PooledHashService,
+)
+from src.infrastructure.services.security.calibration import (
+    MIN_MEMORY_COST,
+)
+from src.infrastructure.services.security.hash import (
+    HashParameters,
+)
 from src.shared import (
     ex,
 )
@@ -19,9 +32,12 @@ from tests.misc import (
 )
 
 
-class TestUserEntity(unittest.TestCase):
+class TestUserEntity(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
+        self.password_encoder = PooledHashService(
+            max_workers=1, parameters=HashParameters(time_cost=1, memory_cost=MIN_MEMORY_COST, parallelism=1)
+        )
         self.user = entity.User(
             username=fake.username(),
             password=fake.password(),
@@ -31,57 +47,82 @@ class TestUserEntity(unittest.TestCase):
             language=fake.language_code()
         )
 
-    def test_create_user_without_password_and_telegram_id(self):
+    async def asyncTearDown(self):
+        await self.password_encoder.shutdown()
+
+    async def test_register_user_without_password_and_telegram_id(self):
         with self.assertRaises(ex.MissingFieldsError):
-            entity.User.create(password=None, telegram_id=None, username=fake.username())
+            await entity.User.register(
+                password=None, telegram_id=None, username=fake.username(), password_encoder=self.password_encoder
+            )
 
-    def test_create_user_with_password(self):
+    async def test_register_user_with_password(self):
         password = fake.password()
 
-        user = entity.User.create(password=password, telegram_id=None, username=fake.username())
+        user = await entity.User.register(
+            password=password, telegram_id=None, username=fake.username(), password_encoder=self.password_encoder
+        )
 
-        self.assertTrue(user.check_password(password_in=password, password=user.password))
+        self.assertTrue(await user.check_password(password, password_encoder=self.password_encoder))
         self.assertIsNone(user.telegram_id)
         self.assertTrue(user.is_active)
         self.assertFalse(user.is_superuser)
         self.assertIsNone(user.deleted_at)
         self.assertEqual(user.language, "ru")
 
-    def test_create_user_with_telegram_id(self):
+    async def test_register_user_with_telegram_id(self):
         telegram_id = fake.telegram_id()
-        user = entity.User.create(telegram_id=telegram_id, password=None, username=fake.username())
+        user = await entity.User.register(
+            telegram_id=telegram_id, password=None, username=fake.username(), password_encoder=self.password_encoder
+        )
 
         self.assertIsNone(user.password)
         self.assertEqual(user.telegram_id, telegram_id)
+        self.assertFalse(await user.check_password(fake.password(), password_encoder=self.password_encoder))
 
-    def test_set_password(self):
+    async def test_set_password(self):
         new_password = fake.password()
-        self.user.set_password(new_password)
+        await self.user.set_password(new_password, password_encoder=self.password_encoder)
 
-        self.assertTrue(self.user.check_password(new_password))
-        self.assertFalse(self.user.check_password(self.user.password))
+        self.assertTrue(await self.user.check_password(new_password, password_encoder=self.password_encoder))
+        self.assertFalse(await self.user.check_password(self.user.password, password_encoder=self.password_encoder))
 
 
 @pytest.mark.asyncio
 class TestUserService:
 
-    async def test_get_users(self, mock_user_repository: Any, user_service: Any):
-        expected_users = [
-            models.User(id=1, username='user1', telegram_id=123),
-            models.User(id=2, username='user2', telegram_id=456),
+    @staticmethod
+    def _users(*ids: int) -> list[models.User]:
+        return [
+            models.User(id=user_id, username=f"user{user_id}", language="en", created_at=datetime.datetime.now())
+            for user_id in ids
         ]
-        mock_user_repository.get_multi.return_value = expected_users
-
-        users = await user_service.get_users(skip=0, limit=10)
-
-        mock_user_repository.get_multi.assert_called_once_with(is_active=True, skip=0, limit=10)
-        assert len(users) == 2
-        assert users[0].id == 1
-        assert users[0].username == 'user1'
-        assert users[0].telegram_id == 123
-        assert users[1].id == 2
-        assert users[1].username == 'user2'
-        assert users[1].telegram_id == 456
+
+    async def test_get_users(self, mock_user_repository: Any, user_service: Any):
+        mock_user_repository.get_multi.return_value = self._users(1, 2)
+
+        page = await user_service.get_users(limit=10)
+
+        mock_user_repository.get_multi.assert_called_once_with(is_active=True, after=None, limit=11)
+        assert [user.id for user in page.items] == [1, 2]
+        assert page.items[0].username == 'user1'
+        assert page.next_cursor is None
+
+    async def test_get_users_pages_by_cursor(self, mock_user_repository: Any, user_service: Any):
+        mock_user_repository.get_multi.return_value = self._users(3, 4, 5)
+
+        page = await user_service.get_users(limit=2)
+
+        assert [user.id for user in page.items] == [3, 4]
+        assert decode_cursor(page.next_cursor) == 4
+        await user_service.get_users(limit=2, cursor=page.next_cursor)
+        assert mock_user_repository.get_multi.call_args.kwargs == {"is_active": True, "after": 4, "limit": 3}
+
+    @pytest.mark.parametrize("cursor", ["", "not a cursor", "LTE", "NA=="])
+    async def test_get_users_with_invalid_cursor(self, mock_user_repository: Any, user_service: Any, cursor):
+        with pytest.raises(ex.InvalidCursor):
+            await user_service.get_users(limit=10, cursor=cursor)
+        mock_user_repository.get_multi.assert_not_called()
 
     @pytest.mark.parametrize(
         "user_id, expected_user",